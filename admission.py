@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Highest first. Emergencies are never refused; low-priority messages
+# (greetings, help, a client repeating itself) are shed first
+PRIORITIES = ('emergency', 'normal', 'low')
+DECISIONS = ('admitted', 'limited', 'shed')
+# Share of the in-flight budget low-priority messages may use
+LOW_PRIORITY_SHARE = 0.5
+
+# `decision` is one of DECISIONS; `retry_after` is in seconds (0 when admitted)
+Decision = namedtuple('Decision', 'decision priority retry_after')
+
+
+class AdmissionControl:
+    """Per-client token buckets and a bounded number of chat requests in flight
+
+    Every client (an IP address or a session id) has a bucket of `burst`
+    tokens that refills at `rate` per second. A message takes one token and
+    is `limited` when the bucket is empty. At most `max_in_flight` admitted
+    messages are answered at once. Past LOW_PRIORITY_SHARE of that budget,
+    low-priority messages are `shed`; past all of it, normal ones are too.
+    Emergencies skip both checks but still count as in flight.
+
+    A message identical to the client's previous one is a repeat and drops
+    to low priority: the same text in a loop is what a stuck client or a bot
+    sends. Buckets are kept in last-used order and capped at `max_clients`,
+    so memory stays bounded however many addresses connect.
+
+    A batch of messages is admitted at once with `cost` set to its size: it
+    takes that many tokens and holds that many in-flight slots.
+
+    A rate or budget of 0 turns that check off. Every admitted message must
+    be followed by release() with the same cost.
+    """
+
+    def __init__(self, rate=5.0, burst=20, max_in_flight=64, max_clients=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self._clock = clock
+        # client -> [tokens, last refill time, hash of the last message]
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {(decision, priority): 0 for decision in DECISIONS for priority in PRIORITIES}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def admit(self, client, priority='normal', message_key=None, cost=1):
+        """Decision for `cost` messages from `client`; `message_key` spots repeats"""
+        with self._lock:
+            bucket = self._bucket(client)
+            repeat = message_key is not None and bucket[2] == message_key
+            bucket[2] = message_key
+            if priority != 'emergency':
+                if repeat:
+                    priority = 'low'
+                if self.rate > 0 and bucket[0] < cost:
+                    self.counters['limited', priority] += cost
+                    return Decision('limited', priority, (cost - bucket[0]) / self.rate)
+                if self.max_in_flight > 0:
+                    budget = self.max_in_flight * (LOW_PRIORITY_SHARE if priority == 'low' else 1)
+                    if self.in_flight >= budget:
+                        self.counters['shed', priority] += cost
+                        return Decision('shed', priority, 1.0)
+                bucket[0] -= cost
+            self.in_flight += cost
+            self.counters['admitted', priority] += cost
+            return Decision('admitted', priority, 0.0)
+
+    def release(self, cost=1):
+        """`cost` admitted messages have been answered"""
+        with self._lock:
+            self.in_flight -= cost
+
+    def _bucket(self, client):
+        """`client`'s bucket, refilled up to now; needs _lock"""
+        now = self._clock()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [float(self.burst), now, None]
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def stats(self):
+        """Decision counts by priority, clients tracked and messages in flight"""
+        with self._lock:
+            stats = {decision: {priority: self.counters[decision, priority] for priority in PRIORITIES}
+                     for decision in DECISIONS}
+            stats['clients'] = len(self._buckets)
+            stats['in_flight'] = self.in_flight
+        stats['rate'] = self.rate
+        stats['burst'] = self.burst
+        stats['max_in_flight'] = self.max_in_flight
+        return stats
@@ -0,0 +1,208 @@
+"""Incrementally maintained chat statistics
+
+Chat rows carry the disease generate_response matched, and every batch the
+log writer commits also updates the rollup tables below in the same
+transaction. /api/stats reads these small, indexed tables instead of
+scanning chat_logs.
+
+Run `python analytics.py backfill` once to fill the rollups from chat_logs
+written before this existed.
+"""
+import re
+import sys
+import threading
+from collections import Counter
+
+import db
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS disease_mentions (
+        disease TEXT PRIMARY KEY,
+        mentions INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS disease_mentions_hourly (
+        bucket TEXT NOT NULL,
+        disease TEXT NOT NULL,
+        mentions INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, disease)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS disease_mentions_daily (
+        day TEXT NOT NULL,
+        disease TEXT NOT NULL,
+        mentions INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, disease)
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_disease_mentions_mentions ON disease_mentions (mentions DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_chat_logs_timestamp ON chat_logs (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_emergency_logs_timestamp ON emergency_logs (timestamp)',
+)
+
+ROLLUP_TABLES = ('stats_counters', 'disease_mentions', 'disease_mentions_hourly', 'disease_mentions_daily')
+
+UPSERT_COUNTER = '''
+    INSERT INTO stats_counters (name, value) VALUES (?, ?)
+    ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+'''
+UPSERT_MENTIONS = '''
+    INSERT INTO disease_mentions (disease, mentions) VALUES (?, ?)
+    ON CONFLICT (disease) DO UPDATE SET mentions = mentions + excluded.mentions
+'''
+UPSERT_HOURLY = '''
+    INSERT INTO disease_mentions_hourly (bucket, disease, mentions) VALUES (?, ?, ?)
+    ON CONFLICT (bucket, disease) DO UPDATE SET mentions = mentions + excluded.mentions
+'''
+UPSERT_DAILY = '''
+    INSERT INTO disease_mentions_daily (day, disease, mentions) VALUES (?, ?, ?)
+    ON CONFLICT (day, disease) DO UPDATE SET mentions = mentions + excluded.mentions
+'''
+
+# Disease cards start with the disease name in bold; used by the backfill
+DISEASE_CARD_RE = re.compile(r'^📋 \*\*(.+?)\*\*')
+
+_ready_paths = set()
+_ready_lock = threading.Lock()
+
+
+def create_schema(conn):
+    """Create the rollup tables and the chat_logs.disease column if missing"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(chat_logs)')}
+    if 'disease' not in columns:
+        conn.execute('ALTER TABLE chat_logs ADD COLUMN disease TEXT')
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def ensure_schema(conn, path=None):
+    """Run create_schema once per database file and process"""
+    path = path or db.DATABASE_PATH
+    if path in _ready_paths:
+        return
+    with _ready_lock:
+        create_schema(conn)
+        _ready_paths.add(path)
+
+
+def hour_bucket(timestamp):
+    """'2026-10-18 14:05:09' -> '2026-10-18 14:00'"""
+    return timestamp[:13] + ':00'
+
+
+def record_batch(conn, chats, emergencies):
+    """Update the rollups for a batch of rows; runs inside the writer's transaction
+
+    `chats` rows are (user_message, bot_response, timestamp, disease) and
+    `emergencies` rows are (message, timestamp).
+    """
+    mentions = Counter()
+    hourly = Counter()
+    daily = Counter()
+    for _, _, timestamp, disease in chats:
+        if disease:
+            mentions[disease] += 1
+            hourly[hour_bucket(timestamp), disease] += 1
+            daily[timestamp[:10], disease] += 1
+
+    counters = []
+    if chats:
+        counters.append(('total_chats', len(chats)))
+    if emergencies:
+        counters.append(('total_emergencies', len(emergencies)))
+    conn.executemany(UPSERT_COUNTER, counters)
+    conn.executemany(UPSERT_MENTIONS, mentions.items())
+    conn.executemany(UPSERT_HOURLY, [(b, d, n) for (b, d), n in hourly.items()])
+    conn.executemany(UPSERT_DAILY, [(day, d, n) for (day, d), n in daily.items()])
+
+
+def get_counter(conn, name):
+    row = conn.execute('SELECT value FROM stats_counters WHERE name = ?', (name,)).fetchone()
+    return row['value'] if row else 0
+
+
+def top_diseases(conn, limit=5):
+    """Most mentioned diseases as [name, count] pairs"""
+    rows = conn.execute(
+        'SELECT disease, mentions FROM disease_mentions ORDER BY mentions DESC LIMIT ?',
+        (limit,)
+    ).fetchall()
+    return [[row['disease'], row['mentions']] for row in rows]
+
+
+def mention_trend(conn, period='day', since=None, disease=None):
+    """Mentions per day (or per hour) since a 'YYYY-MM-DD[ HH:00]' bound"""
+    table, column = ('disease_mentions_hourly', 'bucket') if period == 'hour' else ('disease_mentions_daily', 'day')
+    query = f'SELECT {column} AS period, disease, mentions FROM {table} WHERE {column} >= ?'
+    params = [since or '']
+    if disease:
+        query += ' AND disease = ?'
+        params.append(disease)
+    query += f' ORDER BY {column}'
+    return [dict(row) for row in conn.execute(query, params)]
+
+
+def backfill(conn, chunk_size=5000):
+    """Fill chat_logs.disease and rebuild every rollup from the stored logs
+
+    Existing rows are resolved from the stored bot response, so the result
+    matches what the bot actually answered. Safe to run more than once;
+    stop the server first so no batch is counted twice. Only rows still in
+    the database are counted, so months moved out by log_archive.py drop
+    out of the rebuilt rollups.
+    """
+    ensure_schema(conn)
+    last_id = 0
+    resolved = 0
+    while True:
+        rows = conn.execute(
+            'SELECT id, bot_response FROM chat_logs WHERE id > ? AND disease IS NULL ORDER BY id LIMIT ?',
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        updates = []
+        for row in rows:
+            match = DISEASE_CARD_RE.match(row['bot_response'])
+            if match:
+                updates.append((match.group(1), row['id']))
+        with conn:
+            conn.executemany('UPDATE chat_logs SET disease = ? WHERE id = ?', updates)
+        resolved += len(updates)
+
+    with conn:
+        for table in ROLLUP_TABLES:
+            conn.execute(f'DELETE FROM {table}')
+        conn.execute('''
+            INSERT INTO stats_counters (name, value)
+            SELECT 'total_chats', COUNT(*) FROM chat_logs
+            UNION ALL SELECT 'total_emergencies', COUNT(*) FROM emergency_logs
+        ''')
+        conn.execute('''
+            INSERT INTO disease_mentions (disease, mentions)
+            SELECT disease, COUNT(*) FROM chat_logs WHERE disease IS NOT NULL GROUP BY disease
+        ''')
+        conn.execute('''
+            INSERT INTO disease_mentions_hourly (bucket, disease, mentions)
+            SELECT strftime('%Y-%m-%d %H:00', timestamp), disease, COUNT(*)
+            FROM chat_logs WHERE disease IS NOT NULL GROUP BY 1, 2
+        ''')
+        conn.execute('''
+            INSERT INTO disease_mentions_daily (day, disease, mentions)
+            SELECT date(timestamp), disease, COUNT(*)
+            FROM chat_logs WHERE disease IS NOT NULL GROUP BY 1, 2
+        ''')
+    return resolved
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['backfill']:
+        print('Usage: python analytics.py backfill')
+        sys.exit(1)
+    conn = db.connect()
+    resolved = backfill(conn)
+    print(f'✅ Rollups rebuilt; {resolved} chat logs matched to a disease')
+    conn.close()
@@ -1,7 +1,31 @@
-from flask import Flask, render_template, request, jsonify
-import sqlite3
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from datetime import datetime
+import base64
+import hashlib
+import json
+import math
+import os
 import re
+import threading
+from itertools import chain, islice
+
+import analytics
+import db
+import languages
+import metrics
+from admission import AdmissionControl
+from catalog import get_catalog, reload_catalog
+from compression import choose_encoding, compress
+from keyword_matcher import KeywordMatcher
+from log_writer import LogWriter, utc_timestamp
+from payloads import Payload
+from response_cache import ResponseCache
+from session_store import SessionStore, valid_session_id
+from search import ensure_fts, search_symptoms, symptom_terms, unlisted_symptom_terms
+from symptom_ranker import get_ranker, highlight, terms as ranker_terms
+from metrics import CHAT_LANGUAGES, CHAT_REQUEST_SECONDS, CHAT_RESPONSES, CHAT_STAGE_SECONDS, DB_QUERY_SECONDS
+from query_parser import INTENTS, normalize, parse_query
+from warmup import WarmUp
 
 app = Flask(__name__)
 
@@ -13,169 +37,741 @@ EMERGENCY_KEYWORDS = [
     'severe headache', 'paralysis', 'severe pain'
 ]
 
+GREETINGS = ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening']
+
+HELP_COMMANDS = ['help', 'list']
+
+# Sections a disease answer can show, keyed by intent; a message without an
+# intent keyword gets the default pair
+DISEASE_SECTIONS = {
+    'symptoms': '🤒 **SYMPTOMS:**',
+    'prevention': '🛡️ **PREVENTION:**',
+    'causes': '🦠 **CAUSES:**',
+    'risk_factors': '📈 **RISK FACTORS:**',
+}
+DEFAULT_INTENTS = ('symptoms', 'prevention')
+
+# A message is read as a list of symptoms only when its best match shares
+# at least SYMPTOM_MIN_TERMS words with it, or shares every word it has and
+# scores SYMPTOM_MIN_SCORE; otherwise a disease we do not know ("heart
+# disease", "bird flu") would get a confident but unrelated symptom answer
+# instead of suggestions
+SYMPTOM_MIN_TERMS = 2
+SYMPTOM_MIN_SCORE = 0.3
+
+# Disease terms that still make a message a follow-up ("tell me more")
+FOLLOW_UP_WORDS = frozenset(['more', 'else', 'other', 'that', 'this', 'again'])
+
+def _in_all_languages(english, phrases):
+    """English keywords plus every language's phrases, normalized like messages"""
+    return english + [normalize(phrase) for language in phrases.values() for phrase in language]
+
+# All keyword lists, in every supported language, compiled into one
+# automaton; a message is still scanned once. Emergency keywords also match
+# inflected words ("seizures", "chest pains"): a missed emergency costs
+# more than a false alarm
+KEYWORD_MATCHER = KeywordMatcher({
+    'emergency': _in_all_languages(EMERGENCY_KEYWORDS, languages.EMERGENCY_PHRASES),
+    'greeting': _in_all_languages(GREETINGS, languages.GREETINGS),
+    'help': _in_all_languages(HELP_COMMANDS, languages.HELP_COMMANDS),
+}, open_ended=('emergency',))
+
+# Chat and emergency rows are written in batches by a background thread
+log_writer = LogWriter(
+    db.DATABASE_PATH,
+    max_queue=int(os.environ.get('CHATBOT_LOG_QUEUE_SIZE', 10000)),
+    batch_size=int(os.environ.get('CHATBOT_LOG_BATCH_SIZE', 200)),
+    flush_interval=float(os.environ.get('CHATBOT_LOG_FLUSH_INTERVAL', 0.5)),
+    overflow=os.environ.get('CHATBOT_LOG_OVERFLOW', 'block'),
+    spill_path=os.environ.get('CHATBOT_LOG_SPILL_PATH', 'log_spill.jsonl'),
+)
+
+# Dashboard numbers kept in memory and pushed over /api/stats/stream. Made
+# by the first dashboard request; a chat-only process never loads it
+_stats_feed = None
+_stats_feed_lock = threading.Lock()
+STREAM_KEEPALIVE = 15
+
+# Rendered responses keyed on the normalized query; cleared on catalog reload
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('CHATBOT_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('CHATBOT_CACHE_TTL', 300)),
+)
+
+# Encoded JSON payloads of disease cards, the help list and emergency
+# replies; kept until the catalog changes (no TTL). About 2.7 KB per card,
+# held by every worker process
+payload_cache = ResponseCache(
+    max_entries=int(os.environ.get('CHATBOT_PAYLOAD_CACHE_SIZE', 1024)),
+    ttl=None,
+)
+# Default cards the warm-up renders ahead of time: the most mentioned
+# diseases, then the rest in catalog order
+PRERENDER_CARDS = int(os.environ.get('CHATBOT_PRERENDER_CARDS', 300))
+
+# Last disease and sections shown per chat session, for follow-up questions
+sessions = SessionStore(
+    max_sessions=int(os.environ.get('CHATBOT_SESSION_MAX', 100000)),
+    ttl=float(os.environ.get('CHATBOT_SESSION_TTL', 1800)),
+)
+
+# Per-client token buckets and a bound on /api/chat messages answered at
+# once; emergencies are always admitted
+admission = AdmissionControl(
+    rate=float(os.environ.get('CHATBOT_RATE_LIMIT', 5)),
+    burst=int(os.environ.get('CHATBOT_RATE_BURST', 20)),
+    max_in_flight=int(os.environ.get('CHATBOT_MAX_IN_FLIGHT', 64)),
+)
+# Rate limit per client 'ip', or per chat 'session' (the IP when there is none)
+RATE_LIMIT_KEY = os.environ.get('CHATBOT_RATE_LIMIT_KEY', 'ip')
+
+# Largest /api/chat/batch request accepted as a JSON array, and how many
+# messages are answered and logged together when streaming
+MAX_BATCH_SIZE = int(os.environ.get('CHATBOT_MAX_BATCH_SIZE', 10000))
+BATCH_CHUNK_SIZE = 500
+
+# /api/chat/batch has its own per-client bucket, counted in messages, so
+# bulk work neither needs nor uses up the interactive burst
+batch_admission = AdmissionControl(
+    rate=float(os.environ.get('CHATBOT_BATCH_RATE_LIMIT', 200)),
+    burst=int(os.environ.get('CHATBOT_BATCH_BURST', MAX_BATCH_SIZE)),
+    max_in_flight=int(os.environ.get('CHATBOT_BATCH_MAX_IN_FLIGHT', MAX_BATCH_SIZE)),
+)
+
+# Serialized /api/diseases bodies, one entry per (fields, cursor, limit)
+listing_cache = ResponseCache(max_entries=256, ttl=float(os.environ.get('CHATBOT_CACHE_TTL', 300)))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Scrape-time views of state other objects already keep
+metrics.registry.gauge(
+    'chatbot_db_connections', 'Pooled database connections', labelnames=('path', 'state'),
+    read=lambda: {(path, state): stats[state] for path, stats in db.pool_stats().items() for state in ('open', 'idle')})
+metrics.registry.gauge(
+    'chatbot_log_queue_depth', 'Rows waiting for the log writer', labelnames=('table',),
+    read=lambda: {('chat_logs',): log_writer.stats()['chat_queue_depth'],
+                  ('emergency_logs',): log_writer.stats()['emergency_queue_depth']})
+metrics.registry.gauge(
+    'chatbot_log_rows_written_total', 'Rows committed by the log writer', labelnames=('table',), kind='counter',
+    read=lambda: {('chat_logs',): log_writer.counters['chat_rows_written'],
+                  ('emergency_logs',): log_writer.counters['emergency_rows_written']})
+metrics.registry.gauge(
+    'chatbot_log_rows_lost_total', 'Chat log rows dropped or spilled to disk', labelnames=('reason',), kind='counter',
+    read=lambda: {('dropped',): log_writer.counters['rows_dropped'], ('spilled',): log_writer.counters['rows_spilled']})
+metrics.registry.gauge(
+    'chatbot_response_cache_lookups_total', 'Response cache lookups', labelnames=('result',), kind='counter',
+    read=lambda: {('hit',): response_cache.counters['hits'], ('miss',): response_cache.counters['misses']})
+metrics.registry.gauge(
+    'chatbot_response_cache_entries', 'Responses currently cached', read=lambda: response_cache.stats()['size'])
+metrics.registry.gauge(
+    'chatbot_sessions', 'Chat sessions currently remembered', read=lambda: len(sessions))
+metrics.registry.gauge(
+    'chatbot_session_lookups_total', 'Session lookups for follow-up questions', labelnames=('result',), kind='counter',
+    read=lambda: {('hit',): sessions.counters['hits'], ('miss',): sessions.counters['misses']})
+metrics.registry.gauge(
+    'chatbot_admission_decisions_total', 'Chat messages admitted, rate limited or shed', kind='counter',
+    labelnames=('decision', 'priority'), read=lambda: dict(admission.counters))
+metrics.registry.gauge(
+    'chatbot_chat_in_flight', 'Admitted chat messages being answered', read=lambda: admission.in_flight)
+metrics.registry.gauge(
+    'chatbot_stats_stream_subscribers', 'Open /api/stats/stream connections',
+    read=lambda: _stats_feed.subscribers if _stats_feed else 0)
+metrics.registry.gauge(
+    'chatbot_catalog_diseases', 'Diseases in the in-memory catalog', read=lambda: len(get_catalog()))
+metrics.registry.gauge(
+    'chatbot_ready', '1 once the process has warmed up (see /api/ready)', read=lambda: int(warmup.ready))
+
+def _warm_symptom_index():
+    get_ranker().rank('fever and headache')
+
+def _warm_database():
+    with get_db_connection() as conn:
+        ensure_fts(conn)
+
+def _warm_payloads():
+    prerender_payloads()
+
+# Everything the first requests would otherwise load, in the background
+# from server start; /api/ready turns 200 once it is done
+warmup = WarmUp([
+    ('catalog', get_catalog),
+    ('symptom_index', _warm_symptom_index),
+    ('database', _warm_database),
+    ('payloads', _warm_payloads),
+])
+
+def get_stats_feed():
+    """The live stats feed, created and subscribed to the log writer on first use"""
+    global _stats_feed
+    if _stats_feed is None:
+        with _stats_feed_lock:
+            if _stats_feed is None:
+                from stats_feed import StatsFeed
+                feed = StatsFeed()
+                log_writer.add_listener(feed.publish)
+                _stats_feed = feed
+    return _stats_feed
+
 def get_db_connection():
-    """Create database connection"""
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Borrow a pooled database connection for a `with` block"""
+    return db.connection()
+
+def find_emergency_keywords(message):
+    """Return every emergency keyword hit in the message, with its span"""
+    return [match for match in KEYWORD_MATCHER.find_all(normalize(message)) if match.label == 'emergency']
 
 def detect_emergency(message):
     """Check if message contains emergency keywords"""
-    message_lower = message.lower()
-    for keyword in EMERGENCY_KEYWORDS:
-        if keyword in message_lower:
-            return True, keyword
+    matches = find_emergency_keywords(message)
+    if matches:
+        return True, matches[0].keyword
     return False, None
 
-def log_chat(user_message, bot_response):
-    """Store chat conversation in database"""
-    conn = get_db_connection()
-    conn.execute(
-        'INSERT INTO chat_logs (user_message, bot_response) VALUES (?, ?)',
-        (user_message, bot_response)
-    )
-    conn.commit()
-    conn.close()
+def log_chat(user_message, bot_response, disease=None):
+    """Queue chat conversation for the background log writer"""
+    log_writer.submit_chat(user_message, bot_response, disease)
 
 def log_emergency(message):
-    """Store emergency alert in database"""
-    conn = get_db_connection()
-    conn.execute(
-        'INSERT INTO emergency_logs (message) VALUES (?)',
-        (message,)
-    )
-    conn.commit()
-    conn.close()
+    """Queue emergency alert; the log writer flushes these immediately"""
+    log_writer.submit_emergency(message)
 
 def get_disease_info(disease_name):
-    """Fetch disease information from database"""
-    conn = get_db_connection()
-    disease = conn.execute(
-        'SELECT * FROM diseases WHERE LOWER(name) = ?',
-        (disease_name.lower(),)
-    ).fetchone()
-    conn.close()
-    return disease
+    """Fetch disease information from the in-memory catalog"""
+    return get_catalog().get(disease_name)
 
 def search_disease_by_keyword(keyword):
     """Search diseases by keyword in name"""
-    conn = get_db_connection()
-    keyword = f'%{keyword.lower()}%'
-    diseases = conn.execute(
-        'SELECT * FROM diseases WHERE LOWER(name) LIKE ? LIMIT 5',
-        (keyword,)
-    ).fetchall()
-    conn.close()
-    return diseases
-
-def generate_response(message):
-    """Main chatbot engine - provides symptoms and prevention for diseases"""
-    message_clean = message.lower().strip()
-    
-    # Check for emergency
-    is_emergency, emergency_keyword = detect_emergency(message)
-    if is_emergency:
-        log_emergency(message)
-        return {
-            'type': 'emergency',
-            'message': f'⚠️ EMERGENCY DETECTED: {emergency_keyword}\n\n'
-                      '🚨 Please seek immediate medical attention!\n\n'
-                      '📞 Emergency Numbers:\n'
-                      '• India: 112 / 108\n'
-                      '• US: 911\n'
-                      '• UK: 999\n\n'
-                      'If you are experiencing a medical emergency, please call emergency services or go to the nearest hospital immediately.'
-        }
-    
-    # Greetings
-    greetings = ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening']
-    if any(greet in message_clean for greet in greetings):
-        return {
-            'type': 'greeting',
-            'message': '👋 Hello! I\'m your Health Information Assistant.\n\n'
-                      'Simply type any disease name to get information about its symptoms and prevention.\n\n'
-                      'Examples:\n'
-                      '• Type "diabetes" to learn about diabetes\n'
-                      '• Type "covid" for COVID-19 information\n'
-                      '• Type "malaria" for malaria details\n\n'
-                      'What disease would you like to know about?'
-        }
-    
-    # Help command
-    if 'help' in message_clean or 'list' in message_clean:
-        conn = get_db_connection()
-        diseases = conn.execute('SELECT name FROM diseases ORDER BY name').fetchall()
-        conn.close()
-        
-        disease_list = '\n'.join([f'• {d["name"]}' for d in diseases])
-        return {
-            'type': 'help',
-            'message': f'📚 Available Diseases in Database:\n\n{disease_list}\n\n'
-                      'Just type the disease name to get symptoms and prevention information!'
-        }
-    
-    # Remove common words to get disease name
-    words_to_remove = ['what', 'is', 'tell', 'me', 'about', 'information', 'on', 'explain', 
-                       'describe', 'details', 'of', 'the', 'a', 'an', '?', 'prevention', 
-                       'symptoms', 'for', 'give', 'show']
-    
-    disease_query = message_clean
-    for word in words_to_remove:
-        disease_query = disease_query.replace(word, ' ')
-    disease_query = disease_query.strip()
-    
-    # If query is empty after removing common words, use original message
-    if not disease_query:
-        disease_query = message_clean
-    
+    return get_catalog().search(keyword, limit=5)
+
+def cached_response(key, render, *args):
+    """Return render(*args), cached until the catalog changes or the entry expires"""
+    version = get_catalog().version
+    response = response_cache.get(key, version)
+    if response is None:
+        response = render(*args)
+        response_cache.put(key, version, response)
+    return response
+
+def cached_payload(key, render, *args):
+    """Payload of render(*args), kept until the catalog changes"""
+    version = get_catalog().version
+    payload = payload_cache.get(key, version)
+    if payload is None:
+        payload = Payload(render(*args))
+        payload_cache.put(key, version, payload)
+    return payload
+
+def card_payload(disease, intents=DEFAULT_INTENTS):
+    """Payload of one disease card showing the `intents` sections"""
+    return cached_payload(('disease', disease['id'], intents), render_disease, disease, intents)
+
+def prerender_payloads():
+    """Encode the help list and the default cards of the most mentioned diseases
+
+    Up to PRERENDER_CARDS cards (and the payload cache size): the diseases
+    mentioned most in the chat logs, then the rest in catalog order. Other
+    cards are rendered on first use. Returns the payloads encoded.
+    """
+    catalog = get_catalog()
+    limit = max(0, min(PRERENDER_CARDS, payload_cache.max_entries - 1, len(catalog)))
+    with get_db_connection() as conn:
+        analytics.ensure_schema(conn)
+        top = analytics.top_diseases(conn, limit=limit)
+    diseases = {}
+    for name, _ in top:
+        disease = catalog.get(name)
+        if disease is not None:
+            diseases.setdefault(disease['id'], disease)
+    for index in range(len(catalog)):
+        if len(diseases) >= limit:
+            break
+        disease = catalog.records[index]
+        diseases.setdefault(disease['id'], disease)
+    payloads = [cached_payload('help', render_help)]
+    payloads += [card_payload(disease) for disease in diseases.values()]
+    for payload in payloads:
+        payload.body()
+        payload.body(compact=True)
+    return payloads
+
+def render_help():
+    """Help message listing every disease in the catalog"""
+    disease_list = '\n'.join([f'• {name}' for name in get_catalog().names])
+    return {
+        'type': 'help',
+        'message': f'📚 Available Diseases in Database:\n\n{disease_list}\n\n'
+                  'Just type the disease name to get symptoms and prevention information!'
+    }
+
+def render_disease_query(disease_query, intents=DEFAULT_INTENTS):
+    """Resolve a normalized disease query to a Payload; not-found results carry only suggestions
+
+    Only the fields named in `intents` are rendered and returned in the
+    `disease` projection, alongside its id and name.
+    """
     # Try to find disease in database
+    start = metrics.clock()
     disease = get_disease_info(disease_query)
+    CHAT_STAGE_SECONDS.observe_since(start, 'exact_lookup')
     
     # If no exact match, try keyword search
     if not disease:
+        start = metrics.clock()
         diseases = search_disease_by_keyword(disease_query)
         if diseases:
             disease = diseases[0]
+        CHAT_STAGE_SECONDS.observe_since(start, 'keyword_search')
+    
+    # Still nothing: allow for typos such as "maleria" or "tuberclosis"
+    if not disease:
+        start = metrics.clock()
+        disease = get_catalog().fuzzy_get(disease_query)
+        CHAT_STAGE_SECONDS.observe_since(start, 'fuzzy_lookup')
     
     if disease:
-        # Build simple response with symptoms and prevention
-        response = f'📋 **{disease["name"]}**\n\n'
-        response += f'🤒 **SYMPTOMS:**\n{disease["symptoms"]}\n\n'
-        response += f'🛡️ **PREVENTION:**\n{disease["prevention"]}\n\n'
-        response += '⚠️ **Disclaimer:** This information is for educational purposes only. Always consult a healthcare professional for medical advice and diagnosis.'
-        
+        return card_payload(disease, intents)
+    
+    # Not a disease name: treat the message as a list of symptoms
+    start = metrics.clock()
+    matches = rank_symptoms(disease_query)
+    CHAT_STAGE_SECONDS.observe_since(start, 'symptom_rank')
+    if matches:
+        return Payload(render_symptom_matches(matches))
+    
+    # No confident ranking: full-text search for several symptom words,
+    # first for diseases mentioning all of them in any column. When none
+    # does but every word is a known symptom ("rash itching"), rank the
+    # diseases listing any of them as symptoms, most words first
+    if len(symptom_terms(disease_query)) >= SYMPTOM_MIN_TERMS:
+        start = metrics.clock()
+        with get_db_connection() as conn:
+            matches, _ = search_symptoms(conn, disease_query, limit=5, mode='all')
+            if not matches and not unlisted_symptom_terms(conn, disease_query):
+                matches, _ = search_symptoms(conn, disease_query, limit=5, mode='any', column='symptoms')
+        DB_QUERY_SECONDS.observe_since(start, 'symptom_search')
+        CHAT_STAGE_SECONDS.observe_since(start, 'symptom_search')
+        if matches:
+            return Payload(render_symptom_matches(matches))
+    
+    # Disease not found - remember similar diseases, closest spellings first
+    start = metrics.clock()
+    catalog = get_catalog()
+    similar = [d['name'] for d in catalog.fuzzy_search(disease_query, limit=5)]
+    words = [w for w in disease_query.lower().split() if len(w) >= 3]
+    # Twice as many as shown, since some may be fuzzy matches already
+    for disease_id in catalog.similar_ids(words, limit=10):
+        if len(similar) >= 5:
+            break
+        name = catalog.by_id[disease_id]['name']
+        if name not in similar:
+            similar.append(name)
+    CHAT_STAGE_SECONDS.observe_since(start, 'suggestions')
+    return Payload({
+        'type': 'not_found',
+        'similar': similar
+    })
+
+def render_disease(disease, intents):
+    """Answer with the `intents` sections of one disease record"""
+    start = metrics.clock()
+    response = f'📋 **{disease["name"]}**\n\n'
+    for field in intents:
+        response += f'{DISEASE_SECTIONS[field]}\n{disease[field]}\n\n'
+    response += '⚠️ **Disclaimer:** This information is for educational purposes only. Always consult a healthcare professional for medical advice and diagnosis.'
+    
+    CHAT_STAGE_SECONDS.observe_since(start, 'format')
+    return {
+        'type': 'disease_info', 
+        'message': response,
+        'disease': {field: disease[field] for field in ('id', 'name') + intents}
+    }
+
+def rank_symptoms(disease_query, limit=5):
+    """TF-IDF matches for a symptom list, shaped like search_symptoms() rows
+
+    Empty when even the best match is weak (see SYMPTOM_MIN_TERMS).
+    """
+    ranked = get_ranker().rank(disease_query, limit)
+    if not ranked:
+        return []
+    shared = len(ranked[0][2])
+    if shared < SYMPTOM_MIN_TERMS and (ranked[0][1] < SYMPTOM_MIN_SCORE or shared < len(ranker_terms(disease_query))):
+        return []
+    by_id = get_catalog().by_id
+    matches = []
+    for disease_id, score, matched in ranked:
+        record = by_id[disease_id]
+        matches.append({'name': record['name'], 'score': score, 'snippet': highlight(record['symptoms'], set(matched))})
+    return matches
+
+def render_symptom_matches(matches):
+    """Conditions whose symptoms best match the message, best first"""
+    lines = [f'{i}. **{m["name"]}** — {m["snippet"]}' for i, m in enumerate(matches, 1)]
+    response = '🔎 **Conditions with matching symptoms:**\n\n'
+    response += '\n'.join(lines) + '\n\n'
+    response += 'Type a disease name for its full symptoms and prevention.\n\n'
+    response += '⚠️ **Disclaimer:** This is not a diagnosis. Always consult a healthcare professional for medical advice and diagnosis.'
+    return {
+        'type': 'symptom_search',
+        'message': response,
+        'matches': [{'name': m['name'], 'score': m['score']} for m in matches]
+    }
+
+def not_found_response(message, similar_diseases):
+    """Not-found reply quoting the user's original message"""
+    if similar_diseases:
+        similar_list = '\n'.join([f'• {name}' for name in similar_diseases])
         return {
-            'type': 'disease_info', 
-            'message': response,
-            'disease': dict(disease)
+            'type': 'not_found',
+            'message': f'❌ Disease "{message}" not found in database.\n\n'
+                      f'Did you mean:\n{similar_list}\n\n'
+                      'Type "help" or "list" to see all available diseases.'
         }
+    return {
+        'type': 'not_found',
+        'message': f'❌ Disease "{message}" not found in database.\n\n'
+                  'Type "help" or "list" to see all available diseases.\n\n'
+                  'Available diseases include: COVID-19, Dengue, Diabetes, Malaria, Tuberculosis, and many more!'
+    }
+
+def answer_follow_up(parsed, session_id):
+    """Payload answering a message that names no disease from the session's last one
+
+    "what about prevention?" shows the asked-for sections; "tell me more"
+    shows the sections not shown last time. Returns None when the session
+    has nothing to go on.
+    """
+    state = sessions.get(session_id)
+    if state is None:
+        return None
+    disease = get_catalog().by_id.get(state.disease_id)
+    if disease is None:
+        return None
+    intents = parsed.intents or tuple(i for i in INTENTS if i not in state.intents) or INTENTS
+    payload = card_payload(disease, intents)
+    # get() already renewed the session; only the shown sections change
+    state.intents = intents
+    return payload
+
+def render_emergency(keywords):
+    """Emergency alert naming the detected `keywords`"""
+    return {
+        'type': 'emergency',
+        'keywords': list(keywords),
+        'message': f'⚠️ EMERGENCY DETECTED: {", ".join(keywords)}\n\n'
+                  '🚨 Please seek immediate medical attention!\n\n'
+                  '📞 Emergency Numbers:\n'
+                  '• India: 112 / 108\n'
+                  '• US: 911\n'
+                  '• UK: 999\n\n'
+                  'If you are experiencing a medical emergency, please call emergency services or go to the nearest hospital immediately.'
+    }
+
+GREETING_PAYLOAD = Payload({
+    'type': 'greeting',
+    'message': '👋 Hello! I\'m your Health Information Assistant.\n\n'
+              'Simply type any disease name to get information about its symptoms and prevention.\n\n'
+              'Examples:\n'
+              '• Type "diabetes" to learn about diabetes\n'
+              '• Type "covid" for COVID-19 information\n'
+              '• Type "malaria" for malaria details\n\n'
+              'What disease would you like to know about?'
+})
+
+def build_payload(message, session_id=None):
+    """Main chatbot engine - the Payload answering `message`; does not log
+
+    With a `session_id`, follow-up questions are answered from the last
+    disease of that session, and every disease answer is remembered.
+    Disease cards, the help list, greetings and emergency alerts are
+    encoded once and shared between requests.
+    """
+    # One tokenizer pass: case-folded text, disease terms and intents
+    start = metrics.clock()
+    parsed = parse_query(message)
+    CHAT_STAGE_SECONDS.observe_since(start, 'normalize')
+    CHAT_LANGUAGES.inc(parsed.language)
+    
+    # One pass finds emergency, greeting and help phrases
+    start = metrics.clock()
+    hits = KEYWORD_MATCHER.scan(parsed.text)
+    CHAT_STAGE_SECONDS.observe_since(start, 'keyword_scan')
+    
+    # Check for emergency; the alert depends only on the keywords found
+    if 'emergency' in hits:
+        emergency_keywords = tuple(dict.fromkeys(m.keyword for m in hits['emergency']))
+        return cached_payload(('emergency', emergency_keywords), render_emergency, emergency_keywords)
+    
+    # Greetings
+    if 'greeting' in hits:
+        return GREETING_PAYLOAD
+    
+    # Help command
+    if 'help' in hits:
+        return cached_payload('help', render_help)
+    
+    # No disease named: a follow-up to the session's last answer
+    if session_id and all(term in FOLLOW_UP_WORDS for term in parsed.terms):
+        start = metrics.clock()
+        payload = answer_follow_up(parsed, session_id)
+        CHAT_STAGE_SECONDS.observe_since(start, 'session')
+        if payload is not None:
+            return payload
+    
+    # If nothing is left after removing common words, use the whole message
+    disease_query = parsed.disease_query or ' '.join(parsed.tokens) or parsed.text
+    intents = parsed.intents or DEFAULT_INTENTS
+    
+    start = metrics.clock()
+    payload = cached_response(('query', disease_query, intents), render_disease_query, disease_query, intents)
+    CHAT_STAGE_SECONDS.observe_since(start, 'resolve')
+    if payload.type == 'not_found':
+        return Payload(not_found_response(message, payload.response['similar']))
+    if session_id and payload.type == 'disease_info':
+        sessions.put(session_id, payload.response['disease']['id'], intents)
+    return payload
+
+def build_response(message, session_id=None):
+    """Response dict for `message`, a copy the caller may change; does not log"""
+    return dict(build_payload(message, session_id).response)
+
+def generate_response(message, session_id=None):
+    """Answer one message, logging it first if it is an emergency"""
+    response = build_response(message, session_id)
+    if response['type'] == 'emergency':
+        log_emergency(message)
+    return response
+
+def compact_response(response):
+    """Drop the `disease` projection, for clients that only show the message"""
+    response.pop('disease', None)
+    return response
+
+def iter_responses(messages, chunk_size=BATCH_CHUNK_SIZE, compact=False):
+    """Answer many messages in order, yielding one response per message
+
+    Identical messages in a chunk are answered once. Log rows for a whole
+    chunk (every chat plus any emergencies) are written in one transaction
+    before its responses are yielded.
+    """
+    for chunk in iter_chunks(messages, chunk_size):
+        yield from _answer_chunk(chunk, compact)
+
+def iter_chunks(messages, chunk_size):
+    """Lists of up to `chunk_size` messages (all of them when it is None)"""
+    chunk = []
+    for message in messages:
+        chunk.append(message)
+        if chunk_size and len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate_responses(messages, compact=False):
+    """Answer a list of messages in order; all log rows go in one transaction"""
+    return list(iter_responses(messages, chunk_size=None, compact=compact))
+
+def _answer_chunk(messages, compact=False):
+    answers = {}
+    results = []
+    chat_rows = []
+    emergency_rows = []
+    timestamp = utc_timestamp()
+    for message in messages:
+        message = message.strip() if isinstance(message, str) else ''
+        if not message:
+            results.append({'error': 'Empty message'})
+            continue
+        response = answers.get(message)
+        if response is None:
+            response = answers[message] = build_response(message)
+        if response['type'] == 'emergency':
+            emergency_rows.append((message, timestamp))
+        CHAT_RESPONSES.inc(response['type'])
+        disease = response.get('disease')
+        chat_rows.append((message, response['message'], timestamp, disease['name'] if disease else None))
+        results.append(compact_response(dict(response)) if compact else response)
+    log_writer.write_now(chat_rows, emergency_rows)
+    return results
+
+def admit_chat(message, client_ip, session_id=None):
+    """Admission decision for one chat message; an admitted one needs admission.release()
+
+    One keyword scan sets the priority: emergencies are never refused,
+    greetings and help are shed first.
+    """
+    text = normalize(message)
+    hits = KEYWORD_MATCHER.scan(text)
+    if 'emergency' in hits:
+        priority = 'emergency'
+    elif 'greeting' in hits or 'help' in hits:
+        priority = 'low'
+    else:
+        priority = 'normal'
+    client = session_id if RATE_LIMIT_KEY == 'session' and session_id else client_ip
+    return admission.admit(client, priority, hash(text))
+
+def rejection_response(decision):
+    """Body and status code for a message that was rate limited or shed"""
+    retry_after = max(1, math.ceil(decision.retry_after))
+    if decision.decision == 'limited':
+        return {
+            'type': 'rate_limited',
+            'message': '⏳ You are sending messages too quickly. Please wait a moment and try again.',
+            'retry_after': retry_after
+        }, 429
+    return {
+        'type': 'busy',
+        'message': '⏳ The assistant is very busy right now. Please try again in a moment.',
+        'retry_after': retry_after
+    }, 503
+
+def answer_chat(user_message, session_id=None):
+    """Answer a chat message and log the conversation; returns the Payload to send"""
+    request_start = metrics.clock()
+    payload = build_payload(user_message, session_id)
+    response = payload.response
+    if response['type'] == 'emergency':
+        log_emergency(user_message)
+    CHAT_RESPONSES.inc(response['type'])
+    
+    # Log conversation with the matched disease, which feeds the statistics
+    start = metrics.clock()
+    disease = response.get('disease')
+    log_chat(user_message, response['message'], disease['name'] if disease else None)
+    CHAT_STAGE_SECONDS.observe_since(start, 'log_enqueue')
+    
+    CHAT_REQUEST_SECONDS.observe_since(request_start)
+    return payload
+
+def handle_chat(user_message, compact=False, session_id=None):
+    """Answer a chat message and log the conversation; returns a response dict"""
+    response = dict(answer_chat(user_message, session_id).response)
+    return compact_response(response) if compact else response
+
+def encode_cursor(record):
+    """Opaque /api/diseases cursor pointing just after `record`"""
+    key = json.dumps([record['name'], record['id']], ensure_ascii=False)
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(name, id) key from a cursor; raises ValueError if it is malformed"""
+    try:
+        name, disease_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(name, str) or not isinstance(disease_id, int):
+        raise ValueError('Invalid cursor')
+    return name, disease_id
+
+def render_disease_listing(fields, cursor, limit):
+    """Serialized /api/diseases body; a bare list when limit is None, else one page"""
+    catalog = get_catalog()
+    if limit is None:
+        records = catalog.listing
+    else:
+        records = catalog.page(decode_cursor(cursor) if cursor else None, limit)
+    items = [{field: record[field] for field in fields} for record in records]
+    if limit is None:
+        payload = items
     else:
-        # Disease not found
-        conn = get_db_connection()
-        all_diseases = conn.execute('SELECT name FROM diseases ORDER BY name').fetchall()
-        conn.close()
+        last_page = not records or records[-1]['id'] == catalog.listing[-1]['id']
+        payload = {'diseases': items, 'next_cursor': None if last_page else encode_cursor(records[-1])}
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def listing_query(args):
+    """(fields, cursor, limit) of an /api/diseases query; raises ValueError with the error to send
+
+    `args` maps query parameters to their first value. Shared by the Flask
+    and ASGI routes.
+    """
+    catalog = get_catalog()
+    fields = catalog.fields
+    if args.get('fields'):
+        fields = tuple(dict.fromkeys(f.strip() for f in args['fields'].split(',') if f.strip()))
+        unknown = [f for f in fields if f not in catalog.fields]
+        if unknown or not fields:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    cursor = args.get('cursor') or None
+    limit = None
+    if cursor or 'limit' in args:
+        try:
+            limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError:
+            raise ValueError('Invalid limit or cursor')
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return fields, cursor, limit
+
+def listing_etag(version, key, encoding):
+    """Strong ETag of the /api/diseases body for `key` = (fields, cursor, limit)"""
+    query_hash = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]
+    return f'{version}-{query_hash}' + (f'-{encoding}' if encoding else '')
+
+def listing_body(version, key, encoding):
+    """/api/diseases body for `key`, compressed with `encoding`; cached per catalog version"""
+    bodies = listing_cache.get(key, version)
+    if bodies is None:
+        bodies = {None: render_disease_listing(*key)}
+        listing_cache.put(key, version, bodies)
+    if encoding not in bodies:
+        bodies[encoding] = compress(bodies[None], encoding)
+    return bodies[encoding]
+
+def collect_stats():
+    """Dashboard statistics"""
+    start = metrics.clock()
+    with get_db_connection() as conn:
+        analytics.ensure_schema(conn)
+        
+        # Totals are kept up to date by the log writer
+        total_chats = analytics.get_counter(conn, 'total_chats')
+        total_emergencies = analytics.get_counter(conn, 'total_emergencies')
+        
+        # Recent chats
+        recent_chats = conn.execute(
+            'SELECT * FROM chat_logs ORDER BY timestamp DESC LIMIT 10'
+        ).fetchall()
         
-        # Show similar diseases if any
-        similar_diseases = []
-        for d in all_diseases:
-            if any(word in d['name'].lower() for word in disease_query.split()):
-                similar_diseases.append(d['name'])
+        # Emergency logs
+        emergency_logs = conn.execute(
+            'SELECT * FROM emergency_logs ORDER BY timestamp DESC LIMIT 10'
+        ).fetchall()
         
-        if similar_diseases:
-            similar_list = '\n'.join([f'• {name}' for name in similar_diseases[:5]])
-            return {
-                'type': 'not_found',
-                'message': f'❌ Disease "{message}" not found in database.\n\n'
-                          f'Did you mean:\n{similar_list}\n\n'
-                          'Type "help" or "list" to see all available diseases.'
-            }
-        else:
-            return {
-                'type': 'not_found',
-                'message': f'❌ Disease "{message}" not found in database.\n\n'
-                          'Type "help" or "list" to see all available diseases.\n\n'
-                          'Available diseases include: COVID-19, Dengue, Diabetes, Malaria, Tuberculosis, and many more!'
-            }
+        # Most mentioned diseases
+        top_diseases = analytics.top_diseases(conn, limit=5)
+    DB_QUERY_SECONDS.observe_since(start, 'stats')
+    
+    total_diseases = len(get_catalog())
+    
+    return {
+        'total_chats': total_chats,
+        'total_emergencies': total_emergencies,
+        'total_diseases': total_diseases,
+        'recent_chats': [dict(c) for c in recent_chats],
+        'emergency_logs': [dict(e) for e in emergency_logs],
+        'top_diseases': top_diseases,
+        'log_writer': log_writer.stats(),
+        'response_cache': response_cache.stats(),
+        'payload_cache': payload_cache.stats(),
+        'admission': admission.stats(),
+        'batch_admission': batch_admission.stats(),
+        'stats_feed': get_stats_feed().stats()
+    }
+
+def live_stats_snapshot():
+    """Dashboard statistics from the in-memory feed; no database queries once seeded"""
+    stats_feed = get_stats_feed()
+    stats_feed.ensure_seeded(log_writer)
+    snapshot = stats_feed.snapshot()
+    snapshot['total_diseases'] = len(get_catalog())
+    return snapshot
+
+def sse_event(event, seq, data):
+    return f'event: {event}\nid: {seq}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
 
 # Routes
 @app.route('/')
@@ -188,6 +784,10 @@ def dashboard():
     """Analytics dashboard"""
     return render_template('dashboard.html')
 
+def wants_compact(data):
+    """Compact mode from ?compact=1 or "compact": true in the JSON body"""
+    return request.args.get('compact') == '1' or data.get('compact') is True
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Handle chat messages"""
@@ -197,71 +797,252 @@ def chat():
     if not user_message:
         return jsonify({'error': 'Empty message'}), 400
     
-    # Generate response
-    response_data = generate_response(user_message)
-    
-    # Log conversation
-    log_chat(user_message, response_data['message'])
-    
-    return jsonify(response_data)
+    session_id = valid_session_id(data.get('session_id'))
+    decision = admit_chat(user_message, request.remote_addr, session_id)
+    if decision.decision != 'admitted':
+        body, status = rejection_response(decision)
+        return jsonify(body), status, {'Retry-After': str(body['retry_after'])}
+    try:
+        payload = answer_chat(user_message, session_id)
+    finally:
+        admission.release()
+    return app.response_class(payload.body(wants_compact(data)), mimetype='application/json')
 
-@app.route('/api/diseases', methods=['GET'])
-def get_diseases():
-    """Get all diseases"""
-    conn = get_db_connection()
-    diseases = conn.execute('SELECT * FROM diseases ORDER BY name').fetchall()
-    conn.close()
-    
-    return jsonify([dict(d) for d in diseases])
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer many messages at once
 
-@app.route('/api/stats', methods=['GET'])
-def get_stats():
-    """Get dashboard statistics"""
-    conn = get_db_connection()
+    Accepts {"messages": [...]} or an NDJSON body (one message or
+    {"message": ...} object per line). Results come back in input order as
+    {"results": [...]}, or as NDJSON lines when ?stream=1 is given or the
+    client accepts application/x-ndjson. Only a streamed NDJSON body may
+    hold more than MAX_BATCH_SIZE messages; it is read and answered a chunk
+    at a time.
+    """
+    compact = wants_compact({})
+    stream = request.args.get('stream') == '1' or request.accept_mimetypes.best == 'application/x-ndjson'
+    if request.mimetype == 'application/x-ndjson':
+        messages = iter_ndjson_messages(request.stream)
+        if not stream:
+            # Answered in one transaction: read no more than the cap allows
+            messages = list(islice(messages, MAX_BATCH_SIZE + 1))
+    else:
+        data = request.get_json(silent=True) or {}
+        messages = data.get('messages')
+        if not isinstance(messages, list):
+            return jsonify({'error': 'Expected {"messages": [...]}'}), 400
+        compact = wants_compact(data)
+    if isinstance(messages, list) and len(messages) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} messages per batch'}), 413
     
-    # Total chats
-    total_chats = conn.execute('SELECT COUNT(*) as count FROM chat_logs').fetchone()['count']
+    # Batches are charged to the bulk bucket, a token per message; one larger
+    # than its burst takes the whole burst rather than being refused
+    client = request.remote_addr
+    if not stream:
+        cost = batch_cost(len(messages))
+        decision = batch_admission.admit(client, cost=cost)
+        if decision.decision != 'admitted':
+            return batch_rejection(decision)
+        try:
+            return jsonify({'results': generate_responses(messages, compact)})
+        finally:
+            batch_admission.release(cost)
     
-    # Total emergencies
-    total_emergencies = conn.execute('SELECT COUNT(*) as count FROM emergency_logs').fetchone()['count']
+    # Streamed batches are admitted a chunk at a time; one the client has no
+    # tokens left for ends the stream with the rejection as its last line
+    chunks = iter_chunks(messages, BATCH_CHUNK_SIZE)
+    first = next(chunks, [])
+    held = [batch_cost(len(first))]
+    decision = batch_admission.admit(client, cost=held[0])
+    if decision.decision != 'admitted':
+        return batch_rejection(decision)
     
-    # Total diseases
-    total_diseases = conn.execute('SELECT COUNT(*) as count FROM diseases').fetchone()['count']
+    def generate():
+        for index, chunk in enumerate(chain([first], chunks)):
+            if index:
+                cost = batch_cost(len(chunk))
+                decision = batch_admission.admit(client, cost=cost)
+                if decision.decision != 'admitted':
+                    yield json.dumps(rejection_response(decision)[0], ensure_ascii=False) + '\n'
+                    return
+                held[0] = cost
+            for response in _answer_chunk(chunk, compact):
+                yield json.dumps(response, ensure_ascii=False) + '\n'
+            release_held()
     
-    # Recent chats
-    recent_chats = conn.execute(
-        'SELECT * FROM chat_logs ORDER BY timestamp DESC LIMIT 10'
-    ).fetchall()
+    def release_held():
+        batch_admission.release(held[0])
+        held[0] = 0
     
-    # Emergency logs
-    emergency_logs = conn.execute(
-        'SELECT * FROM emergency_logs ORDER BY timestamp DESC LIMIT 10'
-    ).fetchall()
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(release_held)
+    return response
+
+def batch_cost(size):
+    """Tokens and in-flight slots `size` batched messages take, capped at the bulk burst"""
+    if batch_admission.rate > 0:
+        return min(size, max(1, int(batch_admission.burst)))
+    return size
+
+def batch_rejection(decision):
+    body, status = rejection_response(decision)
+    return jsonify(body), status, {'Retry-After': str(body['retry_after'])}
+
+def iter_ndjson_messages(stream):
+    """Messages from an NDJSON request body, read line by line"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = ''
+        yield item.get('message', '') if isinstance(item, dict) else item
+
+@app.route('/api/catalog/reload', methods=['POST'])
+def catalog_reload():
+    """Reload the in-memory disease catalog after init_database.py has run"""
+    catalog = reload_catalog()
+    prerender_payloads()
+    return jsonify({'status': 'reloaded', 'total_diseases': len(catalog)})
+
+@app.route('/api/diseases', methods=['GET'])
+def get_diseases():
+    """Diseases ordered by name
+
+    ?fields=name,symptoms selects columns. ?limit and ?cursor page through
+    the list; without them the whole list is returned as before. Responses
+    carry a strong ETag derived from the catalog version and are compressed
+    when the client accepts it.
+    """
+    try:
+        key = listing_query(request.args)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
     
-    # Count disease mentions in chats
-    from collections import Counter
-    all_messages = conn.execute('SELECT user_message FROM chat_logs').fetchall()
-    diseases = conn.execute('SELECT name FROM diseases').fetchall()
-    conn.close()
+    # The ETag is known before anything is serialized, so a revalidation
+    # with a matching If-None-Match costs no rendering at all
+    version = get_catalog().version
+    encoding = choose_encoding(request.accept_encodings)
+    etag = listing_etag(version, key, encoding)
     
-    disease_mentions = Counter()
-    disease_names = [d['name'].lower() for d in diseases]
-    for msg in all_messages:
-        msg_lower = msg['user_message'].lower()
-        for disease in disease_names:
-            if disease in msg_lower:
-                disease_mentions[disease.title()] += 1
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(listing_body(version, key, encoding), mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Rank diseases by symptoms and other text: /api/search?q=fever+rash&match=any&page=1&per_page=10"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing q parameter'}), 400
+    mode = request.args.get('match', 'any')
+    if mode not in ('any', 'all'):
+        return jsonify({'error': 'match must be "any" or "all"'}), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
     
-    top_diseases = disease_mentions.most_common(5)
+    with get_db_connection() as conn:
+        results, total = search_symptoms(
+            conn, query, limit=per_page, offset=(page - 1) * per_page, mode=mode
+        )
     
     return jsonify({
-        'total_chats': total_chats,
-        'total_emergencies': total_emergencies,
-        'total_diseases': total_diseases,
-        'recent_chats': [dict(c) for c in recent_chats],
-        'emergency_logs': [dict(e) for e in emergency_logs],
-        'top_diseases': top_diseases
+        'query': query,
+        'match': mode,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'results': results
     })
 
+@app.route('/api/stats/trend', methods=['GET'])
+def get_stats_trend():
+    """Disease mentions per day or per hour"""
+    period = request.args.get('period', 'day')
+    if period not in ('day', 'hour'):
+        return jsonify({'error': 'period must be "day" or "hour"'}), 400
+    with get_db_connection() as conn:
+        analytics.ensure_schema(conn)
+        trend = analytics.mention_trend(
+            conn, period, since=request.args.get('since'), disease=request.args.get('disease')
+        )
+    return jsonify({'period': period, 'trend': trend})
+
+@app.route('/api/stats/stream', methods=['GET'])
+def stats_stream():
+    """Server-sent events: a `snapshot` of the dashboard numbers, then a
+    `delta` after every committed log batch
+
+    A reconnecting client sends Last-Event-ID and receives only the deltas
+    it missed, or a new snapshot if they are no longer kept.
+    """
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_seq = None
+    
+    stats_feed = get_stats_feed()
+    
+    def generate():
+        seq = last_seq
+        stats_feed.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            stats_feed.ensure_seeded(log_writer)
+            deltas = None
+            if seq is not None and seq <= stats_feed.seq:
+                deltas = stats_feed.wait(seq, 0)
+            while True:
+                if deltas is None:
+                    snapshot = live_stats_snapshot()
+                    seq = snapshot['seq']
+                    yield sse_event('snapshot', seq, snapshot)
+                elif not deltas:
+                    # Comment line; keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                for delta in deltas or ():
+                    seq = delta['seq']
+                    yield sse_event('delta', seq, delta)
+                deltas = stats_feed.wait(seq, STREAM_KEEPALIVE)
+        finally:
+            stats_feed.unsubscribe()
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition; 404 when CHATBOT_METRICS=0"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Get dashboard statistics"""
+    return jsonify(collect_stats())
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once warm-up has finished, 503 until then"""
+    # Servers that do not start the warm-up themselves start it on the first probe
+    warmup.start()
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 if __name__ == '__main__':
+    # Load the disease catalog once before serving requests
+    reload_catalog()
+    warmup.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""Async (ASGI) serving mode for the chat API
+
+Serves /api/chat, /api/diseases, /api/stats and /api/ready from an asyncio
+event loop.
+The chatbot engine and SQLite stay synchronous; every blocking call runs in
+a bounded thread pool, and at most CHATBOT_ASYNC_MAX_PENDING calls may wait
+for it, so a burst queues in the event loop instead of piling up threads.
+
+Run with any ASGI server, e.g.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+or `python asgi.py`. The Flask entry point (`python app.py`) is unchanged.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+import app as chatbot
+from compression import choose_encoding
+from session_store import valid_session_id
+
+WORKERS = int(os.environ.get('CHATBOT_ASYNC_WORKERS', 16))
+MAX_PENDING = int(os.environ.get('CHATBOT_ASYNC_MAX_PENDING', 256))
+MAX_BODY_BYTES = 64 * 1024
+
+executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='chatbot-blocking')
+_pending = None
+
+
+async def run_blocking(func, *args):
+    """Run a blocking engine call in the bounded thread pool"""
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Semaphore(MAX_PENDING)
+    async with _pending:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError('Request body too large')
+        if not message.get('more_body'):
+            return body
+
+
+def header(scope, name):
+    """Value of the request header `name` (lowercase bytes), or ''"""
+    for key, value in scope.get('headers', ()):
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+
+def query_args(scope):
+    """Query parameters mapped to their first value, like Flask's request.args.get"""
+    args = {}
+    for name, value in parse_qsl(scope.get('query_string', b'').decode('utf-8', 'replace'), keep_blank_values=True):
+        args.setdefault(name, value)
+    return args
+
+
+async def send_json(send, payload, status=200, headers=()):
+    await send_body(send, json.dumps(payload, ensure_ascii=False).encode('utf-8'), status, headers)
+
+
+async def send_body(send, body, status=200, headers=()):
+    """Send an already encoded JSON body"""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def chat(scope, receive, send):
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+    except ValueError:
+        return await send_json(send, {'error': 'Invalid or oversized JSON body'}, 400)
+    user_message = str(data.get('message', '')).strip() if isinstance(data, dict) else ''
+    if not user_message:
+        return await send_json(send, {'error': 'Empty message'}, 400)
+    # ?compact=1 or "compact": true, as chatbot.wants_compact() reads them
+    compact = query_args(scope).get('compact') == '1' or data.get('compact') is True
+    session_id = valid_session_id(data.get('session_id'))
+    client_ip = (scope.get('client') or ('unknown',))[0]
+    decision = chatbot.admit_chat(user_message, client_ip, session_id)
+    if decision.decision != 'admitted':
+        body, status = chatbot.rejection_response(decision)
+        return await send_json(send, body, status, [(b'retry-after', str(body['retry_after']).encode('ascii'))])
+    try:
+        payload = await run_blocking(chatbot.answer_chat, user_message, session_id)
+    finally:
+        chatbot.admission.release()
+    await send_body(send, payload.body(compact))
+
+
+async def diseases(scope, receive, send):
+    """Same paging, ETag and compression as the Flask /api/diseases route"""
+    try:
+        key = await run_blocking(chatbot.listing_query, query_args(scope))
+    except ValueError as exc:
+        return await send_json(send, {'error': str(exc)}, 400)
+    version = chatbot.get_catalog().version
+    encoding = choose_encoding(parse_accept_header(header(scope, b'accept-encoding')))
+    etag = chatbot.listing_etag(version, key, encoding)
+    headers = [(b'etag', quote_etag(etag).encode('ascii')), (b'vary', b'Accept-Encoding'),
+               (b'cache-control', b'no-cache')]
+    if parse_etags(header(scope, b'if-none-match') or None).contains(etag):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        return await send({'type': 'http.response.body', 'body': b''})
+    body = await run_blocking(chatbot.listing_body, version, key, encoding)
+    if encoding:
+        headers.append((b'content-encoding', encoding.encode('ascii')))
+    await send_body(send, body, 200, headers)
+
+
+async def stats(scope, receive, send):
+    await send_json(send, await run_blocking(chatbot.collect_stats))
+
+
+async def ready(scope, receive, send):
+    chatbot.warmup.start()
+    status = chatbot.warmup.status()
+    await send_json(send, status, 200 if status['ready'] else 503)
+
+
+ROUTES = {
+    ('POST', '/api/chat'): chat,
+    ('GET', '/api/diseases'): diseases,
+    ('GET', '/api/stats'): stats,
+    ('GET', '/api/ready'): ready,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Load the catalog and indexes in the background; /api/ready reports when done
+            chatbot.warmup.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Drain queued log rows before the process exits
+            await run_blocking(chatbot.log_writer.stop)
+            executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        if any(path == scope['path'] for _, path in ROUTES):
+            return await send_json(send, {'error': 'Method not allowed'}, 405)
+        return await send_json(send, {'error': 'Not found'}, 404)
+    await handler(scope, receive, send)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('The async serving mode needs an ASGI server: pip install uvicorn')
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8000)))
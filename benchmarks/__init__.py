@@ -0,0 +1,5 @@
+"""Performance benchmarks for the chatbot engine
+
+Run a benchmark from the project root, e.g.
+`python -m benchmarks.bench_keyword_matcher`.
+"""
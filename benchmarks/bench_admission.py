@@ -0,0 +1,125 @@
+"""Admission control: cost per message and who gets through a flood
+
+    python -m benchmarks.bench_admission [--seconds 10] [--json admission.json]
+
+- cost: admit_chat() + release() per message, the work added in front of
+  every /api/chat request, over the synthetic query mix from many clients
+  and from one.
+- flood: a simulated run against AdmissionControl with a fake clock. A bot
+  on 40 addresses sends the same message 10 times a second from each, 50
+  users send a message every 2 seconds (1 in 10 an emergency, 1 in 5 a
+  greeting), and the server answers 100 messages a second. Without
+  admission control every message waits in one queue. With it, each bot
+  address is limited to the per-client rate, and its repeats are shed as
+  low priority once the in-flight budget fills up. Reported per sender:
+  admitted, limited and shed counts and the p99 wait for an answer.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+from collections import deque
+
+import db
+from admission import AdmissionControl
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import generate_queries
+
+TICK = 0.01
+
+
+def cost(query_count, seed, repeat):
+    import app
+
+    catalog = app.reload_catalog()
+    names = [record['name'] for record in catalog.records]
+    queries = [message for _, message in generate_queries(query_count, names, seed)]
+    app.admission.rate = 0
+
+    def admit(message, client):
+        app.admit_chat(message, client)
+        app.admission.release()
+
+    results = {}
+    results['admit_chat, 1000 clients'] = measure_distribution(
+        admit, [(q, f'10.0.{i % 1000 // 250}.{i % 250}') for i, q in enumerate(queries)], repeat=repeat)
+    results['admit_chat, 1 client'] = measure_distribution(
+        admit, [(q, '10.0.0.1') for q in queries], repeat=repeat)
+    results['build_response'] = measure_distribution(app.build_response, [(q,) for q in queries], repeat=repeat)
+    return results
+
+
+def flood(seconds, seed, control):
+    """Per-priority decision counts and answer delays for one simulated run"""
+    rng = random.Random(seed)
+    now = [0.0]
+    admission = AdmissionControl(rate=5.0, burst=20, max_in_flight=64, clock=lambda: now[0]) if control else None
+    capacity = 100 * TICK
+    queue = deque()
+    counts = {}
+    delays = {}
+    budget = 0.0
+    for step in range(int(seconds / TICK)):
+        now[0] = step * TICK
+        arrivals = [(f'bot{n}', 'normal', 'dengue') for n in range(40) if rng.random() < 10 * TICK]
+        for user in range(50):
+            if rng.random() < 0.5 * TICK:
+                roll = rng.random()
+                priority = 'emergency' if roll < 0.1 else 'low' if roll < 0.3 else 'normal'
+                arrivals.append((f'user{user}', priority, rng.random()))
+        for client, priority, key in arrivals:
+            who = 'bot' if client.startswith('bot') else priority
+            decision = admission.admit(client, priority, key).decision if admission is not None else 'admitted'
+            counts.setdefault(who, {'admitted': 0, 'limited': 0, 'shed': 0})[decision] += 1
+            if decision == 'admitted':
+                queue.append((now[0], who))
+        budget += capacity
+        while queue and budget >= 1:
+            budget -= 1
+            arrived, who = queue.popleft()
+            delays.setdefault(who, []).append(now[0] - arrived)
+            if admission is not None:
+                admission.release()
+    for who, values in delays.items():
+        values.sort()
+        counts[who]['p99_delay_s'] = values[int(0.99 * (len(values) - 1))]
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'admission.db')
+        shutil.copy(db.DATABASE_PATH, path)
+        db.set_database_path(path)
+        os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(directory, 'spill.jsonl')
+        results = cost(args.queries, args.seed, args.repeat)
+    print_table('Admission cost (microseconds per message)', ['path', 'mean', 'p50', 'p99'],
+                [(name, f"{r['mean_us']:.1f}", f"{r['p50_us']:.1f}", f"{r['p99_us']:.1f}")
+                 for name, r in results.items()])
+
+    rows = []
+    for control in (False, True):
+        run = flood(args.seconds, args.seed, control)
+        results[f"flood[{'on' if control else 'off'}]"] = run
+        for who in ('bot', 'emergency', 'normal', 'low'):
+            r = run.get(who, {})
+            delay = r.get('p99_delay_s')
+            rows.append(('on' if control else 'off', who, r.get('admitted', 0), r.get('limited', 0), r.get('shed', 0),
+                         '-' if delay is None else f'{delay:.2f}'))
+    print_table(f'Flood for {args.seconds:g} s (messages, p99 seconds queued before an answer)',
+                ['admission', 'sender', 'admitted', 'limited', 'shed', 'p99 delay'], rows)
+    if args.json:
+        write_json(args.json, 'admission', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
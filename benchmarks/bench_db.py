@@ -0,0 +1,106 @@
+"""Compare a fresh sqlite3 connection per call with the pooled WAL layer in db.py
+
+Runs against temporary copies of database.db so the real file is untouched.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import db
+from benchmarks.common import measure, print_table
+
+LOOKUP = 'SELECT * FROM diseases WHERE LOWER(name) = ?'
+INSERT = 'INSERT INTO chat_logs (user_message, bot_response) VALUES (?, ?)'
+
+
+def copy_database(directory, name, journal_mode):
+    path = os.path.join(directory, name)
+    shutil.copy(db.DATABASE_PATH, path)
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.close()
+    return path
+
+
+def per_call_lookup(path):
+    """What the helpers in app.py used to do: connect, query, close"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute(LOOKUP, ('malaria',)).fetchone()
+    conn.close()
+
+
+def pooled_lookup(path):
+    with db.connection(path) as conn:
+        conn.execute(LOOKUP, ('malaria',)).fetchone()
+
+
+def mixed_load(path, open_conn, seconds=2.0, readers=4):
+    """Readers scan chat_logs while one writer commits a row at a time"""
+    stop = time.monotonic() + seconds
+    counts = {'reads': 0, 'writes': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def reader():
+        conn = open_conn(path)
+        done = 0
+        busy = 0
+        while time.monotonic() < stop:
+            try:
+                conn.execute('SELECT COUNT(*), MAX(timestamp) FROM chat_logs').fetchone()
+                done += 1
+            except sqlite3.OperationalError:
+                busy += 1
+        conn.close()
+        with lock:
+            counts['reads'] += done
+            counts['busy'] += busy
+
+    def writer():
+        conn = open_conn(path)
+        while time.monotonic() < stop:
+            try:
+                conn.execute(INSERT, ('benchmark', 'benchmark'))
+                conn.commit()
+                counts['writes'] += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['busy'] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {k: v / seconds for k, v in counts.items()}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = copy_database(directory, 'legacy.db', 'DELETE')
+        wal_path = copy_database(directory, 'wal.db', 'WAL')
+
+        rows = [
+            ('connect per call', f'{measure(per_call_lookup, legacy_path, repeat=2000):.1f}'),
+            ('pooled WAL connection', f'{measure(pooled_lookup, wal_path, repeat=2000):.1f}'),
+        ]
+        print_table('Disease lookup (microseconds per call)', ['mode', 'us/call'], rows)
+
+        legacy = mixed_load(legacy_path, lambda p: sqlite3.connect(p, timeout=0.1))
+        wal = mixed_load(wal_path, lambda p: db.connect(p))
+        rows = [
+            ('rollback journal', f"{legacy['reads']:.0f}", f"{legacy['writes']:.0f}", f"{legacy['busy']:.0f}"),
+            ('WAL + NORMAL', f"{wal['reads']:.0f}", f"{wal['writes']:.0f}", f"{wal['busy']:.0f}"),
+        ]
+        print_table('4 readers + 1 committing writer (per second)',
+                    ['journal', 'reads/s', 'writes/s', 'busy errors/s'], rows)
+        db.get_pool(wal_path).close()
+
+
+if __name__ == '__main__':
+    main()
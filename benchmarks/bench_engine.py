@@ -0,0 +1,91 @@
+"""Per-call latency of the chatbot engine functions
+
+    python -m benchmarks.bench_engine [--log-rows 100000] [--json engine.json]
+
+Runs against a temporary copy of database.db holding --log-rows synthetic
+chat logs, so the statistics functions see a realistic history. Chat
+functions are timed over a synthetic query mix (see benchmarks.corpus),
+once per query category with the response cache disabled and once over the
+whole mix with it enabled.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import db
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import generate_chat_logs, generate_queries, load_disease_names
+
+
+def run(query_count, seed):
+    import app
+    from search import search_symptoms
+
+    catalog = app.reload_catalog()
+    names = [record['name'] for record in catalog.records]
+    queries = generate_queries(query_count, names, seed)
+    by_category = {}
+    for category, message in queries:
+        by_category.setdefault(category, []).append((message,))
+    every_message = [(message,) for _, message in queries]
+
+    results = {}
+    cache_size = app.response_cache.max_entries
+    payload_cache_size = app.payload_cache.max_entries
+    app.response_cache.max_entries = app.payload_cache.max_entries = 0
+    app.payload_cache.clear()
+    for category, args_list in sorted(by_category.items()):
+        results[f'build_response[{category}]'] = measure_distribution(app.build_response, args_list)
+    app.response_cache.max_entries = cache_size
+    app.payload_cache.max_entries = payload_cache_size
+    app.response_cache.clear()
+    results['build_response[mix, cached]'] = measure_distribution(app.build_response, every_message, repeat=3)
+
+    results['detect_emergency'] = measure_distribution(app.detect_emergency, every_message)
+    results['catalog.get'] = measure_distribution(catalog.get, [(name,) for name in names], repeat=20)
+    results['catalog.fuzzy_get'] = measure_distribution(catalog.fuzzy_get, by_category.get('typo', []))
+
+    def symptom_search(text):
+        with app.get_db_connection() as conn:
+            return search_symptoms(conn, text, 5, 0, 'all')
+    results['search_symptoms'] = measure_distribution(symptom_search, by_category.get('symptoms', []))
+
+    results['collect_stats'] = measure_distribution(app.collect_stats, [()] * 200)
+    results['live_stats_snapshot'] = measure_distribution(app.live_stats_snapshot, [()] * 200)
+    results['render_disease_listing[all fields]'] = measure_distribution(
+        app.render_disease_listing, [(catalog.fields, None, None)] * 100)
+    results['render_disease_listing[name, page of 50]'] = measure_distribution(
+        app.render_disease_listing, [(('name',), None, 50)] * 100)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--log-rows', type=int, default=100000, help='Synthetic chat log rows to add')
+    parser.add_argument('--queries', type=int, default=2000, help='Synthetic chat queries to time')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'engine.db')
+        shutil.copy(db.DATABASE_PATH, path)
+        conn = db.connect(path)
+        generate_chat_logs(conn, args.log_rows, load_disease_names(path))
+        conn.close()
+        # app creates its log writer at import time, so point it at the copy first
+        db.set_database_path(path)
+        os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(directory, 'spill.jsonl')
+        results = run(args.queries, args.seed)
+
+    rows = [(name, r['calls'], f"{r['mean_us']:.1f}", f"{r['p50_us']:.1f}", f"{r['p95_us']:.1f}",
+             f"{r['p99_us']:.1f}") for name, r in results.items()]
+    print_table(f'Engine functions ({args.log_rows} chat log rows, microseconds per call)',
+                ['function', 'calls', 'mean', 'p50', 'p95', 'p99'], rows)
+    if args.json:
+        write_json(args.json, 'engine', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
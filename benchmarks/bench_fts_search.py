@@ -0,0 +1,70 @@
+"""Symptom search latency: FTS5 + BM25 vs. LIKE scans over diseases.symptoms
+
+Builds temporary databases with 1k, 10k and 50k synthetic diseases.
+"""
+import os
+import random
+import tempfile
+
+import db
+import search
+from benchmarks.common import measure, print_table
+
+SYMPTOMS = [
+    'fever', 'cough', 'headache', 'rash', 'itching', 'joint pain', 'muscle pain', 'fatigue',
+    'nausea', 'vomiting', 'diarrhea', 'chills', 'sore throat', 'runny nose', 'dizziness',
+    'shortness of breath', 'chest pain', 'abdominal pain', 'weight loss', 'night sweats',
+    'swollen lymph nodes', 'jaundice', 'blurred vision', 'frequent urination', 'back pain',
+    'confusion', 'seizures', 'numbness', 'palpitations', 'hair loss', 'dry skin', 'insomnia',
+]
+
+QUERIES = ['fever and joint pain', 'rash itching', 'headache with blurred vision and nausea',
+           'night sweats weight loss cough']
+
+
+def create_catalog(path, count, seed=5):
+    rng = random.Random(seed)
+    conn = db.connect(path)
+    conn.execute('''
+        CREATE TABLE diseases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL, symptoms TEXT NOT NULL, prevention TEXT NOT NULL,
+            causes TEXT, risk_factors TEXT, info TEXT
+        )
+    ''')
+    search.create_fts(conn)
+    conn.executemany(
+        'INSERT INTO diseases (name, symptoms, prevention, causes, risk_factors, info) VALUES (?, ?, ?, ?, ?, ?)',
+        ((f'Condition {i}', ', '.join(rng.sample(SYMPTOMS, rng.randint(4, 10))), 'See a doctor',
+          'Unknown', 'Unknown', f'Synthetic condition number {i}') for i in range(count))
+    )
+    conn.commit()
+    return conn
+
+
+def like_scan(conn, text):
+    """Without an index: one LIKE per symptom word, OR'ed, then ranked in Python"""
+    terms = search.symptom_terms(text)
+    clause = ' OR '.join('symptoms LIKE ?' for _ in terms)
+    rows = conn.execute(f'SELECT id, name, symptoms FROM diseases WHERE {clause}',
+                        [f'%{t}%' for t in terms]).fetchall()
+    ranked = sorted(rows, key=lambda r: -sum(t in r['symptoms'].lower() for t in terms))
+    return ranked[:10]
+
+
+def main():
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (1000, 10000, 50000):
+            conn = create_catalog(os.path.join(directory, f'catalog_{count}.db'), count)
+            any_us = sum(measure(search.search_symptoms, conn, q, 10, 0, 'any', repeat=10) for q in QUERIES) / len(QUERIES)
+            all_us = sum(measure(search.search_symptoms, conn, q, 10, 0, 'all', repeat=10) for q in QUERIES) / len(QUERIES)
+            like_us = sum(measure(like_scan, conn, q, repeat=5) for q in QUERIES) / len(QUERIES)
+            rows.append((count, f'{any_us / 1000:.2f}', f'{all_us / 1000:.2f}', f'{like_us / 1000:.2f}'))
+            conn.close()
+    print_table('Top-10 symptom search (milliseconds per query)',
+                ['diseases', 'FTS5 any term', 'FTS5 all terms', 'LIKE scan'], rows)
+
+
+if __name__ == '__main__':
+    main()
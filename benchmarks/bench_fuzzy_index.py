@@ -0,0 +1,75 @@
+"""Typo-tolerant lookup: deletion index vs. rescanning every disease name
+
+Builds synthetic catalogs from 60 up to 50k conditions and times misspelled
+queries against the FuzzyIndex and against a linear edit-distance scan.
+
+Then times DiseaseCatalog.fuzzy_get, what the chat route calls, on catalogs
+of synthetic diseases ("Lunpel Disorder") and the typo messages of the
+query mix. Every name ends in one of a few words like "disorder" that name
+thousands of diseases each, which is what the per-word fan-out cap is for.
+"""
+import random
+import time
+
+from benchmarks.common import measure, measure_distribution, print_table
+from benchmarks.corpus import generate_diseases, generate_queries
+from catalog import DiseaseCatalog
+from fuzzy_index import FuzzyIndex, edit_distance
+
+SYLLABLES = ['ma', 'la', 'ri', 'tu', 'ber', 'cu', 'lo', 'sis', 'dia', 'be', 'tes', 'hep', 'ti',
+             'chol', 'era', 'den', 'gue', 'pneu', 'mo', 'nia', 'ty', 'phoid', 'os', 'te', 'o', 'por']
+
+
+def synthetic_names(count, seed=11):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+                 for _ in range(rng.randint(1, 3))]
+        names.add(' '.join(words))
+    return sorted(names)
+
+
+def misspell(name, rng):
+    chars = list(name)
+    i = rng.randrange(len(chars))
+    if rng.random() < 0.5:
+        del chars[i]
+    else:
+        chars[i] = rng.choice('aeiou')
+    return ''.join(chars)
+
+
+def linear_scan(names, query):
+    """Roughly what the not-found branch costs without an index"""
+    return [name for name in names if edit_distance(query, name, 2) <= 2]
+
+
+def main():
+    rng = random.Random(3)
+    rows = []
+    for count in (60, 1000, 10000, 50000):
+        names = synthetic_names(count)
+        start = time.perf_counter()
+        index = FuzzyIndex((name, i) for i, name in enumerate(names))
+        build_ms = (time.perf_counter() - start) * 1000
+        queries = [misspell(rng.choice(names), rng) for _ in range(50)]
+        indexed_us = sum(measure(index.lookup, q, repeat=20) for q in queries) / len(queries)
+        scan_repeat = 3 if count <= 10000 else 1
+        scan_us = sum(measure(linear_scan, names, q, repeat=scan_repeat) for q in queries[:5]) / 5
+        rows.append((count, f'{build_ms:.0f}', f'{indexed_us:.1f}', f'{scan_us:.0f}'))
+    print_table('Misspelled disease lookup',
+                ['conditions', 'index build ms', 'indexed us/query', 'linear scan us/query'], rows)
+
+    rows = []
+    for count in (1000, 10000, 50000):
+        catalog = DiseaseCatalog(generate_diseases(count))
+        typos = [(message,) for category, message in generate_queries(2000, catalog.names) if category == 'typo']
+        r = measure_distribution(catalog.fuzzy_get, typos, repeat=3)
+        rows.append((count, len(typos), f"{r['mean_us']:.0f}", f"{r['p50_us']:.0f}", f"{r['p95_us']:.0f}"))
+    print_table('catalog.fuzzy_get on typo messages (microseconds)',
+                ['diseases', 'queries', 'mean', 'p50', 'p95'], rows)
+
+
+if __name__ == '__main__':
+    main()
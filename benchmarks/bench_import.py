@@ -0,0 +1,116 @@
+"""Bulk catalog import: rows/sec and memory against input size
+
+    python -m benchmarks.bench_import [--rows 100000] [--json import.json]
+
+Writes --rows synthetic diseases (benchmarks.corpus) to a CSV file, then
+times four loads:
+- row-by-row: one INSERT per row with the FTS triggers live, as
+  init_database.py used to load its list
+- import into an empty table (deferred name index and FTS rebuild)
+- import into a copy of database.db (upsert path)
+- the same file again, so every row is an update
+
+Peak Python memory (tracemalloc) of an import is measured at a tenth of
+--rows and at --rows. It should not grow with the file.
+"""
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import catalog_import
+import db
+from benchmarks.common import print_table, write_json
+from benchmarks.corpus import generate_diseases
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=catalog_import.FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(generate_diseases(rows))
+
+
+def empty_database(path):
+    from init_database import create_tables
+
+    conn = db.connect(path)
+    create_tables(conn)
+    return conn
+
+
+def row_by_row(conn, path):
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    read = 0
+    for _, row in catalog_import.read_rows(path):
+        cursor.execute(catalog_import.INSERT_SQL, tuple(row[field] or None for field in catalog_import.FIELDS))
+        read += 1
+    conn.commit()
+    return read, time.perf_counter() - start
+
+
+def timed_import(conn, path, batch_size):
+    result = catalog_import.import_file(conn, path, batch_size=batch_size)
+    return {'rows': result.read, 'seconds': result.seconds, 'rows_per_second': result.read / result.seconds}
+
+
+def peak_memory(directory, path, batch_size):
+    conn = empty_database(os.path.join(directory, f'peak-{os.path.basename(path)}.db'))
+    tracemalloc.start()
+    catalog_import.import_file(conn, path, batch_size=batch_size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    conn.close()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=catalog_import.BATCH_SIZE)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        full = os.path.join(directory, 'diseases.csv')
+        tenth = os.path.join(directory, 'diseases-tenth.csv')
+        write_csv(full, args.rows)
+        write_csv(tenth, args.rows // 10)
+
+        conn = empty_database(os.path.join(directory, 'row-by-row.db'))
+        rows, seconds = row_by_row(conn, full)
+        conn.close()
+        results['row-by-row INSERT'] = {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds}
+
+        conn = empty_database(os.path.join(directory, 'empty.db'))
+        results['import, empty table'] = timed_import(conn, full, args.batch_size)
+        conn.close()
+
+        seeded = os.path.join(directory, 'seeded.db')
+        shutil.copy(db.DATABASE_PATH, seeded)
+        conn = db.connect(seeded)
+        results['import, seeded database'] = timed_import(conn, full, args.batch_size)
+        results['re-import (all updates)'] = timed_import(conn, full, args.batch_size)
+        conn.close()
+
+        memory = {
+            args.rows // 10: peak_memory(directory, tenth, args.batch_size),
+            args.rows: peak_memory(directory, full, args.batch_size),
+        }
+
+    print_table(f'Loading {args.rows} diseases', ['load', 'seconds', 'rows/sec'],
+                [(name, f"{r['seconds']:.2f}", f"{r['rows_per_second']:,.0f}") for name, r in results.items()])
+    print_table('Peak Python memory during import', ['rows', 'peak MB'],
+                [(rows, f'{peak / 1e6:.1f}') for rows, peak in memory.items()])
+    results['peak_bytes'] = memory
+    if args.json:
+        write_json(args.json, 'import', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
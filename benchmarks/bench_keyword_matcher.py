@@ -0,0 +1,48 @@
+"""Compare the per-keyword substring loop with the compiled keyword matcher
+
+The old detector cost grows with the number of keywords; the automaton
+should stay flat as the keyword list grows to several hundred entries.
+"""
+import random
+
+from benchmarks.common import measure, print_table
+from keyword_matcher import KeywordMatcher
+
+MESSAGES = [
+    'tell me about dengue fever',
+    'what is the prevention for malaria?',
+    'my father has chest pain and difficulty breathing since this morning',
+    'hi, I would like some information on tuberculosis symptoms please',
+]
+
+
+def synthetic_keywords(count, seed=7):
+    """Random multi-word phrases standing in for multilingual triggers"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyzअआइईउऊकखगघचछजझटठडढतथदधनपफबभमयरलवशसह'
+    return [
+        ' '.join(''.join(rng.choice(letters) for _ in range(rng.randint(3, 8)))
+                 for _ in range(rng.randint(1, 3)))
+        for _ in range(count)
+    ]
+
+
+def substring_loop(keywords, message):
+    message_lower = message.lower()
+    return [keyword for keyword in keywords if keyword in message_lower]
+
+
+def main():
+    rows = []
+    for count in (15, 100, 500, 1000, 5000):
+        keywords = synthetic_keywords(count)
+        matcher = KeywordMatcher({'emergency': keywords})
+        loop_us = sum(measure(substring_loop, keywords, m, repeat=300) for m in MESSAGES) / len(MESSAGES)
+        matcher_us = sum(measure(matcher.find_all, m.lower(), repeat=300) for m in MESSAGES) / len(MESSAGES)
+        rows.append((count, f'{loop_us:.1f}', f'{matcher_us:.1f}'))
+    print_table('Per-message keyword scan (microseconds)',
+                ['keywords', 'substring loop', 'keyword matcher'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Disease lookup in Hindi, Hinglish, Tamil and Bengali against English
+
+    python -m benchmarks.bench_languages [--json languages.json]
+
+For every language, each disease alias in languages.py is put into that
+language's question templates ("मलेरिया के लक्षण", "malaria ke lakshan
+kya hai", ...). English uses the catalog names with the usual
+DISEASE_TEMPLATES. Times parse_query() and build_response() per
+language, with the response cache off. Also reports how many questions
+resolve to the intended disease (a name that is also an emergency phrase,
+such as "heart attack" or "மாரடைப்பு", counts when it gets the emergency
+answer) and how many emergency phrases in each language are detected.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import db
+import languages
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import DISEASE_TEMPLATES
+
+TEMPLATES = {
+    'hi': ['{name}', '{name} क्या है', '{name} के लक्षण', '{name} के लक्षण क्या हैं', '{name} से बचाव कैसे करें',
+           '{name} के कारण', 'मुझे {name} के बारे में बताओ'],
+    'hinglish': ['{name} kya hai', '{name} ke lakshan', '{name} ke lakshan kya hai', '{name} se bachav kaise karein',
+                 '{name} ke karan', 'mujhe {name} ke baare mein batao'],
+    'ta': ['{name}', '{name} என்றால் என்ன', '{name} அறிகுறிகள்', '{name} தடுப்பது எப்படி', '{name} பற்றி சொல்லுங்கள்',
+           '{name}வின் அறிகுறிகள்'],
+    'bn': ['{name}', '{name} কী', '{name} এর লক্ষণ', '{name} কীভাবে প্রতিরোধ করা যায়', '{name} সম্পর্কে বলুন',
+           '{name}র কারণ কি'],
+}
+
+
+def questions(catalog):
+    """language -> [(message, expected disease name)]"""
+    result = {'en': [(template.format(name=record['name']), record['name'])
+                     for record in catalog.records for template in DISEASE_TEMPLATES]}
+    for language, templates in TEMPLATES.items():
+        result[language] = [(template.format(name=alias), name)
+                            for alias, name in languages.DISEASE_ALIASES[language].items()
+                            for template in templates]
+    return result
+
+
+def run(repeat):
+    import app
+    from query_parser import parse_query
+
+    catalog = app.reload_catalog()
+    app.response_cache.max_entries = 0
+    results = {}
+    for language, cases in questions(catalog).items():
+        messages = [(message,) for message, _ in cases]
+        resolved = 0
+        for message, name in cases:
+            response = app.build_response(message)
+            resolved += response['type'] == 'emergency' or (response.get('disease') or {}).get('name') == name
+        results[language] = {
+            'questions': len(cases),
+            'resolved': resolved / len(cases),
+            'parse_query': measure_distribution(parse_query, messages, repeat=repeat),
+            'build_response': measure_distribution(app.build_response, messages, repeat=repeat),
+        }
+        phrases = languages.EMERGENCY_PHRASES.get(language, app.EMERGENCY_KEYWORDS)
+        results[language]['emergencies_detected'] = sum(app.detect_emergency(p)[0] for p in phrases) / len(phrases)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'languages.db')
+        shutil.copy(db.DATABASE_PATH, path)
+        # app creates its log writer at import time, so point it at the copy first
+        db.set_database_path(path)
+        os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(directory, 'spill.jsonl')
+        results = run(args.repeat)
+
+    rows = [(languages.LANGUAGE_NAMES[language], r['questions'], f"{r['resolved'] * 100:.1f}%",
+             f"{r['emergencies_detected'] * 100:.0f}%", f"{r['parse_query']['mean_us']:.1f}",
+             f"{r['build_response']['mean_us']:.1f}", f"{r['build_response']['p99_us']:.1f}")
+            for language, r in results.items()]
+    print_table('Disease lookup by language (microseconds per message, response cache off)',
+                ['language', 'questions', 'resolved', 'emergencies', 'parse mean', 'build mean', 'build p99'], rows)
+    if args.json:
+        write_json(args.json, 'languages', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
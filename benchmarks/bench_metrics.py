@@ -0,0 +1,84 @@
+"""Overhead of the /metrics instrumentation on the chat hot path
+
+    python -m benchmarks.bench_metrics [--json metrics.json]
+
+Times build_response over the synthetic query mix with metrics switched on
+and off, with the response cache disabled (every stage runs) and enabled
+(the common case), on a temporary copy of database.db.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import db
+import metrics
+from benchmarks.common import measure, measure_distribution, print_table, write_json
+from benchmarks.corpus import generate_queries
+
+
+def run(query_count, seed, repeat):
+    import app
+
+    catalog = app.reload_catalog()
+    names = [record['name'] for record in catalog.records]
+    messages = [(message,) for _, message in generate_queries(query_count, names, seed)]
+    cache_size = app.response_cache.max_entries
+    payload_cache_size = app.payload_cache.max_entries
+
+    results = {}
+    for cache in ('uncached', 'cached'):
+        app.response_cache.max_entries = cache_size if cache == 'cached' else 0
+        app.payload_cache.max_entries = payload_cache_size if cache == 'cached' else 0
+        for state in (False, True, False, True):
+            # Interleaved so drift (CPU frequency, allocator) hits both sides alike
+            metrics.set_enabled(state)
+            app.response_cache.clear()
+            app.payload_cache.clear()
+            key = f"build_response[{cache}, metrics {'on' if state else 'off'}]"
+            run_result = measure_distribution(app.build_response, messages, repeat=repeat)
+            if key not in results or run_result['mean_us'] < results[key]['mean_us']:
+                results[key] = run_result
+    metrics.set_enabled(True)
+    app.response_cache.max_entries = cache_size
+    app.payload_cache.max_entries = payload_cache_size
+
+    results['histogram.observe'] = {'mean_us': measure(metrics.CHAT_STAGE_SECONDS.observe, 0.0001, 'bench', repeat=200000)}
+    results['counter.inc'] = {'mean_us': measure(metrics.CHAT_RESPONSES.inc, 'bench', repeat=200000)}
+    metrics.set_enabled(False)
+    results['histogram.observe (disabled)'] = {'mean_us': measure(metrics.CHAT_STAGE_SECONDS.observe, 0.0001, 'bench', repeat=200000)}
+    metrics.set_enabled(True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'metrics.db')
+        shutil.copy(db.DATABASE_PATH, path)
+        db.set_database_path(path)
+        os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(directory, 'spill.jsonl')
+        results = run(args.queries, args.seed, args.repeat)
+
+    rows = []
+    for cache in ('uncached', 'cached'):
+        off = results[f'build_response[{cache}, metrics off]']['mean_us']
+        on = results[f'build_response[{cache}, metrics on]']['mean_us']
+        rows.append((f'build_response, {cache}', f'{off:.1f}', f'{on:.1f}', f'{(on - off) / off * 100:+.1f}%'))
+        results[f'overhead[{cache}]'] = {'percent': (on - off) / off * 100, 'us_per_call': on - off}
+    print_table('Metrics overhead (mean microseconds per call)', ['path', 'off', 'on', 'overhead'], rows)
+    print_table('Primitive cost (microseconds per call)', ['operation', 'mean'],
+                [(name, f"{results[name]['mean_us']:.3f}")
+                 for name in ('histogram.observe', 'counter.inc', 'histogram.observe (disabled)')])
+    if args.json:
+        write_json(args.json, 'metrics_overhead', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Message preprocessing: keyword detection plus disease-query normalization
+
+    python -m benchmarks.bench_normalizer [--json normalizer.json]
+
+Compares three versions of the work done before any lookup:
+- original: substring loops for emergency/greeting/help words, then one
+  str.replace per stop word
+- keyword matcher: one automaton scan that also finds stop words, which are
+  then cut out with remove_spans
+- tokenizer: parse_query() plus an automaton scan without stop words
+
+Reports time over the synthetic query mix, peak bytes allocated per message
+(tracemalloc) and accuracy: for every disease and question template, does
+the normalized query still resolve to that disease in the catalog?
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import DISEASE_TEMPLATES, generate_queries
+from catalog import load_catalog
+from keyword_matcher import KeywordMatcher, remove_spans
+from query_parser import parse_query
+
+EMERGENCY_KEYWORDS = ['chest pain', 'heart attack', 'stroke', 'breathing problem', 'difficulty breathing',
+                      "can't breathe", 'suicide', 'kill myself', 'severe bleeding', 'unconscious',
+                      'seizure', 'choking', 'severe headache', 'paralysis', 'severe pain']
+GREETINGS = ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening']
+HELP_COMMANDS = ['help', 'list']
+
+# The list generate_response used to strip with str.replace
+WORDS_TO_REMOVE = ['what', 'is', 'tell', 'me', 'about', 'information', 'on', 'explain',
+                   'describe', 'details', 'of', 'the', 'a', 'an', '?', 'prevention',
+                   'symptoms', 'for', 'give', 'show']
+
+STOP_WORD_MATCHER = KeywordMatcher({'emergency': EMERGENCY_KEYWORDS, 'greeting': GREETINGS,
+                                    'help': HELP_COMMANDS, 'stop_word': WORDS_TO_REMOVE})
+MATCHER = KeywordMatcher({'emergency': EMERGENCY_KEYWORDS, 'greeting': GREETINGS, 'help': HELP_COMMANDS})
+
+
+def chained_replace(message):
+    message_clean = message.lower().strip()
+    any(keyword in message_clean for keyword in EMERGENCY_KEYWORDS)
+    any(greeting in message_clean for greeting in GREETINGS)
+    any(command in message_clean for command in HELP_COMMANDS)
+    disease_query = message_clean
+    for word in WORDS_TO_REMOVE:
+        disease_query = disease_query.replace(word, ' ')
+    disease_query = disease_query.strip()
+    return disease_query or message_clean
+
+
+def matcher_remove_spans(message):
+    message_clean = message.lower().strip()
+    hits = STOP_WORD_MATCHER.scan(message_clean)
+    return ' '.join(remove_spans(message_clean, hits.get('stop_word', [])).split()) or message_clean
+
+
+def tokenizer(message):
+    parsed = parse_query(message)
+    MATCHER.scan(parsed.text)
+    return parsed.disease_query or parsed.text
+
+
+def peak_bytes(func, messages):
+    """Average tracemalloc peak per call, in bytes"""
+    total = 0
+    tracemalloc.start()
+    for message in messages:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        func(message)
+        total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return total / len(messages)
+
+
+def accuracy(func, catalog):
+    """Share of (disease, template) questions whose normalized query finds that disease"""
+    hits = total = 0
+    for record in catalog.records:
+        for template in DISEASE_TEMPLATES:
+            query = func(template.format(name=record['name']))
+            found = catalog.get(query) or next(iter(catalog.search(query, limit=1)), None)
+            hits += found is not None and found['id'] == record['id']
+            total += 1
+    return hits / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    names = [record['name'] for record in catalog.records]
+    messages = [message for _, message in generate_queries(args.queries, names)]
+
+    results = {}
+    approaches = (('original (str.replace)', chained_replace),
+                  ('keyword matcher + remove_spans', matcher_remove_spans),
+                  ('tokenizer + matcher', tokenizer))
+    for name, func in approaches:
+        results[name] = measure_distribution(func, [(m,) for m in messages], repeat=5)
+        results[name]['bytes_allocated_per_message'] = peak_bytes(func, messages)
+        results[name]['accuracy'] = accuracy(func, catalog)
+
+    rows = [(name, f"{r['mean_us']:.2f}", f"{r['p99_us']:.2f}", f"{r['bytes_allocated_per_message']:.0f}",
+             f"{r['accuracy'] * 100:.1f}%") for name, r in results.items()]
+    print_table('Normalizing chat messages', ['approach', 'mean us', 'p99 us', 'bytes/message', 'resolves'], rows)
+    if args.json:
+        write_json(args.json, 'normalizer', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
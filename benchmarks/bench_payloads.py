@@ -0,0 +1,122 @@
+"""CPU per /api/chat request: serializing a response dict vs sending a pre-encoded payload
+
+    python -m benchmarks.bench_payloads [--size 50000] [--json payloads.json]
+
+For the synthetic query mix and for disease names alone (every message a
+card hit), on a temporary copy of database.db and (with --size) on a
+database of that many synthetic diseases:
+
+- dict + jsonify: what the /api/chat route did before payloads, a copy of
+  the response dict (without `disease` for compact clients) serialized by
+  Flask's jsonify on every request.
+- payload: what it does now, answer_chat() and a response built from the
+  payload's already encoded body.
+
+Both answer and log the message and run in an app context with warm
+caches, which is the steady state of a server. CPU is process time per
+request, so it includes the log writer thread. Also reported: time to
+pre-render the help list and the default disease cards (as many as
+CHATBOT_PRERENDER_CARDS asks for), and the bytes the encoded bodies hold.
+"""
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+import db
+from benchmarks.bench_workers import build_database
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import generate_queries
+
+
+def cpu_per_call(func, args_list, repeat):
+    """Mean process (CPU) time of `func(*args)` over `args_list`, in microseconds"""
+    start = time.process_time()
+    for _ in range(repeat):
+        for args in args_list:
+            func(*args)
+    return (time.process_time() - start) / (repeat * len(args_list)) * 1e6
+
+
+def run(query_count, seed, repeat):
+    import app
+    from flask import jsonify
+
+    catalog = app.reload_catalog()
+    app.payload_cache.clear()
+    start = time.perf_counter()
+    payloads = app.prerender_payloads()
+    prerender_s = time.perf_counter() - start
+    count = len(payloads)
+    held = sum(len(payload.body()) + len(payload.body(compact=True)) for payload in payloads)
+
+    names = [record['name'] for record in catalog.records]
+    mixes = {
+        'query mix': [message for _, message in generate_queries(query_count, names, seed)],
+        'disease names': names[:query_count],
+    }
+
+    def previous(message, compact):
+        return jsonify(app.handle_chat(message, compact))
+
+    def current(message, compact):
+        return app.app.response_class(app.answer_chat(message).body(compact), mimetype='application/json')
+
+    results = {'diseases': len(catalog), 'payloads': count, 'prerender_s': prerender_s, 'payload_bytes': held}
+    with app.app.app_context():
+        for (mix, messages), compact in itertools.product(mixes.items(), (False, True)):
+            args_list = [(message, compact) for message in messages]
+            for _ in range(2):
+                # Interleaved so drift (CPU frequency, allocator) hits both sides alike
+                for name, func in (('dict + jsonify', previous), ('payload', current)):
+                    key = f"{name}[{mix}, {'compact' if compact else 'full'}]"
+                    run_result = measure_distribution(func, args_list, repeat=repeat)
+                    run_result['cpu_us'] = cpu_per_call(func, args_list, repeat)
+                    if key not in results or run_result['cpu_us'] < results[key]['cpu_us']:
+                        results[key] = run_result
+    app.log_writer.flush()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--size', type=int, default=0, help='Also measure a database of this many synthetic diseases')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(directory, 'spill.jsonl')
+        for size in [None] + ([args.size] if args.size else []):
+            path = os.path.join(directory, f'payloads_{size or "bundled"}.db')
+            if size is None:
+                shutil.copy(db.DATABASE_PATH, path)
+            else:
+                build_database(path, size)
+            db.set_database_path(path)
+            results[str(size or 'bundled')] = run(args.queries, args.seed, args.repeat)
+
+    rows = []
+    for size, r in results.items():
+        for mix, shape in itertools.product(('query mix', 'disease names'), ('full', 'compact')):
+            before = r[f'dict + jsonify[{mix}, {shape}]']
+            after = r[f'payload[{mix}, {shape}]']
+            rows.append((size, mix, shape, f"{before['cpu_us']:.1f}", f"{after['cpu_us']:.1f}",
+                         f"{(after['cpu_us'] - before['cpu_us']) / before['cpu_us'] * 100:+.1f}%",
+                         f"{before['p99_us']:.1f}", f"{after['p99_us']:.1f}"))
+    print_table('CPU per chat request (microseconds; p99 is wall time)',
+                ['diseases', 'messages', 'body', 'dict + jsonify', 'payload', 'change', 'p99 before', 'p99 after'], rows)
+    print_table('Pre-rendering (help list and default cards)', ['diseases', 'payloads', 'seconds', 'MB encoded'],
+                [(size, r['payloads'], f"{r['prerender_s']:.2f}", f"{r['payload_bytes'] / 1e6:.1f}")
+                 for size, r in results.items()])
+    if args.json:
+        write_json(args.json, 'payloads', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
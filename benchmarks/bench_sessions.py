@@ -0,0 +1,135 @@
+"""Session store memory at its cap, and follow-up answers against full queries
+
+    python -m benchmarks.bench_sessions [--sessions 100000] [--json sessions.json]
+
+Memory (tracemalloc): --sessions sessions, each on a random disease and
+with a fresh 32-character id, as a request would bring. They are stored once in a SessionStore (__slots__ state, interned ids, intent
+bitmask) and once as a dict per session holding the rendered `disease`
+projection, which is what keeping the last answer would cost. Then twice
+--sessions distinct sessions go through a store capped at --sessions, to
+show that memory stops growing at the cap.
+
+Latency (response cache off): a follow-up ("what about prevention?")
+answered from the session, against the full question ("how to prevent
+dengue fever") that resolves the disease name again, spelled right and
+misspelled.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import db
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import misspell
+from session_store import SessionStore
+
+FOLLOW_UPS = ['what about prevention?', 'and its causes', 'tell me more', 'how do I prevent it', 'risk factors?']
+
+
+def traced(build):
+    """Bytes still allocated after build() returns, and its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def session_ids(count):
+    rng = random.Random(2)
+    return ('%032x' % rng.getrandbits(128) for _ in range(count))
+
+
+def store_memory(count, records, max_sessions):
+    rng = random.Random(1)
+
+    def build():
+        store = SessionStore(max_sessions=max_sessions)
+        for session_id in session_ids(count):
+            store.put(session_id, rng.choice(records)['id'], ('symptoms', 'prevention'))
+        return store
+    return traced(build)
+
+
+def dict_memory(count, records):
+    rng = random.Random(1)
+
+    def build():
+        sessions = {}
+        for session_id in session_ids(count):
+            record = rng.choice(records)
+            sessions[session_id] = {
+                'disease': {field: record[field] for field in ('id', 'name', 'symptoms', 'prevention')},
+                'intents': ('symptoms', 'prevention'),
+                'expires_at': time.monotonic() + 1800,
+            }
+        return sessions
+    return traced(build)
+
+
+def run(count):
+    import app
+
+    catalog = app.reload_catalog()
+    records = [dict(r) for r in catalog.records]
+
+    memory = {}
+    size, store = store_memory(count, records, count)
+    memory['SessionStore'] = {'sessions': len(store), 'bytes': size}
+    del store
+    size, sessions = dict_memory(count, records)
+    memory['dict of answers'] = {'sessions': len(sessions), 'bytes': size}
+    del sessions
+    size, store = store_memory(2 * count, records, count)
+    memory[f'SessionStore, {2 * count} sessions'] = {'sessions': len(store), 'bytes': size}
+    del store
+
+    app.response_cache.max_entries = 0
+    latency = {}
+    # Names that are also emergency phrases ("stroke") never start a session
+    names = [r['name'] for r in records
+             if app.build_response(f"how to prevent {r['name'].lower()}")['type'] == 'disease_info']
+    full = [(f'how to prevent {name.lower()}', f'bench-{i:08d}') for i, name in enumerate(names)]
+    latency['full question'] = measure_distribution(app.build_response, full, repeat=20)
+    rng = random.Random(3)
+    latency['full question, misspelled'] = measure_distribution(
+        app.build_response, [(f'how to prevent {misspell(name.lower(), rng)}',) for name in names], repeat=20)
+    for message, session_id in full:
+        app.build_response(message, session_id)
+    follow_ups = [(FOLLOW_UPS[i % len(FOLLOW_UPS)], session_id) for i, (_, session_id) in enumerate(full)]
+    latency['follow-up from session'] = measure_distribution(app.build_response, follow_ups, repeat=20)
+    latency['SessionStore.get'] = measure_distribution(app.sessions.get, [(s,) for _, s in full], repeat=20)
+    return memory, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sessions.db')
+        shutil.copy(db.DATABASE_PATH, path)
+        # app creates its log writer at import time, so point it at the copy first
+        db.set_database_path(path)
+        os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(directory, 'spill.jsonl')
+        memory, latency = run(args.sessions)
+
+    print_table('Memory for remembered sessions', ['store', 'sessions', 'MB', 'bytes/session'],
+                [(name, m['sessions'], f"{m['bytes'] / 1e6:.1f}", f"{m['bytes'] / m['sessions']:.0f}")
+                 for name, m in memory.items()])
+    print_table('Answering (microseconds, response cache off)', ['path', 'mean', 'p50', 'p99'],
+                [(name, f"{r['mean_us']:.1f}", f"{r['p50_us']:.1f}", f"{r['p99_us']:.1f}")
+                 for name, r in latency.items()])
+    if args.json:
+        write_json(args.json, 'sessions', {'memory': memory, 'latency': latency}, vars(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Cold start: time to first chat response and to /api/ready
+
+    python -m benchmarks.bench_startup [--sizes 50000] [--runs 3] [--json startup.json]
+
+Each run starts a fresh Flask server process (threaded werkzeug, warm-up
+started at launch, as workers.py does) on a copy of the database, and
+polls it:
+
+- first response: the first POST /api/chat for a disease name that gets
+  an answer, measured from process start. It includes interpreter
+  startup, imports and whatever the request has to load itself.
+- ready: the first 200 from /api/ready, in a separate process.
+
+Modes:
+
+- database: no artifacts; the catalog and the symptom index are built
+  from the database.
+- prebuilt: CHATBOT_CATALOG_SNAPSHOT points at a snapshot built ahead of
+  time by `python catalog_snapshot.py build`, whose time is reported
+  separately.
+
+The bundled database is measured first, then one with --sizes synthetic
+diseases (benchmarks.corpus) in a copy of its schema.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import db
+from benchmarks.bench_workers import build_database
+from benchmarks.common import print_table, write_json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = ('import app, os; app.warmup.start(); '
+          'app.app.run(host="127.0.0.1", port=int(os.environ["PORT"]), threaded=True)')
+
+
+def request(port, method, path, body=None):
+    """(status, parsed JSON) or None while the server is not listening"""
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        conn.request(method, path, body=json.dumps(body) if body else None,
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    except OSError:
+        return None
+
+
+def time_until(env, port, probe, timeout=300.0):
+    """Seconds from process start until probe(port) is true, and the last probe result"""
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-c', SERVER], env=dict(env, PORT=str(port)), cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            result = probe(port)
+            if result:
+                return time.perf_counter() - start, result
+            time.sleep(0.005)
+        raise RuntimeError(f'Server on port {port} did not answer in {timeout} s')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(size, mode, runs, directory, port):
+    """Median timings for one database; size None is a copy of the bundled one"""
+    path = os.path.join(directory, f'diseases_{size or "bundled"}.db')
+    if not os.path.exists(path):
+        if size is None:
+            shutil.copy(db.DATABASE_PATH, path)
+        else:
+            build_database(path, size)
+    conn = db.connect(path)
+    name = conn.execute('SELECT name FROM diseases ORDER BY id LIMIT 1').fetchone()[0]
+    conn.close()
+
+    env = dict(os.environ, CHATBOT_DB_PATH=path, CHATBOT_LOG_SPILL_PATH=os.path.join(directory, 'spill.jsonl'))
+    env.pop('CHATBOT_CATALOG_SNAPSHOT', None)
+    result = {}
+    if mode == 'prebuilt':
+        snapshot = os.path.splitext(path)[0] + '.catalog'
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'catalog_snapshot.py', 'build', '--output', snapshot],
+                       env=env, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        result['build_s'] = time.perf_counter() - start
+        env['CHATBOT_CATALOG_SNAPSHOT'] = snapshot
+
+    def answered(port):
+        response = request(port, 'POST', '/api/chat', {'message': name})
+        return response and response[0] == 200 and response[1]
+
+    def ready(port):
+        response = request(port, 'GET', '/api/ready')
+        return response and response[0] == 200 and response[1]
+
+    index = os.path.splitext(path)[0] + '.tfidf'
+    first, ready_s, steps = [], [], []
+    for _ in range(runs):
+        # A restarted pod without a persisted symptom index rebuilds it
+        if os.path.exists(index):
+            os.remove(index)
+        first.append(time_until(env, port, answered)[0])
+        seconds, status = time_until(env, port, ready)
+        ready_s.append(seconds)
+        steps.append(status['steps_ms'])
+    result['first_response_s'] = sorted(first)[len(first) // 2]
+    result['ready_s'] = sorted(ready_s)[len(ready_s) // 2]
+    result['warmup_steps_ms'] = steps[len(steps) // 2]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='50000')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=18750)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in [None] + [int(s) for s in args.sizes.split(',') if s]:
+            for mode in ('database', 'prebuilt'):
+                results[f'{size or "bundled"} {mode}'] = run(size, mode, args.runs, directory, args.port)
+
+    rows = []
+    for key, r in results.items():
+        size, mode = key.split()
+        steps = ', '.join(f'{name} {ms:.0f}' for name, ms in r['warmup_steps_ms'].items())
+        build = f"{r['build_s']:.2f}" if 'build_s' in r else '-'
+        rows.append((size, mode, build, f"{r['first_response_s']:.2f}", f"{r['ready_s']:.2f}", steps))
+    print_table('Cold start (seconds from process start, median of runs)',
+                ['diseases', 'mode', 'build step', 'first response', 'ready', 'warm-up steps (ms)'], rows)
+    if args.json:
+        write_json(args.json, 'startup', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
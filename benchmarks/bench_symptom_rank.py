@@ -0,0 +1,117 @@
+"""Symptom -> disease ranking: TF-IDF matrix vs. FTS5 BM25, up to 50k diseases
+
+    python -m benchmarks.bench_symptom_rank [--sizes 1000,10000,50000] [--json symptom_rank.json]
+
+For each size, a catalog of synthetic diseases (benchmarks.corpus) is
+tokenized into a SymptomRanker. The benchmark reports:
+
+- the time to build the matrix, save it, and map the saved file (what a
+  restart costs)
+- top-5 latency for lists of 2 to 4 random symptoms, with NumPy (when it
+  is installed) and with the pure-Python fallback
+
+The synthetic catalog has only 20 distinct symptoms, so every term occurs
+in about a quarter of the diseases. That is far denser than real symptom
+text and close to the worst case for a query.
+
+For comparison, the same questions go to search_symptoms() ('any' mode) on
+a database holding the same diseases.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import db
+import search
+import symptom_ranker
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import SYMPTOMS, generate_diseases
+from catalog import DiseaseCatalog
+from symptom_ranker import SymptomRanker
+
+
+def symptom_lists(count, seed=4):
+    rng = random.Random(seed)
+    return [('I have ' + ', '.join(rng.sample(SYMPTOMS, rng.randint(2, 4))),) for _ in range(count)]
+
+
+def build_database(path, records):
+    source = sqlite3.connect(db.DATABASE_PATH)
+    schema = source.execute("SELECT sql FROM sqlite_master WHERE name = 'diseases'").fetchone()[0]
+    source.close()
+    conn = db.connect(path)
+    conn.execute(schema)
+    conn.executemany(
+        'INSERT INTO diseases (id, name, symptoms, prevention, causes, risk_factors, info) '
+        'VALUES (:id, :name, :symptoms, :prevention, :causes, :risk_factors, :info)', records)
+    search.create_fts(conn)
+    return conn
+
+
+def run(size, queries, directory):
+    records = list(generate_diseases(size))
+    catalog = DiseaseCatalog(records)
+    result = {}
+
+    start = time.perf_counter()
+    ranker = SymptomRanker.build(catalog)
+    result['build_ms'] = (time.perf_counter() - start) * 1000
+    path = os.path.join(directory, f'diseases_{size}.tfidf')
+    start = time.perf_counter()
+    ranker.save(path)
+    result['save_ms'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    ranker = SymptomRanker.load(path)
+    result['load_ms'] = (time.perf_counter() - start) * 1000
+    result['file_mb'] = os.path.getsize(path) / 1e6
+
+    numpy = symptom_ranker.numpy
+    if numpy is not None:
+        result['rank_numpy'] = measure_distribution(ranker.rank, queries)
+    symptom_ranker.numpy = None
+    try:
+        # Without NumPy; the arrays of the mapped file are the same
+        result['rank_python'] = measure_distribution(SymptomRanker.load(path).rank, queries)
+    finally:
+        symptom_ranker.numpy = numpy
+
+    conn = build_database(os.path.join(directory, f'diseases_{size}.db'), records)
+    result['fts'] = measure_distribution(lambda text: search.search_symptoms(conn, text, limit=5), queries)
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    queries = symptom_lists(args.queries)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(s) for s in args.sizes.split(',')):
+            results[size] = run(size, queries, directory)
+
+    print_table('Building and persisting the matrix', ['diseases', 'build ms', 'save ms', 'load ms', 'file MB'],
+                [(size, f"{r['build_ms']:.0f}", f"{r['save_ms']:.1f}", f"{r['load_ms']:.2f}", f"{r['file_mb']:.2f}")
+                 for size, r in results.items()])
+    rows = []
+    for size, r in results.items():
+        for name, key in (('TF-IDF, NumPy', 'rank_numpy'), ('TF-IDF, pure Python', 'rank_python'),
+                          ('FTS5 BM25', 'fts')):
+            if key in r:
+                rows.append((size, name, f"{r[key]['mean_us'] / 1000:.2f}", f"{r[key]['p50_us'] / 1000:.2f}",
+                             f"{r[key]['p99_us'] / 1000:.2f}"))
+    print_table('Top-5 conditions for a symptom list (milliseconds per query)',
+                ['diseases', 'engine', 'mean', 'p50', 'p99'], rows)
+    if args.json:
+        write_json(args.json, 'symptom_rank', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
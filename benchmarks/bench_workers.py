@@ -0,0 +1,159 @@
+"""Catalog memory per worker and throughput of the pre-fork launcher
+
+    python -m benchmarks.bench_workers [--sizes 1000,10000,50000] [--json workers.json]
+
+Memory: for every catalog size a synthetic diseases table is loaded by a
+fresh process, once as the in-memory DiseaseCatalog and once by mapping a
+snapshot. After a lookup workload the process reports its private memory
+(anonymous memory from /proc/self/smaps_rollup) above the interpreter
+with the modules imported. This is what each extra worker costs. Mapped
+snapshot pages are file-backed and shared, so they are not counted.
+
+Lookups: catalog.get / search / fuzzy_get on the largest catalog, in
+memory and mapped.
+
+Throughput: workers.py with 1, 2, 4, ... up to --max-workers workers on a
+copy of database.db, driven by the load_test request mix. The load
+generator runs on the same machine, so the numbers only mean something
+when there are spare cores.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+import db
+from benchmarks.common import measure_distribution, print_table, write_json
+from benchmarks.corpus import generate_diseases, generate_queries
+from benchmarks.load_test import run_load, wait_until_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: load the catalog one way, exercise it, report memory
+MEMORY_PROBE = '''
+import json, sys
+def private_kb():
+    with open('/proc/self/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return int(fields['Anonymous'].split()[0])
+import catalog, catalog_snapshot, query_parser
+from benchmarks.corpus import generate_queries
+baseline = private_kb()
+mode, path = sys.argv[1], sys.argv[2]
+loaded = catalog.load_catalog(path) if mode == 'in-memory' else catalog_snapshot.open_snapshot(path)
+names = [loaded.names[i] for i in range(0, len(loaded.names), max(1, len(loaded.names) // 200))]
+for _, message in generate_queries(2000, names):
+    query = query_parser.parse_query(message).disease_query or message
+    loaded.get(query) or loaded.search(query, 1) or loaded.fuzzy_get(query)
+print(json.dumps({'private_mb': (private_kb() - baseline) / 1024}))
+'''
+
+
+def build_database(path, size):
+    """A database holding `size` synthetic diseases with the real schema"""
+    source = sqlite3.connect(db.DATABASE_PATH)
+    schema = source.execute("SELECT sql FROM sqlite_master WHERE name = 'diseases'").fetchone()[0]
+    source.close()
+    conn = sqlite3.connect(path)
+    conn.execute(schema)
+    with conn:
+        conn.executemany(
+            'INSERT INTO diseases (id, name, symptoms, prevention, causes, risk_factors, info) '
+            'VALUES (:id, :name, :symptoms, :prevention, :causes, :risk_factors, :info)',
+            generate_diseases(size))
+    conn.close()
+
+
+def memory_probe(mode, path):
+    output = subprocess.run([sys.executable, '-c', MEMORY_PROBE, mode, path], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)['private_mb']
+
+
+def lookup_latency(in_memory, mapped):
+    names = list(in_memory.names[::max(1, len(in_memory.names) // 500)])
+    typos = [(message,) for category, message in generate_queries(2000, names) if category == 'typo']
+    results = {}
+    for label, catalog in (('in-memory', in_memory), ('snapshot', mapped)):
+        results[f'get[{label}]'] = measure_distribution(catalog.get, [(n,) for n in names], repeat=5)
+        results[f'search[{label}]'] = measure_distribution(catalog.search, [(n.split()[0][:5],) for n in names])
+        results[f'fuzzy_get[{label}]'] = measure_distribution(catalog.fuzzy_get, typos)
+    return results
+
+
+def throughput(worker_counts, concurrency, duration, directory):
+    db_path = os.path.join(directory, 'load.db')
+    shutil.copy(db.DATABASE_PATH, db_path)
+    results = {}
+    for offset, workers in enumerate(worker_counts):
+        port = 18800 + offset
+        env = dict(os.environ, CHATBOT_DB_PATH=db_path, CHATBOT_LOG_SPILL_PATH=os.path.join(directory, 'spill.jsonl'),
+                   CHATBOT_CATALOG_SNAPSHOT=os.path.join(directory, 'load.catalog'), CHATBOT_RATE_LIMIT='0')
+        server = subprocess.Popen([sys.executable, 'workers.py', '--workers', str(workers), '--host', '127.0.0.1',
+                                   '--port', str(port)], env=env, cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            url = f'http://127.0.0.1:{port}'
+            wait_until_ready(url)
+            results[f'{workers} workers'] = run_load(url, concurrency, duration)
+        finally:
+            server.terminate()
+            server.wait(30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,50000', help='Catalog sizes for the memory comparison')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    import catalog_snapshot
+    from catalog import load_catalog
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    memory = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            db_path = os.path.join(directory, f'diseases-{size}.db')
+            snapshot = os.path.join(directory, f'diseases-{size}.catalog')
+            build_database(db_path, size)
+            in_memory = load_catalog(db_path)
+            catalog_snapshot.write_snapshot(in_memory, snapshot)
+            memory[size] = {
+                'in_memory_private_mb': memory_probe('in-memory', db_path),
+                'snapshot_private_mb': memory_probe('snapshot', snapshot),
+                'snapshot_file_mb': os.path.getsize(snapshot) / 1e6,
+            }
+        lookups = lookup_latency(in_memory, catalog_snapshot.open_snapshot(snapshot))
+
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= args.max_workers:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != args.max_workers:
+            worker_counts.append(args.max_workers)
+        load = throughput(worker_counts, args.concurrency, args.duration, directory)
+
+    print_table('Private memory per worker process (MB)', ['diseases', 'in-memory', 'snapshot', 'snapshot file'],
+                [(size, f"{m['in_memory_private_mb']:.1f}", f"{m['snapshot_private_mb']:.1f}",
+                  f"{m['snapshot_file_mb']:.1f}") for size, m in memory.items()])
+    print_table(f'Catalog lookups, {sizes[-1]} diseases (microseconds)', ['lookup', 'mean', 'p50', 'p99'],
+                [(name, f"{r['mean_us']:.1f}", f"{r['p50_us']:.1f}", f"{r['p99_us']:.1f}")
+                 for name, r in lookups.items()])
+    print_table(f'Throughput, {args.concurrency} clients, {args.duration:.0f}s ({os.cpu_count()} cores)',
+                ['server', 'req/s', 'p50 ms', 'p99 ms', 'errors'],
+                [(name, f"{r['requests_per_second']:.0f}", f"{r['p50_ms']:.1f}", f"{r['p99_ms']:.1f}", r['errors'])
+                 for name, r in load.items()])
+    if args.json:
+        write_json(args.json, 'workers', {'memory': memory, 'lookups': lookups, 'throughput': load}, vars(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def measure(func, *args, repeat=1000):
+    """Average wall time of `func(*args)` in microseconds"""
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_distribution(func, args_list, repeat=1):
+    """Per-call wall times of `func(*args)` over `args_list`, summarized in microseconds"""
+    for args in args_list[:10]:
+        func(*args)
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'calls': len(samples),
+        'mean_us': sum(samples) / len(samples) if samples else 0.0,
+        'p50_us': percentile(samples, 0.50),
+        'p95_us': percentile(samples, 0.95),
+        'p99_us': percentile(samples, 0.99),
+        'max_us': samples[-1] if samples else 0.0,
+    }
+
+
+def print_table(title, headers, rows):
+    """Print benchmark results as an aligned text table"""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print(f'\n{title}')
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in rows:
+        print('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_json(path, benchmark, results, parameters=None):
+    """Save results with enough context (commit, interpreter, machine) to compare runs"""
+    report = {
+        'benchmark': benchmark,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': parameters or {},
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f'\nResults written to {path}')
@@ -0,0 +1,218 @@
+"""Synthetic workload for benchmarks: chat queries, chat log history and diseases
+
+    python -m benchmarks.corpus queries --count 10000 > queries.jsonl
+    python -m benchmarks.corpus logs --db /tmp/big.db --rows 1000000
+
+`queries` prints one {"category", "message"} object per line, mixing disease
+questions, misspellings, symptom descriptions, greetings, help requests,
+emergencies and unknown topics. `logs` copies database.db (unless --db
+already exists) and appends chat and emergency log rows spread over the
+last --days days, updating the statistics rollups as the log writer would.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+from datetime import datetime, timedelta, timezone
+
+import analytics
+import db
+
+# category -> relative weight in the generated mix
+QUERY_MIX = {
+    'disease': 40,
+    'typo': 15,
+    'symptoms': 15,
+    'greeting': 8,
+    'help': 4,
+    'emergency': 8,
+    'unknown': 10,
+}
+
+DISEASE_TEMPLATES = [
+    '{name}', 'what is {name}', 'tell me about {name}', '{name} symptoms',
+    'symptoms of {name}', 'how to prevent {name}', 'prevention for {name}',
+    'give me information on {name}', 'explain {name} please', 'is {name} dangerous?',
+]
+
+SYMPTOM_TEMPLATES = [
+    'I have {0} and {1}', 'fever with {0}', 'my child has {0}, {1} and {2}',
+    'feeling {0} since yesterday', 'what disease causes {0} and {1}',
+]
+
+SYMPTOMS = [
+    'fever', 'cough', 'headache', 'rash', 'itching', 'joint pain', 'muscle pain', 'fatigue',
+    'nausea', 'vomiting', 'diarrhea', 'chills', 'sore throat', 'runny nose', 'dizziness',
+    'weight loss', 'night sweats', 'jaundice', 'blurred vision', 'frequent urination',
+]
+
+EMERGENCY_MESSAGES = [
+    'my father has chest pain', 'I think someone is having a heart attack',
+    'difficulty breathing after eating nuts', 'she is unconscious and not responding',
+    'severe bleeding from a cut', 'my son is having a seizure', 'signs of a stroke',
+    'I want to kill myself', 'baby is choking', 'sudden severe headache and paralysis',
+]
+
+GREETINGS = ['hi', 'hello', 'hey', 'good morning', 'good evening', 'hello there!', 'greetings']
+
+HELP_MESSAGES = ['help', 'list', 'help me', 'list all diseases']
+
+# Building blocks for synthetic disease records
+NAME_SYLLABLES = ['ar', 'bel', 'cor', 'dra', 'en', 'fal', 'gor', 'hem', 'is', 'ka', 'lun', 'mor',
+                  'nef', 'os', 'pel', 'quin', 'ros', 'sal', 'tor', 'ul', 'var', 'zen']
+NAME_KINDS = ['Fever', 'Syndrome', 'Disease', 'Virus', 'Infection', 'Disorder', 'Dystrophy', 'Palsy']
+CAUSES = ['a virus spread by mosquitoes', 'bacteria in contaminated water', 'an inherited gene variant',
+          'an autoimmune reaction', 'a fungal infection', 'long-term exposure to smoke']
+RISK_FACTORS = ['age over 60', 'diabetes', 'smoking', 'travel to endemic areas', 'pregnancy',
+                'weakened immune system', 'family history', 'obesity']
+PREVENTION = ['wash hands often', 'use mosquito nets', 'get vaccinated', 'drink boiled water',
+              'avoid smoking', 'exercise regularly', 'eat a balanced diet', 'wear a mask']
+
+UNKNOWN_MESSAGES = [
+    'what is the weather today', 'tell me about quantum physics', 'recipe for pancakes',
+    'how do vaccines get approved', 'best exercise for back', 'flibbertigibbet',
+]
+
+
+def load_disease_names(path=None):
+    conn = db.connect(path)
+    names = [row['name'] for row in conn.execute('SELECT name FROM diseases ORDER BY id')]
+    conn.close()
+    return names
+
+
+def misspell(word, rng):
+    """One random deletion, transposition, substitution or insertion"""
+    chars = list(word)
+    i = rng.randrange(len(chars))
+    edit = rng.randrange(4)
+    if edit == 0 and len(chars) > 4:
+        del chars[i]
+    elif edit == 1 and i < len(chars) - 1:
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    elif edit == 2:
+        chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    else:
+        chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+    return ''.join(chars)
+
+
+def generate_queries(count, names, seed=1, mix=None):
+    """`count` (category, message) pairs drawn from the weighted mix"""
+    rng = random.Random(seed)
+    mix = mix or QUERY_MIX
+    categories = list(mix)
+    weights = [mix[c] for c in categories]
+    queries = []
+    for category in rng.choices(categories, weights, k=count):
+        if category == 'disease':
+            name = rng.choice(names)
+            message = rng.choice(DISEASE_TEMPLATES).format(name=rng.choice([name, name.lower()]))
+        elif category == 'typo':
+            message = rng.choice(DISEASE_TEMPLATES).format(name=misspell(rng.choice(names).lower(), rng))
+        elif category == 'symptoms':
+            message = rng.choice(SYMPTOM_TEMPLATES).format(*rng.sample(SYMPTOMS, 3))
+        elif category == 'greeting':
+            message = rng.choice(GREETINGS)
+        elif category == 'help':
+            message = rng.choice(HELP_MESSAGES)
+        elif category == 'emergency':
+            message = rng.choice(EMERGENCY_MESSAGES)
+        else:
+            message = rng.choice(UNKNOWN_MESSAGES)
+        queries.append((category, message))
+    return queries
+
+
+def generate_diseases(count, seed=3):
+    """Yield `count` synthetic disease records with unique names, in id order"""
+    rng = random.Random(seed)
+    seen = set()
+    for disease_id in range(1, count + 1):
+        syllables = ''.join(rng.choice(NAME_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        name = f'{syllables.capitalize()} {rng.choice(NAME_KINDS)}'
+        if name in seen:
+            name = f'{name} {disease_id}'
+        seen.add(name)
+        yield {
+            'id': disease_id,
+            'name': name,
+            'symptoms': ', '.join(rng.sample(SYMPTOMS, rng.randint(3, 7))).capitalize(),
+            'prevention': ', '.join(rng.sample(PREVENTION, 3)).capitalize(),
+            'causes': rng.choice(CAUSES).capitalize(),
+            'risk_factors': ', '.join(rng.sample(RISK_FACTORS, 3)).capitalize(),
+            'info': f'{name} is a synthetic condition caused by {rng.choice(CAUSES)}.',
+        }
+
+
+def generate_chat_logs(conn, rows, names, days=365, seed=2, chunk_size=50000, now=None):
+    """Append `rows` chat log rows (and ~8% emergencies) spread over the last `days` days
+
+    Rollups are updated in the same transaction as each chunk, exactly as the
+    log writer does, so /api/stats stays consistent with the logs.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    span = days * 86400
+    analytics.create_schema(conn)
+    written = 0
+    while written < rows:
+        size = min(chunk_size, rows - written)
+        offsets = sorted((rng.random() * span for _ in range(size)), reverse=True)
+        chats, emergencies = [], []
+        for offset, (category, message) in zip(offsets, generate_queries(size, names, rng.random())):
+            timestamp = (now - timedelta(seconds=offset)).strftime('%Y-%m-%d %H:%M:%S')
+            disease = None
+            if category in ('disease', 'typo'):
+                disease = rng.choice(names)
+                response = f'📋 **{disease}**\n\n🔍 Symptoms: ...'
+            elif category == 'emergency':
+                emergencies.append((message, timestamp))
+                response = '🚨 EMERGENCY ALERT 🚨 ...'
+            else:
+                response = '...'
+            chats.append((message, response, timestamp, disease))
+        with conn:
+            conn.executemany(
+                'INSERT INTO emergency_logs (message, timestamp) VALUES (?, ?)', emergencies)
+            conn.executemany(
+                'INSERT INTO chat_logs (user_message, bot_response, timestamp, disease) VALUES (?, ?, ?, ?)',
+                chats)
+            analytics.record_batch(conn, chats, emergencies)
+        written += size
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    queries = commands.add_parser('queries', help='Print synthetic chat queries as JSON lines')
+    queries.add_argument('--count', type=int, default=10000)
+    queries.add_argument('--seed', type=int, default=1)
+    logs = commands.add_parser('logs', help='Fill a database copy with synthetic chat logs')
+    logs.add_argument('--db', required=True, help='Target database; created from database.db if missing')
+    logs.add_argument('--rows', type=int, default=1000000)
+    logs.add_argument('--days', type=int, default=365)
+    logs.add_argument('--seed', type=int, default=2)
+    args = parser.parse_args()
+
+    names = load_disease_names()
+    if args.command == 'queries':
+        for category, message in generate_queries(args.count, names, args.seed):
+            sys.stdout.write(json.dumps({'category': category, 'message': message}) + '\n')
+        return
+
+    if os.path.abspath(args.db) == os.path.abspath(db.DATABASE_PATH):
+        parser.error('refusing to write synthetic logs into the live database')
+    if not os.path.exists(args.db):
+        shutil.copy(db.DATABASE_PATH, args.db)
+    conn = db.connect(args.db)
+    written = generate_chat_logs(conn, args.rows, names, args.days, args.seed)
+    conn.close()
+    print(f'✅ {written} chat log rows added to {args.db}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""HTTP load test comparing the Flask (sync) and ASGI (async) serving modes
+
+    python -m benchmarks.load_test --compare
+    python -m benchmarks.load_test --url http://localhost:5000 --concurrency 64 --json load.json
+
+--compare starts each server on a copy of database.db, drives the same
+request mix against both and prints requests/sec and latency percentiles.
+Chat requests use a synthetic query mix from benchmarks.corpus.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import db
+from benchmarks.common import percentile, print_table, write_json
+from benchmarks.corpus import generate_queries, load_disease_names
+
+# (weight, method, path)
+REQUEST_MIX = [(8, 'POST', '/api/chat'), (1, 'GET', '/api/stats'), (1, 'GET', '/api/diseases')]
+
+SERVER_COMMANDS = {
+    'sync': [sys.executable, '-c',
+             'import app, os; app.reload_catalog(); '
+             'app.app.run(host="127.0.0.1", port=int(os.environ["PORT"]), threaded=True)'],
+    'async': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+              '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def chat_messages(count=1000, seed=1):
+    return [message for _, message in generate_queries(count, load_disease_names(), seed)]
+
+
+def run_load(url, concurrency=32, duration=10.0, seed=1, messages=None):
+    """Drive the request mix from `concurrency` keep-alive clients"""
+    messages = messages or chat_messages(seed=seed)
+    parts = urlsplit(url)
+    weights = [w for w, _, _ in REQUEST_MIX]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(client_id):
+        rng = random.Random(seed + client_id)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        local = []
+        local_errors = 0
+        while time.monotonic() < stop_at:
+            _, method, path = rng.choices(REQUEST_MIX, weights)[0]
+            body = headers = None
+            if method == 'POST':
+                body = json.dumps({'message': rng.choice(messages)})
+                headers = {'Content-Type': 'application/json'}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                continue
+            local.append((time.perf_counter() - start) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+    }
+
+
+def wait_until_ready(url, timeout=20.0):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            conn.request('GET', '/api/stats')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {url} did not start')
+
+
+def start_server(mode, port, db_path):
+    # Every simulated user shares one address; per-client limits would throttle the whole run
+    env = dict(os.environ, PORT=str(port), CHATBOT_DB_PATH=db_path, CHATBOT_RATE_LIMIT='0')
+    command = [part.format(port=port) for part in SERVER_COMMANDS[mode]]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(command, env=env, cwd=root,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def compare(concurrency, duration):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for offset, mode in enumerate(('sync', 'async')):
+            db_path = os.path.join(directory, f'{mode}.db')
+            shutil.copy(db.DATABASE_PATH, db_path)
+            port = 18700 + offset
+            server = start_server(mode, port, db_path)
+            try:
+                url = f'http://127.0.0.1:{port}'
+                wait_until_ready(url)
+                results[mode] = run_load(url, concurrency, duration)
+            finally:
+                server.terminate()
+                server.wait(10)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Drive an already running server')
+    parser.add_argument('--compare', action='store_true', help='Start and compare both serving modes')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.compare:
+        results = compare(args.concurrency, args.duration)
+    elif args.url:
+        results = {args.url: run_load(args.url, args.concurrency, args.duration)}
+    else:
+        parser.error('pass --url or --compare')
+
+    rows = [(name, r['requests'], r['errors'], f"{r['requests_per_second']:.0f}",
+             f"{r['p50_ms']:.1f}", f"{r['p95_ms']:.1f}", f"{r['p99_ms']:.1f}")
+            for name, r in results.items()]
+    print_table(f'Load test: {args.concurrency} clients, {args.duration:.0f}s',
+                ['server', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'], rows)
+    if args.json:
+        write_json(args.json, 'load_test', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+import db
+import languages
+from fuzzy_index import FuzzyIndex
+from query_parser import alias_key
+
+# Common short names users type that do not appear in the stored disease name
+DISEASE_ALIASES = {
+    'covid': 'COVID-19',
+    'corona': 'COVID-19',
+    'coronavirus': 'COVID-19',
+    'dengue': 'Dengue Fever',
+    'diabetes': 'Diabetes Type 2',
+    'tb': 'Tuberculosis',
+    'flu': 'Influenza',
+    'bp': 'Hypertension',
+    'high blood pressure': 'Hypertension',
+    'hiv': 'HIV/AIDS',
+    'aids': 'HIV/AIDS',
+    'typhoid': 'Typhoid Fever',
+    'zika': 'Zika Virus',
+    'uti': 'Urinary Tract Infection',
+    'ulcer': 'Peptic Ulcer',
+    'cirrhosis': 'Liver Cirrhosis',
+    'crohn': 'Crohn\'s Disease',
+    'crohns': 'Crohn\'s Disease',
+    'celiac': 'Celiac Disease',
+    'lyme': 'Lyme Disease',
+    'arthritis': 'Rheumatoid Arthritis',
+    'thyroid': 'Hypothyroidism',
+    'heart attack': 'Heart Attack',
+    'chicken pox': 'Chickenpox',
+}
+
+# Names in the other supported languages, keyed the way parse_query() leaves
+# them, so a Hindi or Tamil name is one dictionary lookup like an English one
+LANGUAGE_ALIASES = {
+    alias_key(alias, language): name
+    for language, aliases in languages.DISEASE_ALIASES.items() for alias, name in aliases.items()
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+# A query word whose close terms name more diseases than this ("fever",
+# "disease") adds no candidates of its own while a rarer word has found some;
+# it is only checked against those
+FUZZY_MAX_FANOUT = 256
+# Shorter queries are never resolved by a typo match, only suggested: "cold"
+# is one edit from "copd", "test" from "west"
+FUZZY_MIN_LENGTH = 6
+
+
+class DiseaseCatalog:
+    """Read-only, in-memory copy of the diseases table with lookup indexes"""
+
+    def __init__(self, rows, aliases=None):
+        # Records are kept in id order so keyword search returns the same
+        # order as the old `LIKE ... LIMIT 5` query
+        self.records = sorted((dict(r) for r in rows), key=lambda r: r['id'])
+        self.by_id = {r['id']: r for r in self.records}
+        self.by_name = {}
+        self.token_index = {}
+        self.names = sorted(r['name'] for r in self.records)
+        # Listing order for /api/diseases; (name, id) keys make a stable cursor
+        self.listing = sorted(self.records, key=lambda r: (r['name'], r['id']))
+        self._listing_keys = [(r['name'], r['id']) for r in self.listing]
+        self.fields = tuple(self.records[0]) if self.records else ()
+        # Content hash; changes whenever any disease row changes
+        self.version = hashlib.sha1(
+            repr([sorted(r.items()) for r in self.records]).encode('utf-8')
+        ).hexdigest()[:16]
+        self._lower_names = [(r['name'].lower(), r['id']) for r in self.records]
+
+        prefix_keys = []
+        fuzzy_terms = []
+        for record in self.records:
+            name_lower = record['name'].lower()
+            self.by_name.setdefault(name_lower, record)
+            fuzzy_terms.append((name_lower, record['id']))
+            for match in _TOKEN_RE.finditer(name_lower):
+                self.token_index.setdefault(match.group(), []).append(record['id'])
+                fuzzy_terms.append((match.group(), record['id']))
+                # Every suffix starting at a token boundary, so a prefix query
+                # matches "fever" in "dengue fever" as well as "dengue fe"
+                prefix_keys.append((name_lower[match.start():], record['id']))
+
+        if aliases is None:
+            aliases = {**DISEASE_ALIASES, **LANGUAGE_ALIASES}
+        for alias, name in aliases.items():
+            record = self.by_name.get(name.lower())
+            if record is not None:
+                self.by_name.setdefault(alias.lower(), record)
+                fuzzy_terms.append((alias.lower(), record['id']))
+        self.fuzzy = FuzzyIndex(fuzzy_terms)
+
+        # Sorted suffix array; a prefix lookup is a bisect over a flat list,
+        # which behaves like a prefix trie without one object per node
+        prefix_keys.sort()
+        self._prefix_keys = [key for key, _ in prefix_keys]
+        self._prefix_ids = [disease_id for _, disease_id in prefix_keys]
+
+    @classmethod
+    def from_tables(cls, **tables):
+        """Catalog over ready-made lookup tables (see catalog_snapshot) instead of rows"""
+        catalog = cls.__new__(cls)
+        catalog.__dict__.update(tables)
+        return catalog
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, name):
+        """Exact, case-insensitive lookup by disease name or alias"""
+        return self.by_name.get(name.lower().strip())
+
+    def prefix_ids(self, prefix):
+        """Ids of diseases with a word starting with `prefix`"""
+        start = bisect_left(self._prefix_keys, prefix)
+        ids = set()
+        for i in range(start, len(self._prefix_keys)):
+            if not self._prefix_keys[i].startswith(prefix):
+                break
+            ids.add(self._prefix_ids[i])
+        return ids
+
+    def page(self, after=None, limit=50):
+        """Up to `limit` records in listing order after the (name, id) key `after`"""
+        start = bisect_right(self._listing_keys, tuple(after)) if after else 0
+        return self.listing[start:start + limit]
+
+    def search(self, keyword, limit=5):
+        """Diseases whose name contains `keyword`, in id order"""
+        keyword = keyword.lower()
+        ids = self.prefix_ids(keyword) if keyword else set()
+        if not ids:
+            # Substring in the middle of a word; rare, and still in-process
+            ids = {disease_id for name, disease_id in self._lower_names if keyword in name}
+        return [self.by_id[disease_id] for disease_id in sorted(ids)[:limit]]
+
+    def fuzzy_candidates(self, query):
+        """Ranked (rank_key, id) pairs for a possibly misspelled query
+
+        A disease ranks first when the whole query is close to its full name
+        or an alias (not just one word of it), then by how many query words
+        are close to words in its name.
+
+        The whole query and its words are taken rarest first. Once some
+        diseases are found, one that names more than FUZZY_MAX_FANOUT is only
+        checked against those by bisecting its id lists, so a common word like
+        "fever" costs a few lookups per candidate instead of one per disease
+        it names. Diseases that only such words match are left out.
+        """
+        query = ' '.join(query.lower().split())
+        words = _TOKEN_RE.findall(query)
+        # (diseases named, postings, is a word), rarest first
+        parts = [self._postings(query, names_only=True) + (False,)]
+        parts += [self._postings(word) + (True,) for word in words]
+        parts.sort(key=lambda part: part[0])
+        whole = {}
+        token_hits = {}
+        for size, postings, is_word in parts:
+            found = whole.keys() | token_hits.keys()
+            if found and size > FUZZY_MAX_FANOUT:
+                best = {}
+                for disease_id in found:
+                    distance = _closest(postings, disease_id)
+                    if distance is not None:
+                        best[disease_id] = distance
+            else:
+                best = {}
+                for distance, ids in postings:
+                    for disease_id in ids:
+                        best.setdefault(disease_id, distance)
+            if not is_word:
+                whole = best
+                continue
+            for disease_id, distance in best.items():
+                matched, total = token_hits.get(disease_id, (0, 0))
+                token_hits[disease_id] = (matched + 1, total + distance)
+
+        ranked = []
+        for disease_id in whole.keys() | token_hits.keys():
+            matched, total = token_hits.get(disease_id, (0, 0))
+            key = (disease_id not in whole, whole.get(disease_id, 0), -matched, total, disease_id)
+            ranked.append((key, disease_id))
+        ranked.sort()
+        return ranked, len(words)
+
+    def _postings(self, text, names_only=False):
+        """(diseases named, [(distance, ids)]) of the indexed terms close to `text`, closest first
+
+        With `names_only`, only full names and aliases count, not the single
+        name words the index also holds.
+        """
+        postings = [(distance, self.fuzzy.ids_for(term)) for distance, term in self.fuzzy.lookup(text)
+                    if not names_only or term in self.by_name]
+        return sum(len(ids) for _, ids in postings), postings
+
+    def fuzzy_search(self, query, limit=5):
+        """Diseases whose names are close to `query`, best first"""
+        ranked, _ = self.fuzzy_candidates(query)
+        return [self.by_id[disease_id] for _, disease_id in ranked[:limit]]
+
+    def fuzzy_get(self, query):
+        """Disease whose full name or an alias is close to `query`, or None
+
+        A query close to only one word of a name ("test" and West Nile
+        Virus), shorter than FUZZY_MIN_LENGTH, or as close to two diseases
+        is not resolved; fuzzy_search() offers those as suggestions.
+        """
+        if len(' '.join(query.split())) < FUZZY_MIN_LENGTH:
+            return None
+        ranked, _ = self.fuzzy_candidates(query)
+        if not ranked:
+            return None
+        (is_partial, _, _, _, _), best_id = ranked[0]
+        if is_partial:
+            return None
+        if len(ranked) > 1 and ranked[1][0][:4] == ranked[0][0][:4]:
+            return None
+        return self.by_id[best_id]
+
+    def similar_ids(self, words, limit=5):
+        """Up to `limit` ids of diseases with a word starting with one of `words`
+
+        Words naming fewer diseases go first, each word's diseases in the
+        order of the matching name text. A word's count is two bisects, so
+        this costs about `limit` steps however many diseases "fever" names.
+        """
+        keys = self._prefix_keys
+        spans = []
+        for word in words:
+            start = bisect_left(keys, word)
+            spans.append((bisect_left(keys, word + '\U0010ffff', start) - start, start))
+        found = []
+        for count, start in sorted(spans):
+            for i in range(start, start + count):
+                disease_id = self._prefix_ids[i]
+                if disease_id not in found:
+                    found.append(disease_id)
+                    if len(found) >= limit:
+                        return found
+        return found
+
+
+def _closest(postings, disease_id):
+    """Distance of the closest term whose sorted id list holds `disease_id`, or None"""
+    for distance, ids in postings:
+        index = bisect_left(ids, disease_id)
+        if index < len(ids) and ids[index] == disease_id:
+            return distance
+    return None
+
+
+# Serve the catalog from this memory-mapped snapshot file, shared by every
+# worker process on the host (see workers.py and catalog_snapshot.py)
+SNAPSHOT_PATH = os.environ.get('CHATBOT_CATALOG_SNAPSHOT')
+# Seconds between checks for a snapshot swapped in by another process
+SNAPSHOT_CHECK_INTERVAL = 1.0
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_next_snapshot_check = 0.0
+
+
+def load_catalog(db_path=None):
+    """Build a catalog from the diseases table"""
+    with db.connection(db_path) as conn:
+        rows = conn.execute('SELECT * FROM diseases').fetchall()
+    return DiseaseCatalog(rows)
+
+
+def get_catalog():
+    """Return the shared catalog, loading it on first use"""
+    global _catalog
+    catalog = _catalog
+    if catalog is None or (SNAPSHOT_PATH and time.monotonic() >= _next_snapshot_check):
+        with _catalog_lock:
+            if SNAPSHOT_PATH:
+                _refresh_snapshot()
+            elif _catalog is None:
+                _catalog = load_catalog()
+            catalog = _catalog
+    return catalog
+
+
+def _refresh_snapshot():
+    """Map the snapshot file if it was replaced since we last mapped it; needs _catalog_lock"""
+    global _catalog, _next_snapshot_check
+    import catalog_snapshot
+
+    _next_snapshot_check = time.monotonic() + SNAPSHOT_CHECK_INTERVAL
+    try:
+        stat = os.stat(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        catalog_snapshot.write_snapshot(load_catalog(), SNAPSHOT_PATH)
+        stat = os.stat(SNAPSHOT_PATH)
+    if _catalog is None or getattr(_catalog, 'snapshot_file', None) != (stat.st_dev, stat.st_ino):
+        try:
+            _catalog = catalog_snapshot.open_snapshot(SNAPSHOT_PATH)
+        except ValueError:
+            # Damaged, or written by another format version: rebuild it
+            catalog_snapshot.write_snapshot(load_catalog(), SNAPSHOT_PATH)
+            _catalog = catalog_snapshot.open_snapshot(SNAPSHOT_PATH)
+
+
+def reload_catalog(db_path=None):
+    """Rebuild the shared catalog after the diseases table changed
+
+    In snapshot mode the new catalog is written to the snapshot file, and
+    other processes map it within SNAPSHOT_CHECK_INTERVAL seconds.
+    """
+    global _catalog
+    catalog = load_catalog(db_path)
+    if SNAPSHOT_PATH:
+        import catalog_snapshot
+        catalog_snapshot.write_snapshot(catalog, SNAPSHOT_PATH)
+        catalog = catalog_snapshot.open_snapshot(SNAPSHOT_PATH)
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
@@ -0,0 +1,205 @@
+"""Streaming bulk import of disease records from CSV or JSONL
+
+Rows are read one at a time, validated and upserted by name in
+executemany batches. The whole import runs in one transaction, so
+readers keep seeing the old catalog until it commits, and a failed import
+changes nothing. Memory use depends on the batch size, not the file size.
+
+Index work is deferred for large loads. The FTS sync triggers are dropped
+and the full-text index is rebuilt once at the end. Loading into an empty
+diseases table also drops the name index: rows are appended, duplicate
+names are resolved (the last row wins) and the unique index is built
+afterwards. The log and statistics tables are never touched.
+
+Columns: name, symptoms and prevention are required; causes, risk_factors
+and info are optional, and a row updating an existing disease without them
+keeps the stored values; other columns are ignored. Files ending in .gz are
+decompressed on the fly.
+
+    python init_database.py --import diseases.csv [--batch-size 10000]
+"""
+import csv
+import gzip
+import io
+import json
+import time
+from collections import Counter, namedtuple
+from itertools import islice
+
+import search
+
+FIELDS = ('name', 'symptoms', 'prevention', 'causes', 'risk_factors', 'info')
+REQUIRED_FIELDS = ('name', 'symptoms', 'prevention')
+MAX_NAME_LENGTH = 200
+MAX_FIELD_LENGTH = 20000
+BATCH_SIZE = 10000
+# Rebuilding the FTS index once beats per-row triggers when an import adds
+# at least this fraction of the rows already in the table
+FTS_REBUILD_FRACTION = 0.25
+# Rejected rows reported individually; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+INSERT_SQL = 'INSERT INTO diseases (name, symptoms, prevention, causes, risk_factors, info) VALUES (?, ?, ?, ?, ?, ?)'
+# An optional column a row leaves out keeps the value already stored
+UPSERT_SQL = INSERT_SQL + '''
+    ON CONFLICT(name) DO UPDATE SET
+        symptoms = excluded.symptoms, prevention = excluded.prevention,
+        causes = COALESCE(excluded.causes, diseases.causes),
+        risk_factors = COALESCE(excluded.risk_factors, diseases.risk_factors),
+        info = COALESCE(excluded.info, diseases.info)'''
+
+ImportResult = namedtuple('ImportResult', ['read', 'imported', 'added', 'rejected', 'reasons', 'errors', 'seconds'])
+
+
+def open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return io.open(path, 'r', encoding='utf-8', newline='')
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    raise ValueError(f'Cannot tell the format of {path}; pass --format csv or jsonl')
+
+
+def read_rows(path, file_format=None):
+    """Yield (line number, row) from a CSV or JSONL file, one row at a time
+
+    A JSONL line that is not a JSON object is yielded as its raw text, so
+    validation can report it.
+    """
+    file_format = file_format or detect_format(path)
+    with open_text(path) as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or ())]
+            if missing:
+                raise ValueError(f'{path} has no {", ".join(missing)} column')
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = line
+                yield line_number, row
+
+
+def validate_row(row):
+    """Tuple of FIELDS values for a raw row; raises ValueError with the reason"""
+    if not isinstance(row, dict):
+        raise ValueError('not a JSON object')
+    values = []
+    for field in FIELDS:
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f'{field} is not text')
+        value = value.strip() if value else None
+        if not value and field in REQUIRED_FIELDS:
+            raise ValueError(f'{field} is missing')
+        if value and len(value) > (MAX_NAME_LENGTH if field == 'name' else MAX_FIELD_LENGTH):
+            raise ValueError(f'{field} is too long')
+        values.append(value or None)
+    return tuple(values)
+
+
+def create_name_index(conn):
+    """Unique index on diseases.name, replacing the older non-unique one"""
+    for index in conn.execute("PRAGMA index_list('diseases')").fetchall():
+        if index['name'] == 'idx_diseases_name' and not index['unique']:
+            conn.execute('DROP INDEX idx_diseases_name')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_diseases_name ON diseases (name)')
+
+
+def import_diseases(conn, rows, batch_size=BATCH_SIZE, expected_rows=None, progress=None):
+    """Upsert (line number, row) pairs into the diseases table in one transaction
+
+    `expected_rows` (when known) decides whether the FTS index is rebuilt
+    at the end instead of updated per row. `progress(rows_read)` is called
+    after every batch.
+    """
+    start = time.perf_counter()
+    existing = conn.execute('SELECT COUNT(*) FROM diseases').fetchone()[0]
+    bulk = existing == 0
+    rebuild_fts = bulk or expected_rows is None or expected_rows >= existing * FTS_REBUILD_FRACTION
+
+    reasons = Counter()
+    errors = []
+    counts = {'read': 0, 'imported': 0}
+
+    def valid_rows():
+        for line_number, row in rows:
+            counts['read'] += 1
+            try:
+                values = validate_row(row)
+            except ValueError as error:
+                reasons[str(error)] += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((line_number, str(error)))
+                continue
+            counts['imported'] += 1
+            yield values
+
+    conn.execute('BEGIN')
+    try:
+        if bulk:
+            conn.execute('DROP INDEX IF EXISTS idx_diseases_name')
+        else:
+            # The upsert needs the unique index while loading
+            create_name_index(conn)
+        if rebuild_fts:
+            search.drop_fts_triggers(conn)
+        sql = INSERT_SQL if bulk else UPSERT_SQL
+        values = valid_rows()
+        while True:
+            batch = list(islice(values, batch_size))
+            if not batch:
+                break
+            conn.executemany(sql, batch)
+            del batch
+            if progress:
+                progress(counts['read'])
+        if bulk:
+            # Same name twice in the file: keep the last row
+            conn.execute('DELETE FROM diseases WHERE id NOT IN (SELECT MAX(id) FROM diseases GROUP BY name)')
+            create_name_index(conn)
+        search.create_fts(conn, rebuild=rebuild_fts, commit=False)
+        added = conn.execute('SELECT COUNT(*) FROM diseases').fetchone()[0] - existing
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    return ImportResult(counts['read'], counts['imported'], added, sum(reasons.values()), dict(reasons),
+                        errors, time.perf_counter() - start)
+
+
+def count_lines(path):
+    """Physical lines in `path`; a cheap upper bound on its row count"""
+    with open_text(path) as f:
+        return sum(1 for _ in f)
+
+
+def import_file(conn, path, file_format=None, batch_size=BATCH_SIZE, progress=None):
+    """Stream a CSV or JSONL file into the diseases table"""
+    rows = read_rows(path, file_format)
+    return import_diseases(conn, rows, batch_size, expected_rows=count_lines(path), progress=progress)
+
+
+def print_result(result, label):
+    rate = result.read / result.seconds if result.seconds else 0.0
+    print(f'✅ {label}: {result.imported} of {result.read} rows imported '
+          f'({result.added} new diseases) in {result.seconds:.2f}s, {rate:,.0f} rows/sec')
+    if result.rejected:
+        print(f'⚠️ {result.rejected} rows rejected:')
+        for reason, count in sorted(result.reasons.items(), key=lambda item: -item[1]):
+            print(f'   {count:>8}  {reason}')
+        for line_number, reason in result.errors:
+            print(f'   line {line_number}: {reason}')
@@ -0,0 +1,434 @@
+"""Memory-mapped, read-only disease catalog snapshot shared by worker processes
+
+    python catalog_snapshot.py build [--output database.catalog]
+    python catalog_snapshot.py check [database.catalog]
+
+write_snapshot() serializes a DiseaseCatalog with every lookup table it
+uses, and its symptom TF-IDF matrix, into one file. open_snapshot() maps
+that file and returns a DiseaseCatalog whose tables read straight from
+the mapping. The pages live in the OS page cache, so all workers share
+one copy and a worker's own memory does not grow with the catalog.
+Records are decoded on access.
+
+A new snapshot is written to a temporary file and renamed over the old
+one. A reader sees either the old file or the new one, never a partial
+write, and keeps its old mapping until it notices the swap (see
+catalog.get_catalog).
+
+The snapshot is also the startup artifact. `build` compiles it from the
+database ahead of time, for example while building a container image, and
+a server started with CHATBOT_CATALOG_SNAPSHOT maps it in under a
+millisecond instead of loading and indexing the catalog.
+
+Layout: a header, a section directory, then 8-byte aligned sections.
+Each section is a native-endian uint32 array, a UTF-8 blob, or JSON.
+Strings are stored as an offset array plus a blob. Hash tables use
+open addressing on crc32, so every process computes the same slots. The
+header holds the catalog version and a CRC-32 of everything after it. A
+file from another format version, or one that fails the CRC, is rejected
+with ValueError.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+import db
+from catalog import DiseaseCatalog, load_catalog
+from fuzzy_index import FuzzyIndex
+
+MAGIC = b'DCAT'
+# Bump when a table's layout or order changes, or the symptom matrix's
+# weighting does, so old files are rebuilt
+FORMAT_VERSION = 4
+# magic, format version, byte order (1 = little endian), section count,
+# catalog version, CRC-32 of the rest of the file
+HEADER = struct.Struct('<4sHHI16sI')
+# section name, offset, length
+SECTION = struct.Struct('<16sQQ')
+ALIGNMENT = 8
+# Decoded records kept per process; the cache is emptied when it fills up,
+# so a worker's memory stays bounded however large the catalog is
+RECORD_CACHE_SIZE = 2048
+
+if array('I').itemsize != 4:
+    raise ImportError('catalog snapshots need a 4-byte unsigned int array type')
+
+
+def snapshot_path():
+    return os.environ.get('CHATBOT_CATALOG_SNAPSHOT') or os.path.splitext(db.DATABASE_PATH)[0] + '.catalog'
+
+
+# Writing
+
+def add_strings(sections, name, values):
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    sections[f'{name}.o'] = offsets.tobytes()
+    sections[f'{name}.s'] = bytes(blob)
+
+
+def add_table(sections, name, mapping):
+    """Hash table from str keys to lists of ints"""
+    keys = list(mapping)
+    add_strings(sections, f'{name}.k', keys)
+    value_offsets = array('I', [0])
+    values = array('I')
+    for key in keys:
+        values.extend(mapping[key])
+        value_offsets.append(len(values))
+    size = 8
+    while size < 2 * len(keys):
+        size *= 2
+    slots = array('I', bytes(4 * size))
+    for index, key in enumerate(keys):
+        slot = zlib.crc32(key.encode('utf-8')) & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = index + 1
+    sections[f'{name}.vo'] = value_offsets.tobytes()
+    sections[f'{name}.v'] = values.tobytes()
+    sections[f'{name}.h'] = slots.tobytes()
+
+
+def encode_catalog(catalog):
+    """Section name -> bytes for every table of an in-memory DiseaseCatalog"""
+    position = {record['id']: index for index, record in enumerate(catalog.records)}
+    term_ids, terms, prefix_deletes, suffix_deletes = catalog.fuzzy.tables()
+    sections = {'meta': json.dumps({'fields': list(catalog.fields)}).encode('utf-8')}
+    add_strings(sections, 'rec', (json.dumps(r, ensure_ascii=False, separators=(',', ':')) for r in catalog.records))
+    sections['ids'] = array('I', (r['id'] for r in catalog.records)).tobytes()
+    add_strings(sections, 'rname', (r['name'] for r in catalog.records))
+    add_strings(sections, 'names', catalog.names)
+    sections['list'] = array('I', (position[r['id']] for r in catalog.listing)).tobytes()
+    add_table(sections, 'byname', {key: (position[r['id']],) for key, r in catalog.by_name.items()})
+    add_strings(sections, 'pfx', catalog._prefix_keys)
+    sections['pfxid'] = array('I', catalog._prefix_ids).tobytes()
+    add_strings(sections, 'fterm', terms)
+    add_table(sections, 'fids', term_ids)
+    add_table(sections, 'fpre', prefix_deletes)
+    add_table(sections, 'fsuf', suffix_deletes)
+    # Imported here: symptom_ranker writes its own files with this module
+    from symptom_ranker import SymptomRanker
+    for name, data in SymptomRanker.build(catalog).sections().items():
+        sections[f'tf.{name}'] = data
+    return sections
+
+
+def write_snapshot(catalog, path):
+    """Write `catalog` to `path`, replacing any previous snapshot atomically"""
+    return write_sections(path, encode_catalog(catalog), catalog.version)
+
+
+def write_sections(path, sections, version, magic=MAGIC, format_version=FORMAT_VERSION):
+    """Write named byte sections in the snapshot layout, atomically
+
+    Also used for other files derived from one catalog version (see
+    symptom_ranker), each with its own magic and format version.
+    """
+    offset = HEADER.size + SECTION.size * len(sections)
+    directory = []
+    for name, data in sections.items():
+        offset += -offset % ALIGNMENT
+        directory.append(SECTION.pack(name.encode('ascii'), offset, len(data)))
+        offset += len(data)
+
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(bytes(HEADER.size))
+            body = b''.join(directory)
+            f.write(body)
+            crc = zlib.crc32(body)
+            for data in sections.values():
+                padding = bytes(-f.tell() % ALIGNMENT)
+                f.write(padding)
+                f.write(data)
+                crc = zlib.crc32(data, zlib.crc32(padding, crc))
+            f.seek(0)
+            f.write(HEADER.pack(magic, format_version, sys.byteorder == 'little', len(sections),
+                                version.encode('ascii'), crc))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return path
+
+
+# Reading
+
+class MappedStrings(Sequence):
+    """Read-only list of str over an offset array and a UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+        self._length = len(offsets) - 1
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index.__class__ is int and 0 <= index < self._length:
+            return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if -self._length <= index < 0:
+            return self[index + self._length]
+        raise IndexError(index)
+
+
+class MappedTable:
+    """Read-only hash table from str to a list of ints"""
+
+    def __init__(self, keys, value_offsets, values, slots):
+        self._length = len(keys)
+        self._key_offsets = keys._offsets
+        self._key_blob = keys._blob
+        self._value_offsets = value_offsets
+        self._values = values
+        self._slots = slots
+        self._mask = len(slots) - 1
+
+    def __len__(self):
+        return self._length
+
+    def _find(self, key):
+        data = key.encode('utf-8')
+        size = len(data)
+        slots, offsets, mask = self._slots, self._key_offsets, self._mask
+        slot = zlib.crc32(data) & mask
+        while True:
+            entry = slots[slot]
+            if not entry:
+                return -1
+            start = offsets[entry - 1]
+            end = offsets[entry]
+            if end - start == size and self._key_blob[start:end] == data:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def get(self, key, default=None):
+        index = self._find(key)
+        if index < 0:
+            return default
+        return self._values[self._value_offsets[index]:self._value_offsets[index + 1]].tolist()
+
+
+class MappedRecords(Sequence):
+    """Disease records, optionally in another order, decoded on access
+
+    Views of the same records share `cache` (position -> record).
+    """
+
+    def __init__(self, encoded, order=None, cache=None):
+        self._encoded = encoded
+        self._order = order
+        self._length = len(encoded) if order is None else len(order)
+        self._cache = {} if cache is None else cache
+
+    def __len__(self):
+        return self._length
+
+    def position(self, index):
+        return index if self._order is None else self._order[index]
+
+    def __getitem__(self, index):
+        if index.__class__ is not int or not 0 <= index < self._length:
+            if isinstance(index, slice):
+                return [self[i] for i in range(*index.indices(self._length))]
+            if -self._length <= index < 0:
+                return self[index + self._length]
+            raise IndexError(index)
+        position = index if self._order is None else self._order[index]
+        record = self._cache.get(position)
+        if record is None:
+            if len(self._cache) >= RECORD_CACHE_SIZE:
+                self._cache.clear()
+            record = self._cache[position] = json.loads(self._encoded[position])
+        return record
+
+
+class RecordsById:
+    """disease id -> record, by bisecting the sorted id array"""
+
+    def __init__(self, ids, records):
+        self._ids = ids
+        self._records = records
+
+    def get(self, disease_id, default=None):
+        index = bisect_left(self._ids, disease_id)
+        if index < len(self._ids) and self._ids[index] == disease_id:
+            return self._records[index]
+        return default
+
+    def __getitem__(self, disease_id):
+        record = self.get(disease_id)
+        if record is None:
+            raise KeyError(disease_id)
+        return record
+
+
+class RecordsByName:
+    """Lower-cased name or alias -> record"""
+
+    def __init__(self, table, records):
+        self._table = table
+        self._records = records
+
+    def __contains__(self, key):
+        return key in self._table
+
+    def get(self, key, default=None):
+        positions = self._table.get(key)
+        return self._records[positions[0]] if positions else default
+
+
+class _ListingKeys(Sequence):
+    """(name, id) of every record in listing order, for DiseaseCatalog.page()"""
+
+    def __init__(self, listing, names, ids):
+        self._listing = listing
+        self._names = names
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._listing)
+
+    def __getitem__(self, index):
+        position = self._listing.position(index)
+        return self._names[position], self._ids[position]
+
+
+class _LowerNames(Sequence):
+    """(lower-cased name, id) in id order, for substring search"""
+
+    def __init__(self, names, ids):
+        self._names = names
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, index):
+        return self._names[index].lower(), self._ids[index]
+
+
+def map_sections(path, magic=MAGIC, format_version=FORMAT_VERSION):
+    """Map a file written by write_sections(); returns (version, sections, stat)
+
+    Sections are memoryviews into the read-only mapping. The CRC is checked
+    first, which reads the whole file once (about 1 ms per MB).
+    """
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < HEADER.size:
+        raise ValueError(f'{path} is too short to be a {magic.decode("ascii")} file')
+    file_magic, file_format, little_endian, count, version, crc = HEADER.unpack_from(data, 0)
+    if file_magic != magic or file_format != format_version:
+        raise ValueError(f'{path} is not a {magic.decode("ascii")} file (format {format_version})')
+    if bool(little_endian) != (sys.byteorder == 'little'):
+        raise ValueError(f'{path} was written on a machine with a different byte order')
+    view = memoryview(data)
+    if zlib.crc32(view[HEADER.size:]) != crc:
+        raise ValueError(f'{path} is damaged: checksum mismatch')
+
+    sections = {}
+    for i in range(count):
+        name, offset, length = SECTION.unpack_from(data, HEADER.size + i * SECTION.size)
+        sections[name.rstrip(b'\0').decode('ascii')] = view[offset:offset + length]
+    return version.decode('ascii'), sections, stat
+
+
+def mapped_strings(sections, name):
+    """MappedStrings over the sections add_strings() wrote for `name`"""
+    return MappedStrings(sections[f'{name}.o'].cast('I'), sections[f'{name}.s'])
+
+
+def mapped_table(sections, name):
+    """MappedTable over the sections add_table() wrote for `name`"""
+    return MappedTable(mapped_strings(sections, f'{name}.k'), sections[f'{name}.vo'].cast('I'),
+                       sections[f'{name}.v'].cast('I'), sections[f'{name}.h'].cast('I'))
+
+
+def open_snapshot(path):
+    """Map a snapshot written by write_snapshot() and return its DiseaseCatalog"""
+    version, sections, stat = map_sections(path)
+
+    def ints(name):
+        return sections[name].cast('I')
+
+    def strings(name):
+        return mapped_strings(sections, name)
+
+    def table(name):
+        return mapped_table(sections, name)
+
+    meta = json.loads(bytes(sections['meta']))
+    encoded = strings('rec')
+    ids = ints('ids')
+    names = strings('rname')
+    records = MappedRecords(encoded)
+    listing = MappedRecords(encoded, ints('list'), records._cache)
+    catalog = DiseaseCatalog.from_tables(
+        records=records,
+        by_id=RecordsById(ids, records),
+        by_name=RecordsByName(table('byname'), records),
+        names=strings('names'),
+        listing=listing,
+        _listing_keys=_ListingKeys(listing, names, ids),
+        fields=tuple(meta['fields']),
+        version=version,
+        _lower_names=_LowerNames(names, ids),
+        fuzzy=FuzzyIndex.from_tables(table('fids'), strings('fterm'), table('fpre'), table('fsuf')),
+        _prefix_keys=strings('pfx'),
+        _prefix_ids=ints('pfxid'),
+    )
+    # Identifies the file this catalog maps; a rename over the path changes it
+    catalog.snapshot_file = (stat.st_dev, stat.st_ino)
+    # The symptom TF-IDF matrix, read by symptom_ranker.get_ranker()
+    catalog.symptom_sections = {name[3:]: data for name, data in sections.items() if name.startswith('tf.')}
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Compile the database catalog into a snapshot')
+    build.add_argument('--output', default=snapshot_path())
+    check = commands.add_parser('check', help='Verify a snapshot and print its version')
+    check.add_argument('path', nargs='?', default=snapshot_path())
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        catalog = load_catalog()
+        write_snapshot(catalog, args.output)
+        size = os.path.getsize(args.output) / 1e6
+        print(f'📦 Catalog snapshot {args.output}: {len(catalog)} diseases, version {catalog.version}, {size:.1f} MB')
+        return
+
+    try:
+        catalog = open_snapshot(args.path)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f'❌ {exc}')
+    print(f'✅ {args.path}: {len(catalog)} diseases, version {catalog.version}')
+
+
+if __name__ == '__main__':
+    main()
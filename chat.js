@@ -3,6 +3,14 @@ const chatBox = document.getElementById('chatBox');
 const userInput = document.getElementById('userInput');
 const typingIndicator = document.getElementById('typing-indicator');
 
+// Random id for this tab's conversation, so the server can answer
+// follow-ups such as "what about prevention?"
+// (crypto.randomUUID is only available on https and localhost)
+const sessionId = sessionStorage.getItem('chatSessionId') ||
+    (window.crypto && crypto.randomUUID ? crypto.randomUUID() :
+        Math.random().toString(36).slice(2) + Date.now().toString(36));
+sessionStorage.setItem('chatSessionId', sessionId);
+
 // Initialize chat
 function initChat() {
     // Remove welcome message on first interaction
@@ -57,7 +65,7 @@ async function sendMessage() {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ message: message })
+            body: JSON.stringify({ message: message, compact: true, session_id: sessionId })
         });
         
         const data = await response.json();
@@ -0,0 +1,35 @@
+"""Content-Encoding negotiation for response bodies
+
+gzip is always available; brotli is used when the optional `brotli`
+package is installed.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding the client accepts, or None for an uncompressed body
+
+    `accept_encodings` maps an encoding to its quality, like Werkzeug's
+    `request.accept_encodings`.
+    """
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
@@ -0,0 +1,135 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+DATABASE_PATH = os.environ.get('CHATBOT_DB_PATH', 'database.db')
+
+POOL_SIZE = int(os.environ.get('CHATBOT_DB_POOL_SIZE', 8))
+
+# Connection tuning; applied to every connection handed out by this module
+BUSY_TIMEOUT_SECONDS = 5.0
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+CACHED_STATEMENTS = 256
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA cache_size=-{CACHE_SIZE_KB}',
+    f'PRAGMA mmap_size={MMAP_SIZE_BYTES}',
+    'PRAGMA temp_store=MEMORY',
+)
+
+
+def connect(path=None, check_same_thread=True):
+    """Open a tuned connection: WAL journal, synchronous=NORMAL, larger cache, mmap"""
+    conn = sqlite3.connect(
+        path or DATABASE_PATH,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=check_same_thread,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Fixed-size pool of reusable connections to one database file
+
+    Connections stay open between requests, so each one keeps its page
+    cache and its prepared-statement cache. A connection is only ever used
+    by the thread that borrowed it.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block"""
+        start = metrics.clock()
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+            metrics.DB_CONNECTION_SECONDS.observe_since(start)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect(self.path, check_same_thread=False)
+        return self._idle.get()
+
+    def stats(self):
+        """Connections opened and currently idle"""
+        return {'size': self.size, 'open': self._created, 'idle': self._idle.qsize()}
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Shared pool for `path` (defaults to DATABASE_PATH)"""
+    path = path or DATABASE_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+def pool_stats():
+    """stats() of every pool, keyed by database path"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {path: pool.stats() for path, pool in pools.items()}
+
+
+def connection(path=None):
+    """Borrow a pooled connection: `with db.connection() as conn: ...`"""
+    return get_pool(path).connection()
+
+
+def close_pools():
+    """Close every pooled connection; the next connection() opens new ones"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+def set_database_path(path):
+    """Point the app at another database file and drop pooled connections"""
+    global DATABASE_PATH
+    DATABASE_PATH = path
+    close_pools()
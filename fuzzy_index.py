@@ -0,0 +1,157 @@
+# Only the first and last PREFIX_LENGTH characters of a term are expanded
+# into deletions (as in SymSpell); this caps the index at a fixed number of
+# keys per term however long the names get. A candidate must match on both
+# ends and is then verified on the full strings.
+PREFIX_LENGTH = 7
+MAX_DISTANCE = 2
+# Candidates verified with edit_distance() without narrowing them down first
+VERIFY_LIMIT = 32
+
+
+def allowed_distance(term):
+    """Edits tolerated for a query term of this length"""
+    if len(term) < 4:
+        return 0
+    if len(term) < 7:
+        return 1
+    return MAX_DISTANCE
+
+
+def deletes(term, max_distance):
+    """`term` and every string made by deleting up to `max_distance` characters"""
+    variants = {term}
+    level = {term}
+    for _ in range(max_distance):
+        level = {word[:i] + word[i + 1:] for word in level for i in range(len(word))}
+        variants |= level
+    return variants
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once exceeded
+
+    Only the diagonal band of width 2 * max_distance + 1 is computed, so the
+    cost is linear in the string length.
+    """
+    if a == b:
+        return 0
+    too_far = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return too_far
+
+    # Common prefixes and suffixes do not change the distance
+    start = 0
+    shortest = min(len(a), len(b))
+    while start < shortest and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return max(len_a, len_b) if max(len_a, len_b) <= max_distance else too_far
+
+    previous_previous = None
+    previous = [j if j <= max_distance else too_far for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        current = [too_far] * (len_b + 1)
+        current[0] = i if i <= max_distance else too_far
+        row_min = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len_b, i + max_distance) + 1):
+            value = previous[j - 1] if char_a == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous_previous is not None and j > 1
+                    and char_a == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous_previous[j - 2] + 1 < value):
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        previous_previous, previous = previous, current
+    return previous[len_b] if previous[len_b] <= max_distance else too_far
+
+
+class FuzzyIndex:
+    """Typo-tolerant lookup from terms to disease ids using a deletion index
+
+    A query is matched by generating its own deletions and looking them up
+    in the precomputed deletions of every indexed term, so lookup cost
+    depends on the query and the number of near matches, not on how many
+    terms are indexed.
+    """
+
+    def __init__(self, terms):
+        # terms: iterable of (term, disease_id); one term may map to many ids,
+        # kept in ascending order so callers can bisect them
+        term_ids = {}
+        for term, disease_id in terms:
+            term_ids.setdefault(term, set()).add(disease_id)
+        self.term_ids = {term: sorted(ids) for term, ids in term_ids.items()}
+
+        self.terms = list(self.term_ids)
+        self._prefix_deletes = {}
+        self._suffix_deletes = {}
+        for term_index, term in enumerate(self.terms):
+            for variant in deletes(term[:PREFIX_LENGTH], MAX_DISTANCE):
+                self._prefix_deletes.setdefault(variant, []).append(term_index)
+            for variant in deletes(term[-PREFIX_LENGTH:], MAX_DISTANCE):
+                self._suffix_deletes.setdefault(variant, []).append(term_index)
+
+    @classmethod
+    def from_tables(cls, term_ids, terms, prefix_deletes, suffix_deletes):
+        """Index over ready-made tables (see catalog_snapshot); any mapping with .get() works"""
+        index = cls.__new__(cls)
+        index.term_ids = term_ids
+        index.terms = terms
+        index._prefix_deletes = prefix_deletes
+        index._suffix_deletes = suffix_deletes
+        return index
+
+    def tables(self):
+        """The tables from_tables() takes, for serializing the index"""
+        return self.term_ids, self.terms, self._prefix_deletes, self._suffix_deletes
+
+    def __len__(self):
+        return len(self.terms)
+
+    def lookup(self, query, max_distance=None):
+        """Indexed terms within the allowed distance, as (distance, term) pairs, closest first"""
+        if max_distance is None:
+            max_distance = allowed_distance(query)
+        exact = self.term_ids.get(query)
+        if max_distance == 0:
+            return [(0, query)] if exact is not None else []
+
+        candidates = self._candidates(self._prefix_deletes, query[:PREFIX_LENGTH], max_distance)
+        # The suffix side only narrows the candidates down before they are
+        # verified. A common ending ("... syndrome") names thousands of terms,
+        # so it is not looked up when the prefix side found few.
+        if len(candidates) > VERIFY_LIMIT and len(query) > PREFIX_LENGTH:
+            candidates &= self._candidates(self._suffix_deletes, query[-PREFIX_LENGTH:], max_distance)
+
+        matches = []
+        for term_index in candidates:
+            term = self.terms[term_index]
+            distance = edit_distance(query, term, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, term))
+        matches.sort(key=lambda match: (match[0], abs(len(match[1]) - len(query)), match[1]))
+        return matches
+
+    @staticmethod
+    def _candidates(index, key, max_distance):
+        candidates = set()
+        for variant in deletes(key, max_distance):
+            candidates.update(index.get(variant, ()))
+        return candidates
+
+    def ids_for(self, term):
+        return self.term_ids.get(term, [])
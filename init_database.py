@@ -1,19 +1,21 @@
-import sqlite3
+import argparse
+import time
 from datetime import datetime
 
-def init_database():
-    """Initialize SQLite database with tables and comprehensive disease data"""
-    conn = sqlite3.connect('database.db')
+import analytics
+import catalog
+import catalog_import
+import db
+import search
+from catalog import reload_catalog
+
+def create_tables(conn):
+    """Create any missing table; existing diseases and logs are kept"""
     cursor = conn.cursor()
     
-    # Drop existing tables
-    cursor.execute('DROP TABLE IF EXISTS diseases')
-    cursor.execute('DROP TABLE IF EXISTS chat_logs')
-    cursor.execute('DROP TABLE IF EXISTS emergency_logs')
-    
     # Create Diseases Table
     cursor.execute('''
-        CREATE TABLE diseases (
+        CREATE TABLE IF NOT EXISTS diseases (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
             symptoms TEXT NOT NULL,
@@ -23,26 +25,39 @@ def init_database():
             info TEXT
         )
     ''')
+    catalog_import.create_name_index(conn)
     
     # Create Chat Logs Table
     cursor.execute('''
-        CREATE TABLE chat_logs (
+        CREATE TABLE IF NOT EXISTS chat_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_message TEXT NOT NULL,
             bot_response TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            disease TEXT
         )
     ''')
     
     # Create Emergency Logs Table
     cursor.execute('''
-        CREATE TABLE emergency_logs (
+        CREATE TABLE IF NOT EXISTS emergency_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             message TEXT NOT NULL,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    # Statistics rollups maintained by the log writer
+    analytics.create_schema(conn)
+    
+    # Full-text index over the disease text, kept in sync by triggers
+    search.create_fts(conn)
+
+def init_database():
+    """Create missing tables and load the built-in disease data; logs are kept"""
+    conn = db.connect()
+    create_tables(conn)
+    
     # Comprehensive Disease Data (60 Diseases)
     diseases = [
         {
@@ -503,20 +518,48 @@ def init_database():
         }
     ]
     
-    # Insert disease data
-    for disease in diseases:
-        cursor.execute('''
-            INSERT INTO diseases (name, symptoms, prevention, causes, risk_factors, info)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (disease['name'], disease['symptoms'], disease['prevention'], 
-              disease['causes'], disease['risk_factors'], disease['info']))
-    
-    conn.commit()
+    # Upsert disease data by name
+    catalog_import.import_diseases(conn, enumerate(diseases, 1), expected_rows=len(diseases))
     conn.close()
+    
+    # Refresh the in-memory catalog of any process that imported this module
+    reload_catalog()
+    
     print(f"✅ Database initialized successfully with {len(diseases)} diseases!")
     print("\nDisease list:")
     for i, disease in enumerate(diseases, 1):
         print(f"{i}. {disease['name']}")
 
+def import_catalog(path, file_format=None, batch_size=catalog_import.BATCH_SIZE):
+    """Stream a CSV/JSONL disease file into the database; logs are kept"""
+    conn = db.connect()
+    create_tables(conn)
+    result = catalog_import.import_file(conn, path, file_format, batch_size)
+    conn.close()
+    catalog_import.print_result(result, path)
+    
+    if catalog.SNAPSHOT_PATH:
+        # Running workers map the new snapshot within a second
+        start = time.perf_counter()
+        reload_catalog()
+        print(f"📦 Catalog snapshot {catalog.SNAPSHOT_PATH} rebuilt in {time.perf_counter() - start:.2f}s")
+    else:
+        print("Running servers pick up the change after POST /api/catalog/reload")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Create the database tables and load disease data')
+    parser.add_argument('--import', dest='path', metavar='FILE',
+                        help='Stream diseases from a CSV or JSONL file (optionally .gz) instead of the built-in list')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='Input format; guessed from the file name')
+    parser.add_argument('--batch-size', type=int, default=catalog_import.BATCH_SIZE,
+                        help='Rows per executemany batch')
+    args = parser.parse_args()
+    
+    if args.path:
+        import_catalog(args.path, args.format, args.batch_size)
+    else:
+        init_database()
+
 if __name__ == '__main__':
-    init_database()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import unicodedata
+from collections import deque, namedtuple
+
+# A keyword hit; `start`/`end` index into the lowercased text that was scanned
+KeywordMatch = namedtuple('KeywordMatch', ['label', 'keyword', 'start', 'end'])
+
+
+def is_word_char(ch):
+    """True for letters, digits and combining marks (e.g. Devanagari vowel signs)"""
+    return ch.isalnum() or ch == '_' or unicodedata.category(ch)[0] == 'M'
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over labelled keyword lists
+
+    All keywords of all labels are found in a single left-to-right pass over
+    the text, so the cost per message depends on the message length and the
+    number of hits, not on how many keywords are registered. A hit only counts
+    when it sits on word boundaries, so "hi" does not match inside "this".
+    Keywords of the labels in `open_ended` only need a boundary where they
+    start and may run on into a longer word, so "seizure" still matches
+    "seizures" and "chest pain" matches "chest pains".
+    """
+
+    def __init__(self, groups, open_ended=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.keywords = []
+        self.open_ended = frozenset(open_ended)
+
+        for label, keywords in groups.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    self._add(label, keyword)
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _add(self, label, keyword):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._out[state] += (len(self.keywords),)
+        self.keywords.append((label, keyword))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Return every keyword hit in `text` (already lowercased), in order"""
+        goto, fail, out, keywords, open_ended = self._goto, self._fail, self._out, self.keywords, self.open_ended
+        matches = []
+        state = 0
+        length = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for index in out[state]:
+                label, keyword = keywords[index]
+                start = i - len(keyword) + 1
+                # Word boundaries only apply where the keyword itself starts or
+                # ends with a word character ("?" matches anywhere)
+                if is_word_char(keyword[0]) and start > 0 and is_word_char(text[start - 1]):
+                    continue
+                if (label not in open_ended and is_word_char(keyword[-1])
+                        and i + 1 < length and is_word_char(text[i + 1])):
+                    continue
+                matches.append(KeywordMatch(label, keyword, start, i + 1))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def scan(self, text):
+        """Group the hits of `find_all` by label"""
+        grouped = {}
+        for match in self.find_all(text):
+            grouped.setdefault(match.label, []).append(match)
+        return grouped
+
+
+def remove_spans(text, matches, replacement=' '):
+    """Replace the spans of `matches` in `text`; overlapping spans are merged"""
+    parts = []
+    position = 0
+    for match in matches:
+        if match.end <= position:
+            continue
+        parts.append(text[position:max(position, match.start)])
+        parts.append(replacement)
+        position = match.end
+    parts.append(text[position:])
+    return ''.join(parts)
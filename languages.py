@@ -0,0 +1,288 @@
+"""Word lists for the languages the chatbot understands besides English
+
+Hindi, Hinglish (Hindi in Latin script), Tamil and Bengali each get
+filler words, intent keywords, disease-name aliases, and emergency,
+greeting and help phrases. query_parser, catalog and app turn these
+into per-language lookup tables once at import time. Resolving a
+message then costs the same dictionary lookups as in English, with no
+translation step.
+
+detect_language() picks the language from the first Indic character's
+script. An all-ASCII message counts as Hinglish when one of its tokens
+is a Hinglish word that English never uses.
+
+Answers are still written in English; only the lookup is multilingual.
+"""
+
+LANGUAGE_NAMES = {
+    'en': 'English',
+    'hi': 'Hindi',
+    'hinglish': 'Hinglish',
+    'ta': 'Tamil',
+    'bn': 'Bengali',
+}
+
+# (first code point, last code point, language)
+SCRIPT_RANGES = (
+    (0x0900, 0x097F, 'hi'),
+    (0x0980, 0x09FF, 'bn'),
+    (0x0B80, 0x0BFF, 'ta'),
+)
+
+STOP_WORDS = {
+    'hi': ['क्या', 'है', 'हैं', 'के', 'का', 'की', 'को', 'में', 'से', 'पर', 'बारे', 'बताओ', 'बताइए',
+           'बताएं', 'बताये', 'मुझे', 'मेरे', 'मेरा', 'कैसे', 'और', 'होता', 'होती', 'होते', 'जानकारी',
+           'कृपया', 'चाहिए', 'यह', 'ये', 'एक', 'तो', 'भी', 'रोग', 'बीमारी', 'कौन', 'सी', 'करें', 'करे',
+           'करना', 'करने', 'करते', 'होना', 'होने', 'होगा', 'रहा', 'रही', 'जाए', 'जाता', 'जाती', 'इसके',
+           'इसका', 'इसकी', 'इससे', 'उसके', 'उसका', 'उसकी', 'इसे'],
+    'hinglish': ['kya', 'hai', 'hain', 'ke', 'ka', 'ki', 'ko', 'mein', 'se', 'par', 'bare', 'baare',
+                 'batao', 'bataiye', 'bataye', 'mujhe', 'mere', 'mera', 'kaise', 'aur', 'hota', 'hoti',
+                 'hote', 'jankari', 'jaankari', 'kripya', 'chahiye', 'yeh', 'ye', 'bhi', 'rog',
+                 'bimari', 'beemari', 'kaun', 'konsi', 'karein', 'karen', 'kare', 'karna', 'karne', 'karte',
+                 'ho', 'hona', 'hone', 'hoga', 'raha', 'rahi', 'jaye', 'jata', 'jati', 'iske', 'iska', 'iski',
+                 'isse', 'uske', 'uska', 'uski', 'ise'],
+    'ta': ['என்ன', 'பற்றி', 'சொல்லுங்கள்', 'சொல்லு', 'சொல்', 'எனக்கு', 'எப்படி', 'மற்றும்', 'நோய்', 'நோயின்',
+           'தகவல்', 'என்றால்', 'ஆகும்', 'உள்ளது', 'தயவுசெய்து', 'யாவை', 'செய்வது', 'எப்படித்', 'அதன்', 'இதன்',
+           'அதை', 'இதை'],
+    'bn': ['কি', 'কী', 'হয়', 'সম্পর্কে', 'বলুন', 'বলো', 'আমাকে', 'আমার', 'কিভাবে', 'এবং', 'ও', 'রোগ',
+           'তথ্য', 'এর', 'দয়া', 'করে', 'গুলো', 'গুলি', 'কীভাবে', 'করা', 'করবেন', 'যায়', 'হবে', 'এটার', 'এটা',
+           'এটি'],
+}
+
+INTENT_KEYWORDS = {
+    'hi': {
+        'symptoms': ['लक्षण', 'संकेत'],
+        'prevention': ['बचाव', 'रोकथाम', 'बचें', 'बचने', 'रोकें'],
+        'causes': ['कारण', 'वजह', 'क्यों'],
+        'risk_factors': ['जोखिम', 'खतरा'],
+    },
+    'hinglish': {
+        'symptoms': ['lakshan', 'lakshana'],
+        'prevention': ['bachav', 'bachaav', 'rokthaam', 'roktham', 'bachne'],
+        'causes': ['karan', 'kaaran', 'wajah', 'vajah', 'kyu', 'kyun', 'kyon'],
+        'risk_factors': ['jokhim', 'khatra'],
+    },
+    'ta': {
+        'symptoms': ['அறிகுறிகள்', 'அறிகுறி', 'அறிகுறிகளை'],
+        'prevention': ['தடுப்பு', 'தடுப்பது', 'தடுக்க', 'தவிர்க்க'],
+        'causes': ['காரணம்', 'காரணங்கள்', 'ஏன்'],
+        'risk_factors': ['ஆபத்து', 'அபாயம்'],
+    },
+    'bn': {
+        'symptoms': ['লক্ষণ', 'উপসর্গ'],
+        'prevention': ['প্রতিরোধ', 'বাঁচার'],
+        'causes': ['কারণ', 'কেন'],
+        'risk_factors': ['ঝুঁকি'],
+    },
+}
+
+# alias -> disease name as stored in the diseases table
+DISEASE_ALIASES = {
+    'hi': {
+        'मलेरिया': 'Malaria',
+        'डेंगू': 'Dengue Fever',
+        'डेंगू बुखार': 'Dengue Fever',
+        'कोरोना': 'COVID-19',
+        'कोविड': 'COVID-19',
+        'कोविड-19': 'COVID-19',
+        'मधुमेह': 'Diabetes Type 2',
+        'डायबिटीज': 'Diabetes Type 2',
+        'शुगर': 'Diabetes Type 2',
+        'टीबी': 'Tuberculosis',
+        'तपेदिक': 'Tuberculosis',
+        'क्षय रोग': 'Tuberculosis',
+        'टाइफाइड': 'Typhoid Fever',
+        'मियादी बुखार': 'Typhoid Fever',
+        'हैजा': 'Cholera',
+        'खसरा': 'Measles',
+        'छोटी माता': 'Chickenpox',
+        'चिकनपॉक्स': 'Chickenpox',
+        'दमा': 'Asthma',
+        'अस्थमा': 'Asthma',
+        'उच्च रक्तचाप': 'Hypertension',
+        'हाई ब्लड प्रेशर': 'Hypertension',
+        'हाई बीपी': 'Hypertension',
+        'निमोनिया': 'Pneumonia',
+        'फ्लू': 'Influenza',
+        'इन्फ्लूएंजा': 'Influenza',
+        'पोलियो': 'Polio',
+        'रेबीज': 'Rabies',
+        'टिटनेस': 'Tetanus',
+        'गठिया': 'Rheumatoid Arthritis',
+        'गलसुआ': 'Mumps',
+        'काली खांसी': 'Whooping Cough',
+        'चिकनगुनिया': 'Chikungunya',
+        'दिल का दौरा': 'Heart Attack',
+        'लकवा': 'Stroke',
+        'एचआईवी': 'HIV/AIDS',
+        'एड्स': 'HIV/AIDS',
+        'खून की कमी': 'Anemia',
+        'एनीमिया': 'Anemia',
+        'पीला बुखार': 'Yellow Fever',
+        'दिमागी बुखार': 'Encephalitis',
+        'गुर्दे की पथरी': 'Kidney Stones',
+        'पित्त की पथरी': 'Gallstones',
+        'पेट का अल्सर': 'Peptic Ulcer',
+        'थायराइड': 'Hypothyroidism',
+        'डिप्थीरिया': 'Diphtheria',
+        'गलघोंटू': 'Diphtheria',
+    },
+    'hinglish': {
+        'madhumeh': 'Diabetes Type 2',
+        'sugar': 'Diabetes Type 2',
+        'tapedik': 'Tuberculosis',
+        'kshay rog': 'Tuberculosis',
+        'haija': 'Cholera',
+        'khasra': 'Measles',
+        'chhoti mata': 'Chickenpox',
+        'choti mata': 'Chickenpox',
+        'dama': 'Asthma',
+        'kali khansi': 'Whooping Cough',
+        'galsua': 'Mumps',
+        'gathiya': 'Rheumatoid Arthritis',
+        'dil ka daura': 'Heart Attack',
+        'lakwa': 'Stroke',
+        'lakva': 'Stroke',
+        'gurde ki pathri': 'Kidney Stones',
+        'pathri': 'Kidney Stones',
+        'khoon ki kami': 'Anemia',
+        'pila bukhar': 'Yellow Fever',
+        'dimagi bukhar': 'Encephalitis',
+        'miyadi bukhar': 'Typhoid Fever',
+        'ucch raktchap': 'Hypertension',
+    },
+    'ta': {
+        'மலேரியா': 'Malaria',
+        'டெங்கு': 'Dengue Fever',
+        'டெங்கு காய்ச்சல்': 'Dengue Fever',
+        'கொரோனா': 'COVID-19',
+        'கோவிட்': 'COVID-19',
+        'நீரிழிவு': 'Diabetes Type 2',
+        'சர்க்கரை நோய்': 'Diabetes Type 2',
+        'காசநோய்': 'Tuberculosis',
+        'டிபி': 'Tuberculosis',
+        'டைபாய்டு': 'Typhoid Fever',
+        'குடற்காய்ச்சல்': 'Typhoid Fever',
+        'காலரா': 'Cholera',
+        'தட்டம்மை': 'Measles',
+        'சின்னம்மை': 'Chickenpox',
+        'ஆஸ்துமா': 'Asthma',
+        'உயர் இரத்த அழுத்தம்': 'Hypertension',
+        'இரத்த அழுத்தம்': 'Hypertension',
+        'நிமோனியா': 'Pneumonia',
+        'இன்ஃப்ளூயன்ஸா': 'Influenza',
+        'போலியோ': 'Polio',
+        'வெறிநாய்க்கடி': 'Rabies',
+        'மாரடைப்பு': 'Heart Attack',
+        'பக்கவாதம்': 'Stroke',
+        'சிக்குன்குனியா': 'Chikungunya',
+        'கக்குவான் இருமல்': 'Whooping Cough',
+        'புட்டாளம்மை': 'Mumps',
+        'இரத்த சோகை': 'Anemia',
+        'சிறுநீரக கல்': 'Kidney Stones',
+        'எச்ஐவி': 'HIV/AIDS',
+        'எய்ட்ஸ்': 'HIV/AIDS',
+    },
+    'bn': {
+        'ম্যালেরিয়া': 'Malaria',
+        'ডেঙ্গু': 'Dengue Fever',
+        'ডেঙ্গি': 'Dengue Fever',
+        'ডেঙ্গু জ্বর': 'Dengue Fever',
+        'করোনা': 'COVID-19',
+        'কোভিড': 'COVID-19',
+        'ডায়াবেটিস': 'Diabetes Type 2',
+        'বহুমূত্র': 'Diabetes Type 2',
+        'যক্ষ্মা': 'Tuberculosis',
+        'টিবি': 'Tuberculosis',
+        'টাইফয়েড': 'Typhoid Fever',
+        'কলেরা': 'Cholera',
+        'হাম': 'Measles',
+        'জলবসন্ত': 'Chickenpox',
+        'চিকেন পক্স': 'Chickenpox',
+        'হাঁপানি': 'Asthma',
+        'অ্যাজমা': 'Asthma',
+        'উচ্চ রক্তচাপ': 'Hypertension',
+        'নিউমোনিয়া': 'Pneumonia',
+        'ইনফ্লুয়েঞ্জা': 'Influenza',
+        'ফ্লু': 'Influenza',
+        'পোলিও': 'Polio',
+        'জলাতঙ্ক': 'Rabies',
+        'ধনুষ্টংকার': 'Tetanus',
+        'হার্ট অ্যাটাক': 'Heart Attack',
+        'স্ট্রোক': 'Stroke',
+        'রক্তাল্পতা': 'Anemia',
+        'কিডনিতে পাথর': 'Kidney Stones',
+        'হুপিং কাশি': 'Whooping Cough',
+        'মাম্পস': 'Mumps',
+        'চিকুনগুনিয়া': 'Chikungunya',
+        'এইচআইভি': 'HIV/AIDS',
+        'এইডস': 'HIV/AIDS',
+        'পীতজ্বর': 'Yellow Fever',
+    },
+}
+
+# Case endings written onto a disease name ("மலேரியாவின்" = of malaria,
+# "ম্যালেরিয়ার" = malaria's); an alias followed by one still resolves
+ALIAS_SUFFIXES = {
+    'ta': ['வின்', 'யின்', 'இன்', 'வுக்கு', 'க்கு', 'வை', 'யை', 'ஐ', 'வால்', 'ால்'],
+    'bn': ['ের', 'র', 'এর', 'কে', 'তে', 'য়'],
+}
+
+EMERGENCY_PHRASES = {
+    'hi': ['सीने में दर्द', 'छाती में दर्द', 'दिल का दौरा', 'सांस नहीं', 'साँस नहीं',
+           'सांस लेने में तकलीफ', 'सांस लेने में दिक्कत', 'बेहोश', 'आत्महत्या', 'खुदकुशी',
+           'मरना चाहता', 'मरना चाहती', 'मिर्गी का दौरा', 'दौरा पड़ा', 'लकवा', 'बहुत खून',
+           'खून बह रहा', 'दम घुट', 'तेज सिरदर्द'],
+    'hinglish': ['seene mein dard', 'seene me dard', 'chhati mein dard', 'chati me dard',
+                 'dil ka daura', 'saans nahi', 'sans nahi', 'saans lene mein takleef',
+                 'saans lene me dikkat', 'behosh', 'atmahatya', 'khudkushi', 'marna chahta',
+                 'marna chahti', 'mirgi ka daura', 'daura pada', 'lakwa', 'bahut khoon',
+                 'khoon beh raha', 'dam ghut'],
+    'ta': ['நெஞ்சு வலி', 'நெஞ்சுவலி', 'மாரடைப்பு', 'மூச்சு விட முடியவில்லை', 'மூச்சுத் திணறல்',
+           'மயக்கம்', 'சுயநினைவு இல்லை', 'தற்கொலை', 'வலிப்பு', 'பக்கவாதம்', 'கடுமையான இரத்தப்போக்கு',
+           'சாக வேண்டும்'],
+    'bn': ['বুকে ব্যথা', 'বুক ব্যথা', 'হার্ট অ্যাটাক', 'শ্বাসকষ্ট', 'শ্বাস নিতে পারছি না',
+           'নিঃশ্বাস নিতে কষ্ট', 'অজ্ঞান', 'আত্মহত্যা', 'মরে যেতে চাই', 'খিঁচুনি', 'স্ট্রোক',
+           'পক্ষাঘাত', 'প্রচুর রক্তপাত'],
+}
+
+GREETINGS = {
+    'hi': ['नमस्ते', 'नमस्कार', 'प्रणाम'],
+    'hinglish': ['namaste', 'namaskar', 'pranam'],
+    'ta': ['வணக்கம்'],
+    'bn': ['নমস্কার', 'হ্যালো', 'আসসালামু আলাইকুম'],
+}
+
+HELP_COMMANDS = {
+    'hi': ['मदद', 'सहायता', 'सूची'],
+    'hinglish': ['madad', 'sahayata'],
+    'ta': ['உதவி', 'பட்டியல்'],
+    'bn': ['সাহায্য', 'তালিকা'],
+}
+
+# ASCII words that mark a message as Hinglish: its filler, intent and
+# emergency words (none of them is an English word)
+HINGLISH_WORDS = frozenset(
+    STOP_WORDS['hinglish']
+    + [word for words in INTENT_KEYWORDS['hinglish'].values() for word in words]
+    + [word for phrase in EMERGENCY_PHRASES['hinglish'] for word in phrase.split()]
+    + GREETINGS['hinglish'] + HELP_COMMANDS['hinglish']
+)
+
+
+def detect_language(text, tokens=()):
+    """Language code for normalized `text`: by script, or Hinglish by its words
+
+    Stops at the first character of a known script, so the cost is a few
+    comparisons for Indic text and one set intersection test for ASCII.
+    """
+    if text.isascii():
+        return 'en' if HINGLISH_WORDS.isdisjoint(tokens) else 'hinglish'
+    for ch in text:
+        code = ord(ch)
+        if code < 0x0900:
+            continue
+        for first, last, language in SCRIPT_RANGES:
+            if first <= code <= last:
+                return language
+    return 'en'
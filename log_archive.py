@@ -0,0 +1,201 @@
+"""Retention and archival for chat_logs and emergency_logs
+
+The log tables in database.db only hold recent ("hot") rows. Once every row
+of a calendar month is older than the retention period, the month is
+written to a compressed JSONL file in the archive directory and deleted from
+the database. That keeps the hot tables, and their timestamp indexes, at a
+size set by traffic per retention period instead of by total history.
+
+Archive files are named `<table>-<YYYY-MM>-<first id>-<last id>.jsonl.gz`
+(`.jsonl.zst` when the optional `zstandard` package is installed). The id
+range in the name makes a rerun after an interruption safe: rows already
+covered by a file are deleted rather than archived twice.
+
+The statistics rollups are not touched, so /api/stats totals and trends
+still include archived months.
+
+    python log_archive.py archive [--retention-days 90] [--dir archive]
+    python log_archive.py query chat_logs --since 2026-01 --until 2026-03 --contains fever
+"""
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+import db
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RETENTION_DAYS = int(os.environ.get('CHATBOT_LOG_RETENTION_DAYS', 90))
+ARCHIVE_DIR = os.environ.get('CHATBOT_ARCHIVE_DIR', 'archive')
+
+LOG_TABLES = ('chat_logs', 'emergency_logs')
+DELETE_CHUNK = 5000
+
+_ARCHIVE_NAME_RE = re.compile(r'^(\w+)-(\d{4}-\d{2})-(\d+)-(\d+)\.jsonl\.(gz|zst)$')
+
+
+def month_start(month):
+    """'2026-01' -> '2026-01-01 00:00:00', comparable with stored timestamps"""
+    return f'{month}-01 00:00:00'
+
+
+def next_month(month):
+    year, number = int(month[:4]), int(month[5:7])
+    return f'{year + number // 12:04d}-{number % 12 + 1:02d}'
+
+
+def expired_months(conn, table, retention_days, now=None):
+    """Months of `table` that lie entirely before the retention cutoff, oldest first"""
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+    row = conn.execute(f'SELECT MIN(timestamp) FROM {table}').fetchone()
+    if row[0] is None:
+        return []
+    months = []
+    month = row[0][:7]
+    while month_start(next_month(month)) <= cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def archive_files(archive_dir, table, month='*'):
+    """Archive files for a table (and month), in name order"""
+    pattern = os.path.join(archive_dir, f'{table}-{month}-*.jsonl.*')
+    return sorted(path for path in glob.glob(pattern) if _ARCHIVE_NAME_RE.match(os.path.basename(path)))
+
+
+def open_archive(path, mode='r'):
+    """Text-mode file object for a .jsonl.gz or .jsonl.zst archive"""
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f'{path} is zstd-compressed: pip install zstandard')
+        if 'w' in mode:
+            raw = zstandard.ZstdCompressor(level=10).stream_writer(open(path, 'wb'))
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+def _delete_rows(conn, table, where, params):
+    """Delete matching rows in short transactions so the log writer is not held up"""
+    deleted = 0
+    while True:
+        with conn:
+            cursor = conn.execute(
+                f'DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {where} LIMIT ?)',
+                (*params, DELETE_CHUNK)
+            )
+        if cursor.rowcount <= 0:
+            return deleted
+        deleted += cursor.rowcount
+
+
+def archive_month(conn, table, month, archive_dir):
+    """Move one month of `table` into an archive file; returns rows archived"""
+    bounds = (month_start(month), month_start(next_month(month)))
+    in_month = 'timestamp >= ? AND timestamp < ?'
+
+    # Rows a previous, interrupted run already archived
+    for path in archive_files(archive_dir, table, month):
+        first_id, last_id = _ARCHIVE_NAME_RE.match(os.path.basename(path)).group(3, 4)
+        _delete_rows(conn, table, f'{in_month} AND id BETWEEN ? AND ?', (*bounds, int(first_id), int(last_id)))
+
+    first = conn.execute(f'SELECT MIN(id), MAX(id) FROM {table} WHERE {in_month}', bounds).fetchone()
+    if first[0] is None:
+        return 0
+    first_id, last_id = first
+    extension = 'zst' if zstandard is not None else 'gz'
+    path = os.path.join(archive_dir, f'{table}-{month}-{first_id}-{last_id}.jsonl.{extension}')
+    temporary = path + '.tmp'
+
+    written = 0
+    with open_archive(temporary, 'w') as f:
+        rows = conn.execute(
+            f'SELECT * FROM {table} WHERE {in_month} AND id <= ? ORDER BY id', (*bounds, last_id)
+        )
+        for row in rows:
+            f.write(json.dumps(dict(row), ensure_ascii=False) + '\n')
+            written += 1
+    # Only a complete file gets its final name; the rows go after that
+    os.replace(temporary, path)
+    _delete_rows(conn, table, f'{in_month} AND id <= ?', (*bounds, last_id))
+    return written
+
+
+def archive(conn, retention_days=RETENTION_DAYS, archive_dir=ARCHIVE_DIR, now=None):
+    """Archive every expired month of both log tables; returns {(table, month): rows}"""
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = {}
+    for table in LOG_TABLES:
+        for month in expired_months(conn, table, retention_days, now):
+            rows = archive_month(conn, table, month, archive_dir)
+            if rows:
+                archived[table, month] = rows
+    return archived
+
+
+def query_archive(archive_dir, table, since=None, until=None, contains=None):
+    """Archived rows of `table`, oldest first, without touching the database
+
+    `since` and `until` are timestamp prefixes ('2026-01', '2026-01-15');
+    `until` is inclusive. `contains` filters on the message text.
+    """
+    field = 'user_message' if table == 'chat_logs' else 'message'
+    needle = contains.lower() if contains else None
+    for path in archive_files(archive_dir, table):
+        month = _ARCHIVE_NAME_RE.match(os.path.basename(path)).group(2)
+        if (since and month < since[:7]) or (until and month > until[:7]):
+            continue
+        with open_archive(path) as f:
+            for line in f:
+                row = json.loads(line)
+                timestamp = row['timestamp']
+                if since and timestamp < since:
+                    continue
+                if until and timestamp[:len(until)] > until:
+                    continue
+                if needle and needle not in row[field].lower():
+                    continue
+                yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('archive', help='Move months past retention into archive files')
+    run.add_argument('--retention-days', type=int, default=RETENTION_DAYS)
+    run.add_argument('--dir', default=ARCHIVE_DIR)
+    query = commands.add_parser('query', help='Print archived rows as JSON lines')
+    query.add_argument('table', choices=LOG_TABLES)
+    query.add_argument('--dir', default=ARCHIVE_DIR)
+    query.add_argument('--since')
+    query.add_argument('--until')
+    query.add_argument('--contains')
+    args = parser.parse_args()
+
+    if args.command == 'query':
+        for row in query_archive(args.dir, args.table, args.since, args.until, args.contains):
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return
+
+    conn = db.connect()
+    archived = archive(conn, args.retention_days, args.dir)
+    conn.close()
+    for (table, month), rows in sorted(archived.items()):
+        print(f'📦 {table} {month}: {rows} rows archived')
+    print(f'✅ Logs older than {args.retention_days} days are archived in {args.dir}/')
+
+
+if __name__ == '__main__':
+    main()
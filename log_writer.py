@@ -0,0 +1,319 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import analytics
+import db
+import metrics
+
+OVERFLOW_POLICIES = ('block', 'drop', 'spill')
+
+logger = logging.getLogger(__name__)
+
+INSERT_CHAT = 'INSERT INTO chat_logs (user_message, bot_response, timestamp, disease) VALUES (?, ?, ?, ?)'
+INSERT_EMERGENCY = 'INSERT INTO emergency_logs (message, timestamp) VALUES (?, ?)'
+
+
+def utc_timestamp():
+    """Current time in the format SQLite uses for CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class LogWriter:
+    """Background writer that group-commits chat and emergency log rows
+
+    Rows are queued by the request thread and written by a single writer
+    thread, one transaction per batch. A batch is flushed when `batch_size`
+    chat rows are pending or the oldest pending row is `flush_interval`
+    seconds old. Emergency rows skip the wait and are flushed right away.
+
+    When the chat queue holds `max_queue` rows, `overflow` decides what
+    happens to a new row: 'block' waits for space, 'drop' discards it and
+    'spill' appends it to `spill_path`, which is replayed on the next start.
+    Emergency rows are never dropped or spilled.
+
+    A batch that cannot be written (database locked, schema missing) is
+    spilled too, and the spill file is replayed after the next batch that
+    commits. Listener errors are logged and do not stop the writer, and a
+    writer thread found dead when a row is queued is started again.
+    """
+
+    def __init__(self, db_path=None, max_queue=10000, batch_size=200,
+                 flush_interval=0.5, overflow='block', spill_path='log_spill.jsonl'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}')
+        self.db_path = db_path or db.DATABASE_PATH
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+
+        self._chats = deque()
+        self._emergencies = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._writing = False
+        self._atexit_registered = False
+        # Held while a batch commits and its listeners run, so a reader that
+        # takes it sees the database and the listeners in the same state
+        self.commit_lock = threading.Lock()
+        self._listeners = []
+        # Set when a failed batch was spilled, so the next good one replays it
+        self._replay_pending = False
+
+        self.counters = {
+            'chat_rows_written': 0,
+            'emergency_rows_written': 0,
+            'rows_dropped': 0,
+            'rows_spilled': 0,
+            'rows_replayed': 0,
+            'batches': 0,
+            'flush_errors': 0,
+            'listener_errors': 0,
+            'writer_restarts': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    # Producer side
+
+    def submit_chat(self, user_message, bot_response, disease=None):
+        """Queue a chat_logs row; `disease` is the name the bot matched, if any"""
+        row = (user_message, bot_response, utc_timestamp(), disease)
+        self._ensure_started()
+        with self._cond:
+            if len(self._chats) >= self.max_queue:
+                if self.overflow == 'drop':
+                    self.counters['rows_dropped'] += 1
+                    return False
+                if self.overflow == 'spill':
+                    self._spill('chat', row)
+                    return False
+                while len(self._chats) >= self.max_queue and not self._stopping:
+                    self._cond.wait()
+            self._chats.append(row)
+            # Wake the writer to start the flush timer or flush a full batch
+            if len(self._chats) == 1 or len(self._chats) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def submit_emergency(self, message):
+        """Queue an emergency_logs row and wake the writer immediately"""
+        row = (message, utc_timestamp())
+        self._ensure_started()
+        with self._cond:
+            self._emergencies.append(row)
+            self._cond.notify_all()
+        return True
+
+    def add_listener(self, callback):
+        """Call `callback(chats, emergencies)` after every committed batch"""
+        self._listeners.append(callback)
+
+    def write_now(self, chats, emergencies):
+        """Write rows synchronously in one transaction, bypassing the queue
+
+        Used for bulk requests, where the caller already has a large batch.
+        """
+        if not chats and not emergencies:
+            return
+        with db.connection(self.db_path) as conn:
+            analytics.ensure_schema(conn, self.db_path)
+            self._write_batch(conn, chats, emergencies)
+
+    def _spill(self, kind, row):
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'kind': kind, 'row': row}, ensure_ascii=False) + '\n')
+        self.counters['rows_spilled'] += 1
+
+    # Lifecycle
+
+    def _ensure_started(self):
+        thread = self._thread
+        if thread is None or not (thread.is_alive() or self._stopping):
+            with self._cond:
+                thread = self._thread
+                if thread is None:
+                    self.start()
+                elif not (thread.is_alive() or self._stopping):
+                    self.counters['writer_restarts'] += 1
+                    logger.error('Log writer thread died; starting a new one')
+                    self.start()
+
+    def start(self):
+        """Start the writer thread, replaying rows spilled by a previous run"""
+        self._stopping = False
+        self._replay_spill()
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def stop(self, timeout=10):
+        """Flush everything still queued and stop the writer thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        self._thread = None
+
+    def flush(self, timeout=10):
+        """Block until every row queued so far has been written"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while (self._chats or self._emergencies or self._writing) and time.monotonic() < deadline:
+                self._cond.wait(0.05)
+
+    def _replay_spill(self):
+        """Queue the spilled rows ahead of everything else and remove the file"""
+        with self._cond:
+            self._replay_pending = False
+            if not os.path.exists(self.spill_path):
+                return
+            chats, emergencies = [], []
+            with open(self.spill_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry['kind'] == 'emergency':
+                            emergencies.append(tuple(entry['row']))
+                        else:
+                            # Rows spilled before chat_logs.disease existed have no disease
+                            chats.append((tuple(entry['row']) + (None,))[:4])
+            self._chats.extendleft(reversed(chats))
+            self._emergencies.extendleft(reversed(emergencies))
+            os.remove(self.spill_path)
+            self.counters['rows_replayed'] += len(chats) + len(emergencies)
+            self._cond.notify_all()
+
+    # Writer side
+
+    def _take_batch(self):
+        """Wait for a batch to be due, then pop it off the queues"""
+        with self._cond:
+            oldest = None
+            while True:
+                if self._emergencies or self._stopping or len(self._chats) >= self.batch_size:
+                    break
+                if self._chats:
+                    oldest = oldest or time.monotonic()
+                    remaining = self.flush_interval - (time.monotonic() - oldest)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    oldest = None
+                    self._cond.wait()
+            emergencies = list(self._emergencies)
+            self._emergencies.clear()
+            chats = [self._chats.popleft() for _ in range(min(self.batch_size, len(self._chats)))]
+            self._writing = bool(emergencies or chats)
+            # Producers blocked on a full queue can continue
+            self._cond.notify_all()
+            return chats, emergencies
+
+    def _run(self):
+        # The writer thread keeps one dedicated connection, opened for the
+        # first batch and again after a failed open
+        conn = None
+        try:
+            while True:
+                chats, emergencies = self._take_batch()
+                if chats or emergencies:
+                    if conn is None:
+                        conn = self._connect()
+                    if conn is None:
+                        self._spill_batch(chats, emergencies)
+                    else:
+                        self._write_batch(conn, chats, emergencies)
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+                    if self._stopping and not self._chats and not self._emergencies:
+                        break
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _connect(self):
+        """The writer's connection with the rollup schema in place, or None if that fails"""
+        conn = None
+        try:
+            conn = db.connect(self.db_path)
+            analytics.ensure_schema(conn, self.db_path)
+            return conn
+        except sqlite3.Error:
+            logger.exception('Log writer cannot open %s', self.db_path)
+            if conn is not None:
+                conn.close()
+            return None
+
+    def _spill_batch(self, chats, emergencies):
+        """Keep the rows of a failed batch; the next batch that commits replays them"""
+        with self._cond:
+            self.counters['flush_errors'] += 1
+            for row in emergencies:
+                self._spill('emergency', row)
+            for row in chats:
+                self._spill('chat', row)
+            self._replay_pending = True
+
+    def _write_batch(self, conn, chats, emergencies):
+        start = time.perf_counter()
+        with self.commit_lock:
+            try:
+                with conn:
+                    # Emergency rows go first so they are never behind chat rows
+                    if emergencies:
+                        conn.executemany(INSERT_EMERGENCY, emergencies)
+                    if chats:
+                        conn.executemany(INSERT_CHAT, chats)
+                    analytics.record_batch(conn, chats, emergencies)
+            except Exception:
+                logger.exception('Log writer could not write %d rows; spilling them', len(chats) + len(emergencies))
+                self._spill_batch(chats, emergencies)
+                return
+            for listener in self._listeners:
+                try:
+                    listener(chats, emergencies)
+                except Exception:
+                    with self._cond:
+                        self.counters['listener_errors'] += 1
+                    logger.exception('Log writer listener %r failed', listener)
+        if self._replay_pending:
+            self._replay_spill()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.LOG_FLUSH_SECONDS.observe(elapsed_ms / 1000)
+        # write_now() runs this on request threads too: counters change under _cond
+        with self._cond:
+            counters = self.counters
+            counters['chat_rows_written'] += len(chats)
+            counters['emergency_rows_written'] += len(emergencies)
+            counters['batches'] += 1
+            counters['last_flush_ms'] = elapsed_ms
+            counters['max_flush_ms'] = max(counters['max_flush_ms'], elapsed_ms)
+            counters['total_flush_ms'] += elapsed_ms
+
+    def stats(self):
+        """Queue depth and flush latency counters"""
+        with self._cond:
+            stats = dict(self.counters)
+            stats['chat_queue_depth'] = len(self._chats)
+            stats['emergency_queue_depth'] = len(self._emergencies)
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['batches'] if stats['batches'] else 0.0
+        stats['overflow'] = self.overflow
+        return stats
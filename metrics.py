@@ -0,0 +1,174 @@
+"""In-process metrics exposed in the Prometheus text format
+
+Counters and histograms are plain Python objects updated on the request
+path; a histogram observation is one bisect and two additions under a lock.
+Gauges are read from callbacks only when /metrics is scraped. Set
+CHATBOT_METRICS=0 to turn every update into an early return.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+enabled = os.environ.get('CHATBOT_METRICS', '1') != '0'
+
+# Seconds; chat stages run from microseconds up to a few milliseconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def set_enabled(value):
+    global enabled
+    enabled = bool(value)
+
+
+def clock():
+    """Start time for a measurement, or 0.0 when metrics are off"""
+    return time.perf_counter() if enabled else 0.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, self.labelnames, labels, value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def observe_since(self, start, *labels):
+        """Observe the time elapsed since `start` (from clock())"""
+        if enabled and start:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        names = self.labelnames + ('le',)
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket', names, labels + (le,), cumulative
+            yield f'{self.name}_sum', self.labelnames, labels, values[-1]
+            yield f'{self.name}_count', self.labelnames, labels, cumulative
+
+
+class Gauge:
+    """Value read from `read()` at scrape time; `read` returns a number or {labels: number}
+
+    Pass kind='counter' for totals that some other object already keeps.
+    """
+
+    def __init__(self, name, documentation, read, labelnames=(), kind='gauge'):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def samples(self):
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            yield self.name, self.labelnames, labels, value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labelnames, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labelnames, labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+CHAT_STAGE_SECONDS = registry.histogram(
+    'chatbot_chat_stage_seconds', 'Time spent in each stage of answering a chat message', ('stage',))
+CHAT_REQUEST_SECONDS = registry.histogram(
+    'chatbot_chat_request_seconds', 'Time to answer and log one /api/chat message')
+CHAT_RESPONSES = registry.counter(
+    'chatbot_chat_responses_total', 'Chat responses by response type', ('type',))
+CHAT_LANGUAGES = registry.counter(
+    'chatbot_chat_messages_by_language_total', 'Chat messages by detected language', ('language',))
+DB_QUERY_SECONDS = registry.histogram(
+    'chatbot_db_query_seconds', 'Database work on the request path, by query', ('query',))
+DB_CONNECTION_SECONDS = registry.histogram(
+    'chatbot_db_connection_hold_seconds', 'How long a pooled connection is borrowed')
+LOG_FLUSH_SECONDS = registry.histogram(
+    'chatbot_log_flush_seconds', 'Log writer batch commit time')
@@ -0,0 +1,38 @@
+import json
+
+
+def encode_json(obj):
+    """UTF-8 JSON body as jsonify() would send it, but without escaping non-ASCII text"""
+    return (json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class Payload:
+    """A chat response and its JSON bodies, encoded once and then reused
+
+    `response` is shared by every request answered with this payload and
+    must not be changed; callers that need a dict of their own copy it.
+    body() is the full JSON body; body(compact=True) leaves out the
+    `disease` projection, as compact clients ask for. Each body is encoded
+    on first use and kept, so a cached payload is sent without any
+    formatting or serialization work.
+    """
+
+    __slots__ = ('response', '_body', '_compact_body')
+
+    def __init__(self, response):
+        self.response = response
+        self._body = None
+        self._compact_body = None
+
+    @property
+    def type(self):
+        return self.response['type']
+
+    def body(self, compact=False):
+        if compact and 'disease' in self.response:
+            if self._compact_body is None:
+                self._compact_body = encode_json({k: v for k, v in self.response.items() if k != 'disease'})
+            return self._compact_body
+        if self._body is None:
+            self._body = encode_json(self.response)
+        return self._body
@@ -0,0 +1,155 @@
+"""Single-pass tokenizer and normalizer for chat messages
+
+parse_query() folds case (Unicode casefold after NFKC, so full-width and
+compatibility characters compare equal), splits the message into word
+tokens in one pass and sorts every token into one of three buckets:
+intent keywords ("symptoms", "prevent", ...), filler words, or disease
+candidate terms. Stop words are only ever removed as whole tokens, so
+"malaria" and "measles" come through intact.
+
+The message's language (see languages.detect_language) picks the word
+table: English words plus that language's filler and intent words. For
+Tamil and Bengali, a disease alias with a case ending attached
+("மலேரியாவின்") is reduced to the alias itself.
+
+Everything here is built once at import time.
+"""
+import re
+import string
+import unicodedata
+from collections import namedtuple
+
+import languages
+
+# Fields a user can ask about, in the order they are rendered
+INTENTS = ('symptoms', 'prevention', 'causes', 'risk_factors')
+
+INTENT_KEYWORDS = {
+    'symptoms': ('symptom', 'symptoms', 'sign', 'signs', 'indication', 'indications'),
+    'prevention': ('prevent', 'prevention', 'preventing', 'prevented', 'avoid', 'avoiding',
+                   'protect', 'protection', 'precaution', 'precautions'),
+    'causes': ('cause', 'causes', 'caused', 'causing', 'reason', 'reasons', 'why'),
+    'risk_factors': ('risk', 'risks', 'susceptible', 'vulnerable'),
+}
+
+# Filler around a disease name; matched as whole tokens only
+STOP_WORDS = frozenset([
+    'what', 'whats', "what's", 'is', 'are', 'was', 'tell', 'me', 'about', 'information', 'info',
+    'on', 'explain', 'describe', 'details', 'detail', 'of', 'the', 'a', 'an', 'for', 'give',
+    'show', 'please', 'pls', 'can', 'could', 'you', 'i', 'do', 'does', 'how', 'to', 'know',
+    'want', 'need', 'some', 'and', 'with', 'from', 'get', 'its', "it's", 'it', 'my', 'in',
+    'factor', 'factors', 'main', 'common', 'usual', 'typical', 'list',
+    'dangerous', 'serious', 'contagious', 'deadly', 'happen', 'happens',
+    'this', 'that', 'these', 'those', 'he', 'she', 'we', 'they', 'them', 'his', 'her', 'our',
+    'your', 'their', 'am', 'be', 'were', 'has', 'have', 'had',
+])
+
+# token -> intent name, or '' for a stop word; one lookup per token
+_WORD_CLASS = dict.fromkeys(STOP_WORDS, '')
+_WORD_CLASS.update((word, intent) for intent, words in INTENT_KEYWORDS.items() for word in words)
+
+# Word characters plus combining marks (Latin accents, Indic vowel signs);
+# hyphens, apostrophes, slashes and dots inside a word keep it whole, so
+# "covid-19", "crohn's" and "hiv/aids" stay single tokens
+_WORD = r'[\w\u0300-\u036f\u0900-\u0963\u0966-\u0dff]'
+_TOKEN_RE = re.compile(rf"{_WORD}+(?:[-'/.]{_WORD}+)*")
+
+# Stripped from both ends of a whitespace-separated word
+_EDGE_PUNCTUATION = string.punctuation + '\u00bf\u00a1\u201c\u201d\u00ab\u00bb\u2026\u0964\u0965'
+
+# Typographic apostrophes and dashes users paste in; replaced one by one
+# only when present, which is faster than str.translate on Indic text
+_PUNCTUATION = (('\u2019', "'"), ('\u2018', "'"), ('\u2010', '-'), ('\u2011', '-'), ('\u2013', '-'))
+
+
+class ParsedQuery(namedtuple('ParsedQuery', ['text', 'tokens', 'terms', 'intents', 'language'])):
+    """`text` is the folded message, `terms` the disease candidate tokens,
+    `intents` the requested fields, in INTENTS order, and `language` the
+    code from languages.detect_language"""
+    __slots__ = ()
+
+    @property
+    def disease_query(self):
+        return ' '.join(self.terms)
+
+
+def normalize(text):
+    """NFKC, Unicode case folding and typographic punctuation folded to ASCII"""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+        for typographic, ascii_char in _PUNCTUATION:
+            if typographic in text:
+                text = text.replace(typographic, ascii_char)
+    return text.casefold().strip()
+
+
+def tokenize(text):
+    """Word tokens of already normalized text
+
+    Splitting on whitespace and trimming edge punctuation covers almost
+    every word without running the regex. isidentifier() also accepts
+    letters followed by combining marks, so Hindi, Tamil and Bengali words
+    skip it too; only words with punctuation inside ("covid-19",
+    "fever,cough") go through it.
+    """
+    tokens = []
+    for word in text.split():
+        word = word.strip(_EDGE_PUNCTUATION)
+        if word.isalnum() or word.isidentifier():
+            tokens.append(word)
+        elif word:
+            tokens.extend(_TOKEN_RE.findall(word))
+    return tokens
+
+
+def _classify(tokens, word_class, lemmas=None):
+    terms = []
+    found = set()
+    for token in tokens:
+        kind = word_class.get(token)
+        if kind is None and lemmas:
+            token = lemmas.get(token, token)
+            kind = word_class.get(token)
+        if kind is None:
+            terms.append(token)
+        elif kind:
+            found.add(kind)
+    return terms, found
+
+
+def _language_tables():
+    """Word class and lemma tables for every language in languages.py"""
+    word_classes = {'en': _WORD_CLASS}
+    lemmas = {}
+    for language, stop_words in languages.STOP_WORDS.items():
+        word_class = dict(_WORD_CLASS)
+        word_class.update(dict.fromkeys((normalize(word) for word in stop_words), ''))
+        word_class.update((normalize(word), intent)
+                          for intent, words in languages.INTENT_KEYWORDS[language].items() for word in words)
+        word_classes[language] = word_class
+    for language, suffixes in languages.ALIAS_SUFFIXES.items():
+        table = lemmas[language] = {}
+        for alias in languages.DISEASE_ALIASES[language]:
+            last = tokenize(normalize(alias))[-1]
+            for suffix in suffixes:
+                table.setdefault(normalize(last + suffix), last)
+    return word_classes, lemmas
+
+
+_WORD_CLASSES, _LEMMAS = _language_tables()
+
+
+def alias_key(alias, language='en'):
+    """Catalog key for a disease alias: the terms parse_query() leaves of it"""
+    terms, _ = _classify(tokenize(normalize(alias)), _WORD_CLASSES[language])
+    return ' '.join(terms)
+
+
+def parse_query(message):
+    """Tokenize `message` once into disease terms and intents"""
+    text = normalize(message)
+    tokens = tokenize(text)
+    language = languages.detect_language(text, tokens)
+    terms, found = _classify(tokens, _WORD_CLASSES[language], _LEMMAS.get(language))
+    intents = tuple(intent for intent in INTENTS if intent in found) if found else ()
+    return ParsedQuery(text, tokens, terms, intents, language)
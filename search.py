@@ -0,0 +1,135 @@
+"""Full-text symptom search over the diseases table (SQLite FTS5)
+
+`diseases_fts` is an external-content FTS5 index over the text columns of
+`diseases`; triggers keep it in sync on every insert, update and delete.
+Results are ranked with BM25, weighting the symptoms column highest.
+"""
+import re
+import threading
+
+import db
+
+FTS_SCHEMA = (
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS diseases_fts USING fts5(
+        name, symptoms, causes, risk_factors, info,
+        content='diseases', content_rowid='id',
+        tokenize='porter unicode61'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS diseases_fts_insert AFTER INSERT ON diseases BEGIN
+        INSERT INTO diseases_fts (rowid, name, symptoms, causes, risk_factors, info)
+        VALUES (new.id, new.name, new.symptoms, new.causes, new.risk_factors, new.info);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS diseases_fts_delete AFTER DELETE ON diseases BEGIN
+        INSERT INTO diseases_fts (diseases_fts, rowid, name, symptoms, causes, risk_factors, info)
+        VALUES ('delete', old.id, old.name, old.symptoms, old.causes, old.risk_factors, old.info);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS diseases_fts_update AFTER UPDATE ON diseases BEGIN
+        INSERT INTO diseases_fts (diseases_fts, rowid, name, symptoms, causes, risk_factors, info)
+        VALUES ('delete', old.id, old.name, old.symptoms, old.causes, old.risk_factors, old.info);
+        INSERT INTO diseases_fts (rowid, name, symptoms, causes, risk_factors, info)
+        VALUES (new.id, new.name, new.symptoms, new.causes, new.risk_factors, new.info);
+    END''',
+)
+
+FTS_TRIGGERS = ('diseases_fts_insert', 'diseases_fts_delete', 'diseases_fts_update')
+
+# Column weights for bm25(): name, symptoms, causes, risk_factors, info
+RANK = 'bm25(diseases_fts, 2.0, 10.0, 1.0, 1.0, 0.5)'
+
+SEARCH_SQL = f'''
+    SELECT d.id, d.name, d.symptoms, {RANK} AS score,
+           snippet(diseases_fts, 1, '**', '**', '…', 12) AS snippet
+    FROM diseases_fts
+    JOIN diseases d ON d.id = diseases_fts.rowid
+    WHERE diseases_fts MATCH ?
+    ORDER BY score
+    LIMIT ? OFFSET ?
+'''
+
+COUNT_SQL = 'SELECT COUNT(*) FROM diseases_fts WHERE diseases_fts MATCH ?'
+
+EXISTS_SQL = 'SELECT 1 FROM diseases_fts WHERE diseases_fts MATCH ? LIMIT 1'
+
+# Words that describe the user rather than a symptom
+SYMPTOM_STOP_WORDS = frozenset([
+    'i', 'im', 'am', 'have', 'has', 'had', 'having', 'and', 'or', 'with', 'my', 'me',
+    'feel', 'feeling', 'felt', 'got', 'getting', 'some', 'since', 'also', 'a', 'an',
+    'the', 'of', 'in', 'on', 'for', 'from', 'like', 'is', 'are', 'was', 'very', 'bit',
+    'really', 'what', 'which', 'disease', 'could', 'be', 'it', 'this', 'do', 'suffering',
+    'that', 'these', 'those', 'he', 'she', 'we', 'they', 'them', 'his', 'her', 'our', 'your',
+    'their', 'were', 'about',
+])
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_ready_paths = set()
+_ready_lock = threading.Lock()
+
+
+def create_fts(conn, rebuild=False, commit=True):
+    """Create the FTS index and sync triggers; rebuild it from diseases if asked"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'diseases_fts'"
+    ).fetchone()
+    for statement in FTS_SCHEMA:
+        conn.execute(statement)
+    if rebuild or not exists:
+        conn.execute("INSERT INTO diseases_fts (diseases_fts) VALUES ('rebuild')")
+    if commit:
+        conn.commit()
+
+
+def drop_fts_triggers(conn):
+    """Stop syncing the FTS index row by row, before a bulk load; create_fts(rebuild=True) restores it"""
+    for trigger in FTS_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+
+def ensure_fts(conn, path=None):
+    """Run create_fts once per database file and process"""
+    path = path or db.DATABASE_PATH
+    if path in _ready_paths:
+        return
+    with _ready_lock:
+        create_fts(conn)
+        _ready_paths.add(path)
+
+
+def symptom_terms(text):
+    """Symptom words from free text, in order and without duplicates"""
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in SYMPTOM_STOP_WORDS and len(w) > 2]
+    return list(dict.fromkeys(words))
+
+
+def unlisted_symptom_terms(conn, text):
+    """Terms of `text` that no disease lists among its symptoms ("bird" in "bird flu")"""
+    ensure_fts(conn)
+    return [term for term in symptom_terms(text)
+            if conn.execute(EXISTS_SQL, (build_match_query([term], column='symptoms'),)).fetchone() is None]
+
+
+def build_match_query(terms, mode='any', column=None):
+    """FTS5 query matching any (or all) terms; BM25 ranks rows matching more terms higher"""
+    operator = ' AND ' if mode == 'all' else ' OR '
+    query = operator.join(f'"{term}"' for term in terms)
+    return f'{column} : ({query})' if column else query
+
+
+def search_symptoms(conn, text, limit=10, offset=0, mode='any', column=None):
+    """Diseases ranked by how well their text matches `text`; returns (rows, total)
+
+    mode='all' only matches diseases mentioning every term. It touches far
+    fewer index entries than 'any' when the text contains common words.
+    With `column` (e.g. 'symptoms'), terms only match in that column.
+    """
+    terms = symptom_terms(text)
+    if not terms:
+        return [], 0
+    ensure_fts(conn)
+    match = build_match_query(terms, mode, column)
+    rows = [dict(row) for row in conn.execute(SEARCH_SQL, (match, limit, offset))]
+    for row in rows:
+        # bm25() is lower-is-better; report a positive relevance score
+        row['score'] = round(-row['score'], 4)
+    total = conn.execute(COUNT_SQL, (match,)).fetchone()[0]
+    return rows, total
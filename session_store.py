@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from query_parser import INTENTS
+
+# Client-chosen session ids (chat.js sends a random UUID); anything else is
+# treated as "no session"
+SESSION_ID_RE = re.compile(r'[A-Za-z0-9_-]{8,64}')
+
+# Every subset of INTENTS as a bitmask (bit i = INTENTS[i]) and back, so a
+# session holds one small int and decoding it is a list lookup
+_INTENT_BITS = {intent: 1 << i for i, intent in enumerate(INTENTS)}
+_INTENT_TUPLES = [tuple(intent for intent in INTENTS if mask & _INTENT_BITS[intent])
+                  for mask in range(1 << len(INTENTS))]
+
+
+def intent_mask(intents):
+    mask = 0
+    for intent in intents:
+        mask |= _INTENT_BITS[intent]
+    return mask
+
+
+class SessionState:
+    """Last disease a session asked about and which of its fields were shown"""
+    __slots__ = ('disease_id', 'intent_mask', 'expires_at')
+
+    def __init__(self, disease_id, intent_mask, expires_at):
+        self.disease_id = disease_id
+        self.intent_mask = intent_mask
+        self.expires_at = expires_at
+
+    @property
+    def intents(self):
+        return _INTENT_TUPLES[self.intent_mask]
+
+    @intents.setter
+    def intents(self, intents):
+        self.intent_mask = intent_mask(intents)
+
+
+class SessionStore:
+    """Bounded LRU of per-session conversation state with a time-to-live
+
+    Entries are kept in last-used order, and every entry gets the same TTL
+    from its last use. The expired ones are therefore always at the front
+    and are dropped there in O(1) on each write. Past `max_sessions` the
+    least recently used session is evicted. Memory stays bounded by
+    `max_sessions` however many clients connect.
+
+    Disease ids are interned through the store, so 100k sessions on the
+    same disease share one int object.
+    """
+
+    def __init__(self, max_sessions=100000, ttl=1800.0, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._disease_ids = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """SessionState for `session_id`, or None if unknown or expired"""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                self.counters['misses'] += 1
+                return None
+            now = self._clock()
+            if state.expires_at < now:
+                del self._sessions[session_id]
+                self.counters['expirations'] += 1
+                self.counters['misses'] += 1
+                return None
+            state.expires_at = now + self.ttl
+            self._sessions.move_to_end(session_id)
+            self.counters['hits'] += 1
+            return state
+
+    def put(self, session_id, disease_id, intents):
+        """Remember that `session_id` was just shown `intents` of `disease_id`"""
+        if self.max_sessions <= 0:
+            return
+        with self._lock:
+            now = self._clock()
+            disease_id = self._disease_ids.setdefault(disease_id, disease_id)
+            state = self._sessions.get(session_id)
+            if state is None:
+                self._sessions[session_id] = SessionState(disease_id, intent_mask(intents), now + self.ttl)
+            else:
+                state.disease_id = disease_id
+                state.intent_mask = intent_mask(intents)
+                state.expires_at = now + self.ttl
+                self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def _evict(self, now):
+        sessions = self._sessions
+        while sessions:
+            oldest = next(iter(sessions.values()))
+            if oldest.expires_at >= now:
+                break
+            sessions.popitem(last=False)
+            self.counters['expirations'] += 1
+        while len(sessions) > self.max_sessions:
+            sessions.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._disease_ids.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['size'] = len(self._sessions)
+        stats['max_sessions'] = self.max_sessions
+        stats['ttl_seconds'] = self.ttl
+        return stats
+
+
+def valid_session_id(value):
+    """`value` if it is a usable session id, else None"""
+    if isinstance(value, str) and SESSION_ID_RE.fullmatch(value):
+        return value
+    return None
@@ -0,0 +1,151 @@
+"""Live dashboard statistics shared by every open dashboard
+
+StatsFeed keeps the dashboard numbers in memory. It is seeded from the
+database once, then updated by the log writer after each committed batch,
+so any number of connected dashboards costs no extra queries. Every update
+is kept as a numbered delta in a short history; subscribers wait on one
+condition variable and read the deltas they have not seen yet.
+"""
+import heapq
+import threading
+from collections import deque
+
+import analytics
+import db
+
+RECENT_ROWS = 10
+TOP_DISEASES = 5
+
+
+def chat_row(row):
+    user_message, bot_response, timestamp, disease = row
+    return {'user_message': user_message, 'bot_response': bot_response,
+            'timestamp': timestamp, 'disease': disease}
+
+
+def emergency_row(row):
+    message, timestamp = row
+    return {'message': message, 'timestamp': timestamp}
+
+
+class StatsFeed:
+    """In-memory dashboard statistics with a history of numbered deltas"""
+
+    def __init__(self, history=256):
+        self.seq = 0
+        self.total_chats = 0
+        self.total_emergencies = 0
+        self.recent_chats = deque(maxlen=RECENT_ROWS)
+        self.emergency_logs = deque(maxlen=RECENT_ROWS)
+        self.mentions = {}
+        self.top_diseases = []
+        self.subscribers = 0
+        self._seeded = False
+        self._deltas = deque(maxlen=history)
+        self._cond = threading.Condition()
+
+    def ensure_seeded(self, log_writer):
+        """Load the current numbers from the database on first use
+
+        Runs under the log writer's commit lock, so no batch can be both
+        read here and published afterwards.
+        """
+        if self._seeded:
+            return
+        with log_writer.commit_lock:
+            if self._seeded:
+                return
+            with db.connection(log_writer.db_path) as conn:
+                analytics.ensure_schema(conn, log_writer.db_path)
+                self._seed(conn)
+
+    def _seed(self, conn):
+        chats = conn.execute(
+            'SELECT user_message, bot_response, timestamp, disease FROM chat_logs '
+            'ORDER BY timestamp DESC, id DESC LIMIT ?', (RECENT_ROWS,)
+        ).fetchall()
+        emergencies = conn.execute(
+            'SELECT message, timestamp FROM emergency_logs ORDER BY timestamp DESC, id DESC LIMIT ?',
+            (RECENT_ROWS,)
+        ).fetchall()
+        mentions = conn.execute('SELECT disease, mentions FROM disease_mentions').fetchall()
+        with self._cond:
+            self.total_chats = analytics.get_counter(conn, 'total_chats')
+            self.total_emergencies = analytics.get_counter(conn, 'total_emergencies')
+            self.recent_chats.extend(chat_row(tuple(row)) for row in chats)
+            self.emergency_logs.extend(emergency_row(tuple(row)) for row in emergencies)
+            self.mentions = {row['disease']: row['mentions'] for row in mentions}
+            self.top_diseases = self._top()
+            self._seeded = True
+
+    def _top(self):
+        top = heapq.nlargest(TOP_DISEASES, self.mentions.items(), key=lambda item: item[1])
+        return [[disease, count] for disease, count in top]
+
+    def publish(self, chats, emergencies):
+        """Log writer listener: fold in a committed batch and wake subscribers"""
+        if not self._seeded:
+            # Nobody is watching yet; the seed query will include these rows
+            return
+        new_chats = [chat_row(row) for row in chats[-RECENT_ROWS:]][::-1]
+        new_emergencies = [emergency_row(row) for row in emergencies[-RECENT_ROWS:]][::-1]
+        with self._cond:
+            self.total_chats += len(chats)
+            self.total_emergencies += len(emergencies)
+            self.recent_chats.extendleft(reversed(new_chats))
+            self.emergency_logs.extendleft(reversed(new_emergencies))
+            mentioned = False
+            for row in chats:
+                if row[3]:
+                    self.mentions[row[3]] = self.mentions.get(row[3], 0) + 1
+                    mentioned = True
+            if mentioned:
+                self.top_diseases = self._top()
+            self.seq += 1
+            self._deltas.append({
+                'seq': self.seq,
+                'total_chats': self.total_chats,
+                'total_emergencies': self.total_emergencies,
+                'new_chats': new_chats,
+                'new_emergencies': new_emergencies,
+                'top_diseases': self.top_diseases,
+            })
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Current numbers in the shape /api/stats uses"""
+        with self._cond:
+            return {
+                'seq': self.seq,
+                'total_chats': self.total_chats,
+                'total_emergencies': self.total_emergencies,
+                'recent_chats': list(self.recent_chats),
+                'emergency_logs': list(self.emergency_logs),
+                'top_diseases': self.top_diseases,
+            }
+
+    def wait(self, after, timeout):
+        """Deltas newer than `after`, waiting up to `timeout` seconds for one
+
+        Returns an empty list on timeout and None when `after` is older than
+        the kept history, in which case the caller should send a snapshot.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after, timeout)
+            if self.seq <= after:
+                return []
+            if not self._deltas or self._deltas[0]['seq'] > after + 1:
+                return None
+            return [delta for delta in self._deltas if delta['seq'] > after]
+
+    def stats(self):
+        with self._cond:
+            return {'seq': self.seq, 'subscribers': self.subscribers, 'seeded': self._seeded}
+
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
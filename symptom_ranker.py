@@ -0,0 +1,277 @@
+"""TF-IDF ranking of diseases against a list of symptoms
+
+"I have fever, headache and pain behind the eyes" is scored against the
+symptoms and causes text of every disease. Scoring uses a precomputed sparse
+TF-IDF matrix stored column by column: for every term, the rows
+(diseases) it occurs in and their weights. Each disease's vector is
+L2-normalized, so a score is the cosine similarity between the message
+and the disease, from 0 to 1.
+
+A query only touches the columns of its own terms. With NumPy installed,
+the postings are summed into one score vector with a single bincount and
+the top k are picked with argpartition. Without it, the postings are
+summed into a list in a Python loop, which is about 20x slower on a large
+catalog.
+
+The matrix is written next to the database (`database.tfidf`, or
+CHATBOT_SYMPTOM_INDEX) in the catalog snapshot layout. It is tagged with
+the catalog version, so a restart maps the file instead of rebuilding it,
+and any catalog change rebuilds it on first use. A catalog served from a
+snapshot carries its own copy of the matrix, which is used instead.
+
+NumPy is imported by the first ranker, not at startup; the import alone
+takes about 60 ms.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress
+
+import db
+from catalog import get_catalog
+from catalog_snapshot import add_table, map_sections, mapped_table, write_sections
+from search import symptom_terms
+
+MAGIC = b'TFID'
+# Bump when the tokenizer or weighting changes, so old files are rebuilt
+FORMAT_VERSION = 4
+# How much one occurrence counts in each column
+FIELD_WEIGHTS = {'symptoms': 1.0, 'causes': 0.5}
+# Symptoms are listed hallmark first: a word in the n-th comma-separated
+# symptom counts 1 + LEAD_WEIGHT / n, so "fever, joint pain" up front
+# outweighs the same words late in a long list
+LEAD_WEIGHT = 1.0
+
+_ranker = None
+_ranker_lock = threading.Lock()
+# The numpy module once load_numpy() ran, None if it is not installed
+numpy = None
+_numpy_checked = False
+
+
+def index_path():
+    return os.environ.get('CHATBOT_SYMPTOM_INDEX') or os.path.splitext(db.DATABASE_PATH)[0] + '.tfidf'
+
+
+def load_numpy():
+    global numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_checked = True
+    return numpy
+
+
+def stem(word):
+    """Fold common plurals: "headaches" -> "headache", "rashes" -> "rash" """
+    if len(word) <= 3 or not word.endswith('s') or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('shes', 'xes', 'sses')):
+        return word[:-2]
+    return word[:-1]
+
+
+def sublinear(tf):
+    """Term frequency damped with 1 + log(tf); a lone causes mention (0.5) counts as is"""
+    return 1.0 + math.log(tf) if tf >= 1.0 else tf
+
+
+def terms(text):
+    """Stemmed symptom terms of `text`, without duplicates"""
+    return list(dict.fromkeys(stem(word) for word in symptom_terms(text)))
+
+
+class SymptomRanker:
+    """Sparse TF-IDF matrix over the diseases of one catalog version"""
+
+    def __init__(self, version, ids, vocabulary, idf, offsets, rows, weights):
+        self.version = version
+        # row -> disease id
+        self.ids = ids
+        # term -> (column,)
+        self._vocabulary = vocabulary
+        self._idf = idf
+        # Column c's postings are rows[offsets[c]:offsets[c + 1]] (ascending)
+        # with the matching weights
+        self._offsets = offsets
+        self._rows = rows
+        self._weights = weights
+        self._rows_np = self._weights_np = None
+        if load_numpy() is not None:
+            self._rows_np = numpy.frombuffer(rows, dtype=numpy.uint32)
+            self._weights_np = numpy.frombuffer(weights, dtype=numpy.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, catalog):
+        """Tokenize every disease of `catalog` into a new matrix"""
+        documents = []
+        document_frequency = Counter()
+        for record in catalog.records:
+            counts = Counter()
+            for position, symptom in enumerate((record.get('symptoms') or '').split(','), 1):
+                for word in symptom_terms(symptom):
+                    counts[stem(word)] += FIELD_WEIGHTS['symptoms'] * (1.0 + LEAD_WEIGHT / position)
+            for word in symptom_terms(record.get('causes') or ''):
+                counts[stem(word)] += FIELD_WEIGHTS['causes']
+            documents.append(counts)
+            document_frequency.update(counts.keys())
+
+        total = len(documents)
+        vocabulary = {term: (column,) for column, term in enumerate(sorted(document_frequency))}
+        idf = array('f', (math.log((total + 1) / (document_frequency[term] + 1)) + 1.0
+                          for term in sorted(document_frequency)))
+        postings = [[] for _ in vocabulary]
+        for row, counts in enumerate(documents):
+            vector = {term: sublinear(tf) * idf[vocabulary[term][0]] for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            for term, weight in vector.items():
+                postings[vocabulary[term][0]].append((row, weight / norm))
+
+        offsets = array('I', [0])
+        rows = array('I')
+        weights = array('f')
+        for column_postings in postings:
+            for row, weight in column_postings:
+                rows.append(row)
+                weights.append(weight)
+            offsets.append(len(rows))
+        ids = array('I', (record['id'] for record in catalog.records))
+        return cls(catalog.version, ids, vocabulary, idf, offsets, rows, weights)
+
+    def sections(self):
+        """Section name -> bytes, for save() and the catalog snapshot"""
+        sections = {}
+        add_table(sections, 'vocab', self._vocabulary)
+        sections['ids'] = array('I', self.ids).tobytes()
+        sections['idf'] = array('f', self._idf).tobytes()
+        sections['off'] = array('I', self._offsets).tobytes()
+        sections['row'] = array('I', self._rows).tobytes()
+        sections['wt'] = array('f', self._weights).tobytes()
+        return sections
+
+    def save(self, path):
+        """Write the matrix to `path` atomically"""
+        return write_sections(path, self.sections(), self.version, MAGIC, FORMAT_VERSION)
+
+    @classmethod
+    def from_sections(cls, version, sections):
+        """Matrix over mapped sections written by sections()"""
+        return cls(version, sections['ids'].cast('I'), mapped_table(sections, 'vocab'), sections['idf'].cast('f'),
+                   sections['off'].cast('I'), sections['row'].cast('I'), sections['wt'].cast('f'))
+
+    @classmethod
+    def load(cls, path):
+        """Map a matrix written by save(); raises OSError or ValueError"""
+        version, sections, _ = map_sections(path, MAGIC, FORMAT_VERSION)
+        return cls.from_sections(version, sections)
+
+    def _query(self, text):
+        """(term, column, weight) of the known terms of `text`; weights are L2-normalized"""
+        query = []
+        for term in terms(text):
+            found = self._vocabulary.get(term)
+            if found:
+                query.append((term, found[0], self._idf[found[0]]))
+        norm = math.sqrt(sum(weight * weight for _, _, weight in query)) or 1.0
+        return [(term, column, weight / norm) for term, column, weight in query]
+
+    def rank(self, text, limit=5):
+        """Best `limit` diseases for the symptoms in `text`
+
+        Returns (disease id, score, matched terms) tuples, best first. The
+        score is the cosine similarity, from 0 to 1.
+        """
+        query = self._query(text)
+        if not query or limit <= 0:
+            return []
+        offsets = self._offsets
+        if self._rows_np is not None:
+            spans = [(offsets[column], offsets[column + 1], weight) for _, column, weight in query]
+            rows = numpy.concatenate([self._rows_np[start:end] for start, end, _ in spans])
+            values = numpy.concatenate([self._weights_np[start:end] * weight for start, end, weight in spans])
+            scores = numpy.bincount(rows, weights=values, minlength=len(self.ids))
+            count = min(limit, int(numpy.count_nonzero(scores)))
+            if count <= 0:
+                return []
+            top = numpy.argpartition(scores, -count)[-count:]
+            best = sorted(((int(row), float(scores[row])) for row in top), key=lambda item: (-item[1], item[0]))
+        else:
+            scores = [0.0] * len(self.ids)
+            rows, weights = self._rows, self._weights
+            for _, column, weight in query:
+                start, end = offsets[column], offsets[column + 1]
+                for row, value in zip(rows[start:end], weights[start:end]):
+                    scores[row] += value * weight
+            # The k-th best score, then only the rows reaching it are sorted
+            kth = heapq.nlargest(limit, scores)[-1]
+            keep = kth.__le__ if kth > 0 else (0.0).__lt__
+            candidates = sorted(compress(range(len(scores)), map(keep, scores)), key=lambda row: (-scores[row], row))
+            best = [(row, scores[row]) for row in candidates[:limit]]
+        return [(self.ids[row], round(score, 4), self._matched(row, query)) for row, score in best]
+
+    def _matched(self, row, query):
+        """Query terms that occur in disease `row`, by bisecting each column"""
+        matched = []
+        for term, column, _ in query:
+            start, end = self._offsets[column], self._offsets[column + 1]
+            index = bisect_left(self._rows, row, start, end)
+            if index < end and self._rows[index] == row:
+                matched.append(term)
+        return matched
+
+
+def load_or_build(catalog, path=None):
+    """The persisted matrix for `catalog`, rebuilt and saved if missing or stale"""
+    path = path or index_path()
+    try:
+        ranker = SymptomRanker.load(path)
+        if ranker.version == catalog.version:
+            return ranker
+    except (OSError, ValueError):
+        pass
+    ranker = SymptomRanker.build(catalog)
+    try:
+        ranker.save(path)
+    except OSError:
+        # Read-only directory: rank from memory, rebuild on the next start
+        pass
+    return ranker
+
+
+def get_ranker():
+    """Ranker for the current catalog, loaded on first use and after every change"""
+    global _ranker
+    catalog = get_catalog()
+    ranker = _ranker
+    if ranker is None or ranker.version != catalog.version:
+        with _ranker_lock:
+            if _ranker is None or _ranker.version != catalog.version:
+                sections = getattr(catalog, 'symptom_sections', None)
+                if sections:
+                    _ranker = SymptomRanker.from_sections(catalog.version, sections)
+                else:
+                    _ranker = load_or_build(catalog)
+            ranker = _ranker
+    return ranker
+
+
+def highlight(text, matched, words=14):
+    """Up to `words` words of `text` around the first matched term, matched words in **bold**"""
+    tokens = re.findall(r'\S+', text)
+    hits = [i for i, token in enumerate(tokens) if stem(re.sub(r'\W', '', token.lower())) in matched]
+    start = max(0, min(hits[0] - 2, len(tokens) - words)) if hits else 0
+    parts = [re.sub(r'\w.*\w|\w', r'**\g<0>**', token) if i in hits else token
+             for i, token in enumerate(tokens[start:start + words], start)]
+    return ('…' if start > 0 else '') + ' '.join(parts) + ('…' if start + words < len(tokens) else '')
@@ -0,0 +1,42 @@
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app reads its settings when imported: point it at a scratch copy of
+# the bundled database before any test imports it
+_directory = tempfile.mkdtemp(prefix='chatbot-tests-')
+shutil.copy(os.path.join(ROOT, 'database.db'), os.path.join(_directory, 'database.db'))
+os.environ['CHATBOT_DB_PATH'] = os.path.join(_directory, 'database.db')
+os.environ['CHATBOT_LOG_SPILL_PATH'] = os.path.join(_directory, 'spill.jsonl')
+os.environ.pop('CHATBOT_CATALOG_SNAPSHOT', None)
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def admission(monkeypatch):
+    """A fresh admission controller per test, so token buckets do not carry over"""
+    import app
+    from admission import AdmissionControl
+
+    control = AdmissionControl(rate=app.admission.rate, burst=app.admission.burst,
+                               max_in_flight=app.admission.max_in_flight)
+    monkeypatch.setattr(app, 'admission', control)
+    return control
+
+
+@pytest.fixture(autouse=True)
+def batch_admission(monkeypatch):
+    """A fresh /api/chat/batch bucket per test"""
+    import app
+    from admission import AdmissionControl
+
+    control = AdmissionControl(rate=app.batch_admission.rate, burst=app.batch_admission.burst,
+                               max_in_flight=app.batch_admission.max_in_flight)
+    monkeypatch.setattr(app, 'batch_admission', control)
+    return control
@@ -0,0 +1,55 @@
+import asyncio
+import gzip
+import json
+
+import app
+import asgi
+
+
+def call(path, query=b'', headers=(), method='GET', body=b''):
+    """(status, headers, body) of one ASGI request"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': list(headers),
+             'client': ('203.0.113.7', 4000)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+def test_diseases_pages_like_the_flask_route():
+    client = app.app.test_client()
+    status, _, body = call('/api/diseases', b'limit=5&fields=name')
+    assert status == 200
+    assert json.loads(body) == client.get('/api/diseases?limit=5&fields=name').get_json()
+    page = json.loads(body)
+    status, _, body = call('/api/diseases', f'limit=5&fields=name&cursor={page["next_cursor"]}'.encode())
+    assert json.loads(body)['diseases'][0] not in page['diseases']
+
+
+def test_diseases_etag_revalidates_with_304():
+    status, headers, body = call('/api/diseases', b'limit=5', [(b'accept-encoding', b'gzip')])
+    assert status == 200 and headers[b'content-encoding'] == b'gzip'
+    assert len(json.loads(gzip.decompress(body))['diseases']) == 5
+    status, _, body = call('/api/diseases', b'limit=5',
+                           [(b'accept-encoding', b'gzip'), (b'if-none-match', headers[b'etag'])])
+    assert status == 304 and body == b''
+
+
+def test_diseases_rejects_bad_queries():
+    assert call('/api/diseases', b'limit=0')[0] == 400
+    assert call('/api/diseases', b'fields=nope')[0] == 400
+    assert call('/api/diseases', b'cursor=%%%')[0] == 400
+
+
+def test_chat_honours_compact_like_the_flask_route():
+    message = json.dumps({'message': 'dengue'}).encode()
+    assert 'disease' in json.loads(call('/api/chat', method='POST', body=message)[2])
+    assert 'disease' not in json.loads(call('/api/chat', b'compact=1', method='POST', body=message)[2])
+    compact_body = json.dumps({'message': 'dengue', 'compact': True}).encode()
+    assert 'disease' not in json.loads(call('/api/chat', method='POST', body=compact_body)[2])
@@ -0,0 +1,67 @@
+import json
+
+import app
+
+
+def ndjson(count):
+    return ''.join(json.dumps({'message': 'dengue'}) + '\n' for _ in range(count))
+
+
+def test_unstreamed_ndjson_batch_is_capped(monkeypatch):
+    monkeypatch.setattr(app, 'MAX_BATCH_SIZE', 3)
+    client = app.app.test_client()
+    response = client.post('/api/chat/batch', data=ndjson(4), content_type='application/x-ndjson')
+    assert response.status_code == 413
+    response = client.post('/api/chat/batch', data=ndjson(3), content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert len(response.get_json()['results']) == 3
+
+
+def test_streamed_ndjson_batch_is_not_capped(monkeypatch):
+    monkeypatch.setattr(app, 'MAX_BATCH_SIZE', 3)
+    client = app.app.test_client()
+    response = client.post('/api/chat/batch?stream=1', data=ndjson(4), content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).splitlines()) == 4
+
+
+def test_batch_does_not_use_the_chat_burst(admission, batch_admission):
+    client = app.app.test_client()
+    response = client.post('/api/chat/batch', json={'messages': ['dengue'] * 100})
+    assert response.status_code == 200
+    assert len(response.get_json()['results']) == 100
+    assert batch_admission.in_flight == 0
+    response = client.post('/api/chat', json={'message': 'malaria'})
+    assert response.status_code == 200
+
+
+def test_streamed_batch_larger_than_the_chat_burst_is_answered(admission):
+    count = int(admission.burst) * 5
+    client = app.app.test_client()
+    response = client.post('/api/chat/batch?stream=1', data=ndjson(count), content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == count
+    assert all(line['type'] != 'rate_limited' for line in lines)
+
+
+def test_batch_larger_than_the_bulk_burst_takes_the_whole_burst(batch_admission):
+    batch_admission.burst = 10
+    batch_admission.rate = 0.001
+    client = app.app.test_client()
+    response = client.post('/api/chat/batch', json={'messages': ['dengue'] * 25})
+    assert response.status_code == 200
+    assert batch_admission.in_flight == 0
+    response = client.post('/api/chat/batch', json={'messages': ['malaria']})
+    assert response.status_code == 429
+
+
+def test_streamed_batch_stops_when_the_client_runs_out_of_tokens(monkeypatch, batch_admission):
+    monkeypatch.setattr(app, 'BATCH_CHUNK_SIZE', 5)
+    batch_admission.burst = 10
+    batch_admission.rate = 0.001
+    client = app.app.test_client()
+    response = client.post('/api/chat/batch?stream=1', data=ndjson(20), content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 11
+    assert lines[-1]['type'] == 'rate_limited'
+    assert batch_admission.in_flight == 0
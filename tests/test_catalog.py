@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import catalog
+import catalog_snapshot
+import db
+from catalog import load_catalog
+
+
+def test_lookup_by_name_and_alias_ignores_case():
+    diseases = load_catalog()
+    assert diseases.get('  DENGUE fever ')['name'] == 'Dengue Fever'
+    assert diseases.get('dengue')['name'] == 'Dengue Fever'
+    assert diseases.get('TB')['name'] == 'Tuberculosis'
+    assert diseases.get('not a disease') is None
+
+
+def test_search_matches_words_anywhere_in_the_name_in_id_order():
+    diseases = load_catalog()
+    found = diseases.search('fever')
+    assert 'Dengue Fever' in [d['name'] for d in found]
+    assert [d['id'] for d in found] == sorted(d['id'] for d in found)
+    assert [d['name'] for d in diseases.search('dengue fe')] == ['Dengue Fever']
+
+
+def test_snapshot_answers_like_the_in_memory_catalog(tmp_path):
+    diseases = load_catalog()
+    path = str(tmp_path / 'test.catalog')
+    catalog_snapshot.write_snapshot(diseases, path)
+    mapped = catalog_snapshot.open_snapshot(path)
+    assert (len(mapped), mapped.version) == (len(diseases), diseases.version)
+    for query in ('dengue', 'tb', 'Heart Attack', 'nothing'):
+        assert mapped.get(query) == diseases.get(query)
+    for query in ('fever', 'virus', 'dis'):
+        assert mapped.search(query) == diseases.search(query)
+    assert mapped.page(limit=10) == diseases.page(limit=10)
+    assert mapped.fuzzy_get('maleria') == diseases.fuzzy_get('maleria')
+
+
+def test_reload_picks_up_changed_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / 'reload.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    monkeypatch.setattr(catalog, '_catalog', None)
+    monkeypatch.setattr(catalog, 'SNAPSHOT_PATH', None)
+    before = catalog.reload_catalog(path)
+    with db.connection(path) as conn:
+        conn.execute("INSERT INTO diseases (name, symptoms, prevention) VALUES ('Testitis', 'tests', 'none')")
+        conn.commit()
+    after = catalog.reload_catalog(path)
+    assert before.get('testitis') is None
+    assert after.get('testitis')['symptoms'] == 'tests'
+    assert after.version != before.version
+    assert catalog.get_catalog() is after
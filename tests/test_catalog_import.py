@@ -0,0 +1,16 @@
+import catalog_import
+import db
+from init_database import create_tables
+
+
+def test_upsert_keeps_optional_columns_a_row_leaves_out(tmp_path):
+    conn = db.connect(str(tmp_path / 'import.db'))
+    create_tables(conn)
+    full = {'name': 'Dengue', 'symptoms': 'fever', 'prevention': 'nets', 'causes': 'virus',
+            'risk_factors': 'travel', 'info': 'tropical'}
+    catalog_import.import_diseases(conn, [(1, full)])
+    update = {'name': 'Dengue', 'symptoms': 'high fever, rash', 'prevention': 'repellent', 'info': 'seasonal'}
+    catalog_import.import_diseases(conn, [(1, update)])
+    row = conn.execute('SELECT * FROM diseases').fetchone()
+    assert (row['symptoms'], row['prevention'], row['causes'], row['risk_factors'], row['info']) == (
+        'high fever, rash', 'repellent', 'virus', 'travel', 'seasonal')
@@ -0,0 +1,58 @@
+import pytest
+
+import app
+from keyword_matcher import KeywordMatcher
+
+# Phrases the original substring check flagged; inflected keywords must
+# still be emergencies
+INFLECTED_EMERGENCIES = [
+    'my father is having seizures',
+    'she had strokes',
+    'chest pains',
+    'severe pains in my chest',
+    'breathing problems',
+]
+
+
+@pytest.mark.parametrize('message', INFLECTED_EMERGENCIES)
+def test_inflected_keywords_are_emergencies(message):
+    assert app.build_payload(message).type == 'emergency'
+
+
+@pytest.mark.parametrize('message', INFLECTED_EMERGENCIES)
+def test_inflected_emergencies_bypass_admission(message):
+    decision = app.admit_chat(message, '203.0.113.9')
+    app.admission.release()
+    assert decision.priority == 'emergency'
+
+
+def test_open_ended_labels_only_relax_the_end_boundary():
+    matcher = KeywordMatcher({'emergency': ['pain'], 'greeting': ['hi']}, open_ended=('emergency',))
+    assert [m.keyword for m in matcher.find_all('pains')] == ['pain']
+    assert matcher.find_all('spain') == []
+    assert matcher.find_all('history') == []
+
+
+def test_find_emergency_keywords_reports_every_hit_with_its_span():
+    message = 'chest pain and difficulty breathing'
+    matches = app.find_emergency_keywords(message)
+    assert [(m.keyword, message[m.start:m.end]) for m in matches] == [
+        ('chest pain', 'chest pain'), ('difficulty breathing', 'difficulty breathing')]
+    assert app.detect_emergency(message) == (True, 'chest pain')
+    assert app.detect_emergency('what is malaria') == (False, None)
+
+
+def test_generate_response_and_handle_chat_answer_like_build_payload():
+    assert app.generate_response('dengue') == app.build_response('dengue')
+    assert app.generate_response('chest pain')['type'] == 'emergency'
+    response = app.handle_chat('dengue', compact=True)
+    assert response['type'] == 'disease_info'
+    assert 'disease' not in response
+
+
+def test_remove_spans_merges_overlapping_matches():
+    from keyword_matcher import remove_spans
+
+    matcher = KeywordMatcher({'stop': ['what is', 'is', 'the']})
+    text = 'what is the flu'
+    assert remove_spans(text, matcher.find_all(text)).split() == ['flu']
@@ -0,0 +1,61 @@
+import pytest
+
+import app
+import catalog
+from benchmarks.corpus import generate_diseases
+from catalog import DiseaseCatalog
+
+
+@pytest.fixture(scope='module')
+def synthetic():
+    return DiseaseCatalog(generate_diseases(3000))
+
+
+def test_typo_next_to_a_common_word_resolves():
+    found = catalog.get_catalog().fuzzy_get('denge fever')
+    assert found is not None and found['name'] == 'Dengue Fever'
+
+
+def test_common_words_are_checked_not_expanded(synthetic, monkeypatch):
+    queries = [record['name'].lower() for record in synthetic.records[::97]]
+    queries += [query[:2] + query[3:] for query in queries]
+    expanded = [synthetic.fuzzy_get(query) for query in queries]
+    monkeypatch.setattr(catalog, 'FUZZY_MAX_FANOUT', 0)
+    assert [synthetic.fuzzy_get(query) for query in queries] == expanded
+    assert all(found is not None for found in expanded[:len(queries) // 2])
+
+
+def test_id_lists_are_sorted(synthetic):
+    for term in ('disorder', 'fever', 'palsy'):
+        ids = synthetic.fuzzy.ids_for(term)
+        assert ids and ids == sorted(ids)
+
+
+def test_similar_ids_takes_rarer_words_first(synthetic):
+    rare = synthetic.records[0]['name'].lower().split()[0]
+    ids = synthetic.similar_ids(['fever', rare], limit=3)
+    assert len(ids) == 3
+    assert synthetic.by_id[ids[0]]['name'].lower().startswith(rare)
+    assert synthetic.similar_ids(['zzzz']) == []
+
+
+@pytest.mark.parametrize('message, suggestion', [
+    ('test', 'West Nile Virus'),
+    ('this is a test', 'West Nile Virus'),
+    ('cold', 'COPD'),
+    ('common cold', 'COPD'),
+])
+def test_one_name_word_or_short_query_is_only_suggested(message, suggestion):
+    payload = app.build_payload(message)
+    assert payload.type == 'not_found'
+    assert f'Did you mean:\n• {suggestion}' in payload.response['message']
+
+
+@pytest.mark.parametrize('message, name', [
+    ('maleria', 'Malaria'),
+    ('tuberclosis', 'Tuberculosis'),
+    ('dengue fevr', 'Dengue Fever'),
+])
+def test_misspelled_full_names_still_resolve(message, name):
+    payload = app.build_payload(message)
+    assert payload.type == 'disease_info' and payload.response['disease']['name'] == name
@@ -0,0 +1,100 @@
+import os
+import shutil
+import sqlite3
+import threading
+
+import pytest
+
+import analytics
+from log_writer import LogWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / 'logs.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    writer = LogWriter(db_path=path, flush_interval=0.01, spill_path=str(tmp_path / 'spill.jsonl'))
+    yield writer
+    writer.stop()
+
+
+def test_listener_errors_do_not_stop_the_writer(writer):
+    def broken(chats, emergencies):
+        raise RuntimeError('listener bug')
+    writer.add_listener(broken)
+    for message in ('one', 'two'):
+        writer.submit_chat(message, 'reply')
+        writer.flush()
+    assert writer.counters['chat_rows_written'] == 2
+    assert writer.counters['listener_errors'] == 2
+    assert writer._thread.is_alive()
+
+
+def test_failed_batch_is_replayed_after_the_next_commit(writer, monkeypatch):
+    record_batch = analytics.record_batch
+    failed = []
+
+    def flaky(conn, chats, emergencies):
+        if not failed:
+            failed.append(chats)
+            raise sqlite3.OperationalError('database is locked')
+        return record_batch(conn, chats, emergencies)
+    monkeypatch.setattr(analytics, 'record_batch', flaky)
+
+    writer.submit_chat('lost?', 'reply')
+    writer.flush()
+    assert writer.counters['rows_spilled'] == 1 and os.path.exists(writer.spill_path)
+    writer.submit_chat('next', 'reply')
+    writer.flush()
+    assert writer.counters['chat_rows_written'] == 2
+    assert writer.counters['rows_replayed'] == 1
+    assert not os.path.exists(writer.spill_path)
+
+
+def test_schema_error_at_start_keeps_the_thread(writer, monkeypatch):
+    ensure_schema = analytics.ensure_schema
+    failed = []
+
+    def flaky(conn, path=None):
+        if not failed:
+            failed.append(path)
+            raise sqlite3.OperationalError('disk I/O error')
+        return ensure_schema(conn, path)
+    monkeypatch.setattr(analytics, 'ensure_schema', flaky)
+
+    writer.submit_chat('first', 'reply')
+    writer.flush()
+    assert writer._thread.is_alive() and writer.counters['flush_errors'] == 1
+    writer.submit_chat('second', 'reply')
+    writer.flush()
+    assert writer.counters['chat_rows_written'] == 2
+
+
+def test_dead_writer_thread_is_restarted(writer):
+    writer.submit_chat('first', 'reply')
+    writer.flush()
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    writer._thread = dead
+    writer.submit_chat('second', 'reply')
+    writer.flush()
+    assert writer.counters['writer_restarts'] == 1
+    assert writer.counters['chat_rows_written'] == 2
+
+
+def test_counters_add_up_when_request_threads_write_directly(writer):
+    rows = [('dengue', 'reply', '2026-01-01T00:00:00', None)] * 5
+
+    def write():
+        for _ in range(20):
+            writer.write_now(rows, [])
+            writer.submit_chat('malaria', 'reply')
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+    assert writer.stats()['chat_rows_written'] == 8 * 20 * (len(rows) + 1)
@@ -0,0 +1,19 @@
+import analytics
+import app
+
+
+def test_prerender_takes_most_mentioned_diseases_first(monkeypatch):
+    with app.get_db_connection() as conn:
+        analytics.ensure_schema(conn)
+        conn.execute(analytics.UPSERT_MENTIONS, ('Malaria', 10 ** 6))
+        conn.commit()
+    monkeypatch.setattr(app, 'PRERENDER_CARDS', 3)
+    app.payload_cache.clear()
+    payloads = app.prerender_payloads()
+    assert [payload.type for payload in payloads] == ['help'] + ['disease_info'] * 3
+    assert payloads[1].response['disease']['name'] == 'Malaria'
+
+
+def test_prerender_stays_within_the_payload_cache(monkeypatch):
+    monkeypatch.setattr(app.payload_cache, 'max_entries', 0)
+    assert len(app.prerender_payloads()) == 1
@@ -0,0 +1,21 @@
+import pytest
+
+import app
+from query_parser import parse_query
+
+
+@pytest.mark.parametrize('message', [
+    'this is about malaria',
+    'is that malaria',
+    'these are signs of malaria?',
+    'she has malaria',
+])
+def test_determiners_and_pronouns_are_filler(message):
+    assert parse_query(message).terms == ['malaria']
+    payload = app.build_payload(message)
+    assert payload.type == 'disease_info'
+    assert payload.response['disease']['name'] == 'Malaria'
+
+
+def test_pronouns_alone_are_not_symptoms():
+    assert app.build_payload('what causes that').type == 'not_found'
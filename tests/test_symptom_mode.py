@@ -0,0 +1,43 @@
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('message', [
+    'heart disease',
+    'cancer',
+    'what is cancer',
+    'pregnancy',
+    'prevention of dengue and malaria',
+    'bird flu',
+    'kidney failure',
+])
+def test_unknown_diseases_are_not_answered_as_symptoms(message):
+    assert app.build_payload(message).type == 'not_found'
+
+
+def test_unknown_disease_gets_suggestions():
+    assert 'Heart Attack' in app.build_payload('heart disease').response['message']
+
+
+@pytest.mark.parametrize('message, best', [
+    ('fever headache joint pain', 'Chikungunya'),
+    ('pain behind the eyes', 'Dengue Fever'),
+    ('blurred vision and thirst', 'Diabetes Type 2'),
+])
+def test_symptom_lists_are_ranked(message, best):
+    payload = app.build_payload(message)
+    assert payload.type == 'symptom_search'
+    assert payload.response['matches'][0]['name'] == best
+
+
+def test_symptoms_no_disease_mentions_together_still_find_matches():
+    payload = app.build_payload('rash itching')
+    assert payload.type == 'symptom_search'
+    assert {'Eczema', 'Psoriasis'} & {match['name'] for match in payload.response['matches']}
+
+
+def test_hallmark_symptoms_rank_above_late_mentions():
+    names = [match['name'] for match in app.build_payload('fever and joint pain').response['matches']]
+    assert names[0] == 'Chikungunya'
+    assert 'Hepatitis C' not in names[:names.index('Dengue Fever')]
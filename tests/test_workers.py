@@ -0,0 +1,19 @@
+import db
+import workers
+
+
+def test_workers_fork_without_pooled_connections(monkeypatch, tmp_path):
+    monkeypatch.setenv('CHATBOT_CATALOG_SNAPSHOT', str(tmp_path / 'test.catalog'))
+    pools_at_fork = []
+
+    def spawn(index, listener):
+        pools_at_fork.append(dict(db._pools))
+        raise workers._Stop()
+
+    monkeypatch.setattr(workers, 'spawn', spawn)
+    # serve() installs its own SIGINT/SIGTERM handlers; keep pytest's
+    monkeypatch.setattr(workers.signal, 'signal', lambda *args: None)
+    with db.connection():
+        pass
+    workers.serve(1, '127.0.0.1', 0)
+    assert pools_at_fork == [{}]
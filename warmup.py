@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class WarmUp:
+    """Runs a process's warm-up steps once, in a background thread
+
+    Each step is a (name, callable) pair, run in order. A server starts
+    accepting connections right away and reports itself ready (see
+    /api/ready) once every step has finished. Until then, a load balancer
+    keeps traffic on processes that are already warm. A request that
+    arrives early is still answered; it just pays for whatever is not
+    loaded yet.
+
+    A step that raises stops the warm-up. The error is reported and the
+    process never becomes ready, so a broken pod is not put into rotation.
+    """
+
+    def __init__(self, steps, clock=time.perf_counter):
+        self.steps = list(steps)
+        self._clock = clock
+        self._thread = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self.timings = {}
+        self.error = None
+        self.seconds = None
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def start(self):
+        """Start warming up unless already started; returns immediately"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='chatbot-warmup', daemon=True)
+                self._thread.start()
+
+    def run(self):
+        start = self._clock()
+        try:
+            for name, step in self.steps:
+                step_start = self._clock()
+                step()
+                self.timings[name] = (self._clock() - step_start) * 1000
+        except Exception as exc:
+            self.error = f'{name}: {exc!r}'
+        self.seconds = self._clock() - start
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Block until the warm-up has finished; True if the process is ready"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'started': self._thread is not None,
+            'warmup_ms': None if self.seconds is None else round(self.seconds * 1000, 1),
+            'steps_ms': {name: round(ms, 1) for name, ms in self.timings.items()},
+            'error': self.error,
+        }
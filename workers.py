@@ -0,0 +1,160 @@
+"""Pre-fork multi-process server for the Flask app
+
+    python workers.py [--workers 4] [--host 0.0.0.0] [--port 5000]
+
+The parent loads the disease catalog once, writes it to a memory-mapped
+snapshot (catalog_snapshot.py), binds the listening socket and forks the
+workers. Each worker imports the app, maps the snapshot and runs
+werkzeug's threaded server on the shared socket, and the kernel hands
+each connection to one of them. All workers share the snapshot's pages,
+so adding workers does not add copies of the catalog.
+
+With --prebuilt, the parent maps a snapshot built ahead of time by
+`python catalog_snapshot.py build` instead of loading the database; it
+falls back to building one if the file is missing or fails its checksum.
+Workers warm up in the background and report it on /api/ready.
+
+POST /api/catalog/reload in any worker writes a new snapshot and swaps
+it in atomically; the other workers pick it up within a second. A worker
+that exits is replaced. SIGTERM or Ctrl-C stops every worker, and each
+flushes its log queue before exiting.
+
+POSIX only (os.fork).
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+
+import catalog_snapshot
+import db
+from catalog import load_catalog
+from catalog_snapshot import snapshot_path
+
+DEFAULT_WORKERS = int(os.environ.get('CHATBOT_WORKERS', os.cpu_count() or 1))
+# A worker that dies sooner than this after starting is restarted after a pause
+MIN_WORKER_LIFETIME = 1.0
+STOP_TIMEOUT = 15
+
+
+def worker_spill_path(index):
+    """Each worker replays and appends to its own log spill file"""
+    root, ext = os.path.splitext(os.environ.get('CHATBOT_LOG_SPILL_PATH', 'log_spill.jsonl'))
+    return f'{root}-{index}{ext}'
+
+
+def run_worker(index, listener):
+    """Serve requests on `listener` until SIGTERM; runs in the forked child"""
+    os.environ['CHATBOT_LOG_SPILL_PATH'] = worker_spill_path(index)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    from werkzeug.serving import make_server
+
+    import app
+
+    app.warmup.start()
+    server = make_server(*listener.getsockname()[:2], app.app, threaded=True, fd=listener.fileno())
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+    finally:
+        server.server_close()
+        app.log_writer.stop()
+
+
+def spawn(index, listener):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(index, listener)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            # Never return into the parent's supervisor loop
+            os._exit(code)
+    return pid
+
+
+class _Stop(Exception):
+    pass
+
+
+def _stop(signum, frame):
+    raise _Stop()
+
+
+def serve(workers, host, port, prebuilt=False):
+    path = snapshot_path()
+    os.environ['CHATBOT_CATALOG_SNAPSHOT'] = path
+
+    catalog = None
+    if prebuilt:
+        try:
+            catalog = catalog_snapshot.open_snapshot(path)
+            print(f'📦 Prebuilt catalog snapshot {path}: {len(catalog)} diseases, version {catalog.version}')
+        except (OSError, ValueError) as exc:
+            print(f'⚠️ Rebuilding the catalog snapshot: {exc}')
+    if catalog is None:
+        catalog = load_catalog()
+        catalog_snapshot.write_snapshot(catalog, path)
+        print(f'📦 Catalog snapshot {path}: {len(catalog)} diseases, version {catalog.version}')
+    del catalog
+    # A forked child must never share the parent's SQLite connections
+    db.close_pools()
+
+    listener = socket.create_server((host, port), backlog=1024)
+    children = {}
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    try:
+        for index in range(workers):
+            children[spawn(index, listener)] = (index, time.monotonic())
+        print(f'🚀 {workers} workers serving on http://{host}:{port}')
+        while True:
+            pid, status = os.wait()
+            index, started = children.pop(pid, (None, 0))
+            if index is None:
+                continue
+            print(f'⚠️ Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting')
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            children[spawn(index, listener)] = (index, time.monotonic())
+    except _Stop:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                children.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in children:
+            os.kill(pid, signal.SIGKILL)
+        listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--prebuilt', action='store_true',
+                        help='Serve the existing snapshot instead of rebuilding it from the database')
+    args = parser.parse_args()
+    serve(max(1, args.workers), args.host, args.port, args.prebuilt)
+
+
+if __name__ == '__main__':
+    main()